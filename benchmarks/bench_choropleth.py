@@ -0,0 +1,56 @@
+"""Compares the PLZ choropleth rendered as one FeatureCollection against one
+folium.GeoJson layer per PLZ row (the previous implementation), and the
+FeatureCollection at every level of detail from pdict["lod"].
+
+Run from the project root:  python -m benchmarks.bench_choropleth
+"""
+import time
+import folium
+from config import pdict
+from core import dataset_cache
+from core import methods as m1
+
+
+def add_layer_per_row(m, data, value_column, layer_name):
+    color_map = m1.get_color_map(data, value_column)
+    for idx, row in data.iterrows():
+        popup = f"PLZ: {row['PLZ']}, {layer_name}: {row[value_column]}"
+        style = lambda x, color=color_map(row[value_column]): {
+            'fillColor': color,
+            'color': 'black',
+            'weight': 1,
+            'fillOpacity': 0.7
+        }
+        folium.GeoJson(row['geometry'], style_function=style, tooltip=popup).add_to(m)
+    return color_map
+
+
+def render(add_layer, data, value_column, layer_name):
+    start = time.perf_counter()
+    m = folium.Map(location=[52.52, 13.40], zoom_start=10)
+    add_layer(m, data, value_column, layer_name).add_to(m)
+    html = m.get_root().render()
+    return time.perf_counter() - start, len(html.encode('utf-8'))
+
+
+def main(repeat=5):
+    layers = [(dataset_cache.load_residents(pdict), 'Einwohner', 'Residents')]
+    try:
+        layers.append((dataset_cache.load_lstat(pdict), 'Number', 'Charging Stations'))
+    except FileNotFoundError:
+        print("Ladesaeulenregister.csv not found, skipping the Charging Stations layer")
+
+    variants = [('per row', add_layer_per_row), ('feature collection', m1.add_choropleth_layer)]
+    for min_zoom, geometries in dataset_cache.load_plz_geometries(pdict):
+        variants.append((f'lod from zoom {min_zoom}',
+                         lambda m, d, v, n, geometries=geometries: m1.add_choropleth_layer(m, d, v, n, geometries)))
+
+    for data, value_column, layer_name in layers:
+        for label, add_layer in variants:
+            runs = [render(add_layer, data, value_column, layer_name) for _ in range(repeat)]
+            seconds = min(r[0] for r in runs)
+            print(f"{layer_name:<18} {label:<20} {seconds * 1000:8.1f} ms {runs[0][1] / 1024:10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
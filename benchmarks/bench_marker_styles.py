@@ -0,0 +1,79 @@
+"""Styling a search result of a few thousand stations (a city wide view):
+the per station power category and f-string popup of the previous search loop
+against core.methods.style_stations, uncached and with the popups cached by a
+previous rerun.
+
+Run from the project root:  python -m benchmarks.bench_marker_styles
+"""
+import time
+import numpy as np
+from core import methods as m1
+from src.search_context.domain.value_objects.power_category import CATEGORY_LIMITS
+from src.search_context.domain.value_objects.station_view import StationView
+
+
+def create_stations(n, rng):
+    powers = rng.choice([11.0, 22.0, 50.0, 50.1, 150.0, 300.0, 600.0, np.nan], n)
+    return [StationView(i, "10115", 52.5, 13.4, "Berlin", f"Street {i}", "Mitte", "Berlin", "GreenCharge",
+                        None if np.isnan(power) else float(power), None, "Normalladeeinrichtung", "available")
+            for i, power in enumerate(powers)]
+
+
+def scalar_power_category(power):
+    """The former scalar categorization, float coercion and a comparison per category"""
+    if power is None or power != power:
+        return 'Unknown'
+    power = float(power)
+    for name, limit in CATEGORY_LIMITS:
+        if limit is None or power <= limit:
+            return name
+
+
+def style_per_station(stations):
+    styles = []
+    for station in stations:
+        power_category_name = scalar_power_category(station.power_charging_dev)
+        power_category, color = power_category_name, m1.POWER_CATEGORY_COLORS.get(power_category_name, 'gray')
+        popup_content = f"""
+        <div style="font-size: 14px;">
+        <h4 style="color: #007bff;">Charging Station Information</h4>
+        <strong>Street:</strong> {station.street}<br>
+        <strong>District:</strong> {station.district}<br>
+        <strong>Location:</strong> {station.location}<br>
+        <strong>Power Charging Device:</strong> {station.power_charging_dev} kW<br>
+        <strong>Charging Device Type:</strong> {station.type_charging_device}<br>
+        <strong>Operator:</strong> {station.operator}<br>
+        <strong>Power Category:</strong> {power_category}<br><br>
+        <p style="color: #888; font-size: 12px;">Click on the marker for more details.</p>
+        </div>
+        """
+        styles.append((power_category, color, popup_content))
+    return styles
+
+
+def timed(style, stations, repeat, before=None):
+    total = 0.0
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        style(stations)
+        total += time.perf_counter() - start
+    return total / repeat
+
+
+def main(sizes=(100, 1000, 5000), repeat=20):
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        stations = create_stations(n, rng)
+        expected = [(category, color) for category, color, _ in style_per_station(stations)]
+        assert [(category, color) for category, color, _ in m1.style_stations(stations)] == expected
+
+        for label, style, before in (("per station", style_per_station, None),
+                                     ("batch, uncached", m1.style_stations, m1.station_popup.cache_clear),
+                                     ("batch, cached popups", m1.style_stations, None)):
+            print(f"{n:5} stations, {label:<22} {timed(style, stations, repeat, before) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
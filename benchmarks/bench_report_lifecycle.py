@@ -0,0 +1,101 @@
+"""Malfunction reports per second with concurrent submitters against a SQLite
+file in WAL mode (with the app's synchronous=NORMAL and with FULL), for the old
+flow of one commit per repository call and for
+ReportAggregateService.report_malfunction, which commits once.
+
+Run from the project root:  python -m benchmarks.bench_report_lifecycle
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from database.database import Base, SQLITE_PRAGMAS, create_database_engine, session_scope
+from src.register_context.domain.entities.users import User
+from src.register_context.domain.entities.admin import Admin
+from src.register_context.domain.entities.csoperator import CSOperator
+from src.report_context.domain.entities.notification import Notification
+from src.report_context.domain.entities.report import Report
+from src.search_context.domain.entities.chargingstation import ChargingStation
+from src.report_context.domain.aggregate.ReportAggregateService import ReportAggregateService
+from src.report_context.infrastructure.repositories.ReportRepository import ReportRepository
+from src.report_context.infrastructure.repositories.NotificationRepository import NotificationRepository
+from src.register_context.infrastructure.repositories.UserRepository import UserRepository
+from src.register_context.infrastructure.repositories.AdminRepository import AdminRepository
+from src.register_context.infrastructure.repositories.CSOperatorRepository import CSOperatorRepository
+from src.search_context.infrastructure.repositories.ChargingStationRepository import ChargingStationRepository
+
+CONTENT = "<h5>MALFUNCTION HAS BEEN REPORTED FOR STATION ID: {}</h5>"
+
+
+def create_database(path, stations, admins=5):
+    engine = create_database_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [{"user_id": 1, "username": "user", "password": "SecureUserPassword1@"}])
+        connection.execute(Admin.__table__.insert(), [
+            {"sys_admin_id": i, "username": f"admin{i}", "password": "SecureAdminPassword1@", "number_reports_assigned": 0}
+            for i in range(1, admins + 1)])
+        connection.execute(ChargingStation.__table__.insert(), [
+            {"station_id": i, "postal_code": "10115", "latitude": 52.52, "longitude": 13.40, "federal_state": "Berlin",
+             "district": "Mitte", "street": "Street", "power_charging_dev": 22.0, "cs_status": "available"}
+            for i in range(stations)])
+    return engine
+
+
+def separate_commits(session, report):
+    """The flow before the unit of work, every repository call commits"""
+    reports, admins = ReportRepository(session), AdminRepository(session)
+    if any(r.status != "resolved" for r in reports.find_reports_by_station_id(report.station_id)):
+        return
+    admin = next((a for a in admins.get_all_admins() if a.number_reports_assigned < 10), None) or admins.get_all_admins()[0]
+    report.admin_id = admin.sys_admin_id
+    reports.create_report(report)
+    admin.number_reports_assigned += 1
+    admins.update_admin(admin)
+    ChargingStationRepository(session).update_charging_station(report.station_id, "out_of_service")
+    NotificationRepository(session).create_broadcast_notification(CONTENT.format(report.station_id))
+
+
+def one_commit(session, report):
+    service = ReportAggregateService(ReportRepository(session), UserRepository(session), NotificationRepository(session),
+                                     AdminRepository(session), ChargingStationRepository(session), CSOperatorRepository(session))
+    service.report_malfunction(report)
+
+
+def run(flow, submitters, reports_per_submitter):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_database(os.path.join(directory, "bench.db"), submitters * reports_per_submitter)
+        Session = sessionmaker(bind=engine)
+        failed = []
+
+        def submit(submitter):
+            for i in range(reports_per_submitter):
+                station_id = submitter * reports_per_submitter + i
+                try:
+                    with session_scope(Session) as session:
+                        flow(session, Report(station_id=station_id, description="Broken", user_id=1))
+                except OperationalError:
+                    failed.append(station_id)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(submitters) as executor:
+            list(executor.map(submit, range(submitters)))
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+    return (submitters * reports_per_submitter - len(failed)) / elapsed, len(failed)
+
+
+def main(reports_per_submitter=200):
+    # NORMAL is the app's setting, FULL syncs the WAL on every commit
+    for synchronous in ("NORMAL", "FULL"):
+        SQLITE_PRAGMAS["synchronous"] = synchronous
+        for submitters in (1, 4, 8):
+            for label, flow in (("commit per call", separate_commits), ("one commit", one_commit)):
+                rate, failed = run(flow, submitters, reports_per_submitter)
+                print(f"synchronous={synchronous:<6} {submitters} submitters, {label:<16} {rate:8.1f} reports/s  ({failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Map build and render time and HTML size for a city wide station result:
+a Marker per station with fit_bounds on every iteration (the previous search
+loop), core.methods.add_station_markers with a Marker per station, and with
+the clustered FastMarkerCluster layer.
+
+Run from the project root:  python -m benchmarks.bench_station_markers
+"""
+import time
+import folium
+import numpy as np
+from folium import Marker, Popup
+from core import methods as m1
+from benchmarks.bench_marker_styles import create_stations
+
+BERLIN = (52.34, 52.68, 13.09, 13.76)  # lat min/max, lon min/max
+
+
+def markers_per_station(m, stations):
+    latitudes, longitudes = [], []
+    for station, (_, color, popup_content) in zip(stations, m1.style_stations(stations)):
+        latitudes.append(station.latitude)
+        longitudes.append(station.longitude)
+        Marker(location=[station.latitude, station.longitude],
+               popup=Popup(popup_content, max_width=300),
+               icon=folium.Icon(color=color, icon='cloud')).add_to(m)
+        m.fit_bounds([[min(latitudes), min(longitudes)], [max(latitudes), max(longitudes)]])
+
+
+def render(add_markers, stations):
+    start = time.perf_counter()
+    m = folium.Map(location=[52.52, 13.40], zoom_start=10)
+    add_markers(m, stations)
+    html = m.get_root().render()
+    return time.perf_counter() - start, len(html)
+
+
+def main(sizes=(100, 1000, 5000)):
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        stations = [station._replace(latitude=lat, longitude=lon) for station, lat, lon in zip(
+            create_stations(n, rng), rng.uniform(BERLIN[0], BERLIN[1], n), rng.uniform(BERLIN[2], BERLIN[3], n))]
+        for label, add_markers in (("marker per station, old loop", markers_per_station),
+                                   ("marker per station", lambda m, s: m1.add_station_markers(m, s, cluster_threshold=len(s))),
+                                   ("FastMarkerCluster", lambda m, s: m1.add_station_markers(m, s, cluster_threshold=0))):
+            elapsed, size = render(add_markers, stations)
+            print(f"{n:5} stations, {label:<30} {elapsed * 1000:9.1f} ms  {size / 1e6:7.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
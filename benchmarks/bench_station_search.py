@@ -0,0 +1,66 @@
+"""Latency of k-nearest and radius searches over a Berlin sized register of
+charging stations, for the spatial index alone and through the repository
+(index plus loading the matching rows from SQLite).
+
+Run from the project root:  python -m benchmarks.bench_station_search
+"""
+import time
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.database import Base
+from src.register_context.domain.entities.users import User
+from src.report_context.domain.entities.notification import Notification
+from src.report_context.domain.entities.report import Report
+from src.search_context.domain.entities.chargingstation import ChargingStation
+from src.search_context.infrastructure.repositories.ChargingStationRepository import ChargingStationRepository
+
+BERLIN = (52.34, 52.68, 13.09, 13.76)  # lat min/max, lon min/max
+
+
+def create_register(session, n, rng):
+    latitudes = rng.uniform(BERLIN[0], BERLIN[1], n)
+    longitudes = rng.uniform(BERLIN[2], BERLIN[3], n)
+    powers = rng.choice([11.0, 22.0, 50.0, 150.0, 300.0, 600.0], n)
+    statuses = rng.choice(["available", "available", "available", "out_of_service"], n)
+    session.execute(ChargingStation.__table__.insert(), [
+        {"station_id": i, "postal_code": "10115", "latitude": lat, "longitude": lon, "federal_state": "Berlin",
+         "power_charging_dev": power, "cs_status": status}
+        for i, (lat, lon, power, status) in enumerate(zip(latitudes, longitudes, powers, statuses))])
+    session.commit()
+
+
+def timed(search, points):
+    start = time.perf_counter()
+    for lat, lon in points:
+        search(lat, lon)
+    return (time.perf_counter() - start) / len(points)
+
+
+def main(n=5000, queries=2000):
+    rng = np.random.default_rng(0)
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    create_register(session, n, rng)
+
+    repository = ChargingStationRepository(session)
+    start = time.perf_counter()
+    index = repository.spatial_index()
+    print(f"index build for {len(index)} stations {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    points = np.column_stack([rng.uniform(BERLIN[0], BERLIN[1], queries), rng.uniform(BERLIN[2], BERLIN[3], queries)])
+    searches = [
+        ("index nearest 10", lambda lat, lon: index.nearest(lat, lon, 10)),
+        ("index nearest 10, filtered", lambda lat, lon: index.nearest(lat, lon, 10, ["High Power"], ["available"])),
+        ("index radius 1 km", lambda lat, lon: index.within_radius(lat, lon, 1000)),
+        ("index radius 1 km, filtered", lambda lat, lon: index.within_radius(lat, lon, 1000, ["High Power"], ["available"])),
+        ("repository nearest 10", lambda lat, lon: repository.find_nearest(lat, lon, 10, statuses=["available"])),
+        ("repository radius 1 km", lambda lat, lon: repository.find_within_radius(lat, lon, 1000, statuses=["available"])),
+    ]
+    for label, search in searches:
+        print(f"{label:<30} {timed(search, points) * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Filter latency over a Berlin sized register of charging stations, for the
+in-memory StationSnapshot (mask alone and with StationView rows) and for the
+same filter as a SQLite query.
+
+Run from the project root:  python -m benchmarks.bench_station_snapshot
+"""
+import time
+import numpy as np
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database.database import Base
+from src.register_context.domain.entities.users import User
+from src.report_context.domain.entities.notification import Notification
+from src.report_context.domain.entities.report import Report
+from src.search_context.domain.entities.chargingstation import ChargingStation
+from src.search_context.infrastructure.repositories.ChargingStationRepository import ChargingStationRepository
+
+BERLIN = (52.34, 52.68, 13.09, 13.76)  # lat min/max, lon min/max
+POSTAL_CODES = [str(10115 + i * 20) for i in range(190)]
+OPERATORS = [f"Operator {i}" for i in range(60)]
+
+
+def create_register(session, n, rng):
+    session.execute(ChargingStation.__table__.insert(), [
+        {"station_id": i, "postal_code": postal_code, "latitude": lat, "longitude": lon, "street": f"Street {i}",
+         "district": "Mitte", "federal_state": "Berlin", "operator": operator, "power_charging_dev": power,
+         "type_charging_device": "Normalladeeinrichtung", "cs_status": status}
+        for i, (postal_code, lat, lon, operator, power, status) in enumerate(zip(
+            rng.choice(POSTAL_CODES, n), rng.uniform(BERLIN[0], BERLIN[1], n), rng.uniform(BERLIN[2], BERLIN[3], n),
+            rng.choice(OPERATORS, n), rng.choice([11.0, 22.0, 50.0, 150.0, 300.0, 600.0], n),
+            rng.choice(["available", "available", "available", "out_of_service"], n)))])
+    session.commit()
+
+
+def timed(search, arguments):
+    start = time.perf_counter()
+    for argument in arguments:
+        search(argument)
+    return (time.perf_counter() - start) / len(arguments)
+
+
+def main(n=5000, queries=2000):
+    rng = np.random.default_rng(0)
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    create_register(session, n, rng)
+
+    repository = ChargingStationRepository(session)
+    start = time.perf_counter()
+    snapshot = repository.snapshot()
+    print(f"snapshot build for {len(snapshot)} stations {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    postal_codes = rng.choice(POSTAL_CODES, queries).tolist()
+    operators = rng.choice(OPERATORS, queries).tolist()
+    by_postal_code = text("""
+        SELECT * FROM chargingstation
+        WHERE postal_code = :postal_code AND federal_state = 'Berlin' AND cs_status = 'available'
+    """)
+    by_operator = text("""
+        SELECT * FROM chargingstation
+        WHERE operator = :operator AND cs_status = 'available' AND power_charging_dev > 50 AND power_charging_dev <= 500
+    """)
+    searches = [
+        ("snapshot mask postal code", postal_codes,
+         lambda plz: snapshot.mask(postal_codes=[plz], federal_states=["Berlin"], statuses=["available"])),
+        ("snapshot views postal code", postal_codes, repository.find_by_postal_code),
+        ("SQLite postal code", postal_codes,
+         lambda plz: session.execute(by_postal_code, {"postal_code": plz}).all()),
+        ("snapshot mask operator, power", operators,
+         lambda operator: snapshot.mask(operators=[operator], statuses=["available"], power_categories=["Medium Power", "High Power"])),
+        ("snapshot views operator, power", operators,
+         lambda operator: snapshot.find(operators=[operator], statuses=["available"], power_categories=["Medium Power", "High Power"])),
+        ("SQLite operator, power", operators,
+         lambda operator: session.execute(by_operator, {"operator": operator}).all()),
+    ]
+    for label, arguments, search in searches:
+        print(f"{label:<32} {timed(search, arguments) * 1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
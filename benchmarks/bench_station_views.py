@@ -0,0 +1,73 @@
+"""Latency and allocations of loading postal code search results as ORM
+entities wrapped in ChargingStationAggregate (the former find_by_postal_code)
+and as StationView tuples.
+
+Run from the project root:  python -m benchmarks.bench_station_views
+"""
+import time
+import tracemalloc
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database.database import Base
+from src.register_context.domain.entities.users import User
+from src.report_context.domain.entities.notification import Notification
+from src.report_context.domain.entities.report import Report
+from src.search_context.domain.entities.chargingstation import ChargingStation
+from src.search_context.infrastructure.repositories.ChargingStationRepository import ChargingStationRepository
+
+POSTAL_CODE = "10115"
+
+
+def create_register(session, n):
+    session.execute(ChargingStation.__table__.insert(), [
+        {"station_id": i, "postal_code": POSTAL_CODE, "latitude": 52.53, "longitude": 13.38, "location": "Berlin",
+         "street": f"Street {i}", "district": "Mitte", "federal_state": "Berlin", "operator": "GreenCharge",
+         "power_charging_dev": 22.0, "type_charging_device": "Normalladeeinrichtung", "cs_status": "available"}
+        for i in range(n)])
+    session.commit()
+
+
+def aggregates(repository):
+    """The former find_by_postal_code"""
+    query = text("""
+        SELECT * FROM chargingstation
+        WHERE postal_code = :postal_code AND federal_state = 'Berlin' AND cs_status = 'available'
+    """)
+    rows = repository.session.execute(query, {"postal_code": POSTAL_CODE}).mappings().all()
+    return [repository._to_aggregate(row) for row in rows]
+
+
+def views(repository):
+    return repository.find_by_postal_code(POSTAL_CODE)
+
+
+def measure(load, repository, repeat):
+    load(repository)  # warm up the statement cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        load(repository)
+    latency = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    result = load(repository)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latency, size / len(result)
+
+
+def main(sizes=(20, 200, 2000), repeat=50):
+    for n in sizes:
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        create_register(session, n)
+        repository = ChargingStationRepository(session)
+        for label, load in (("ORM aggregates", aggregates), ("StationView", views)):
+            latency, per_row = measure(load, repository, repeat)
+            print(f"{n:5} stations, {label:<15} {latency * 1000:8.3f} ms  {latency / n * 1e6:6.2f} us/row  {per_row:7.0f} bytes/row")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
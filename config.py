@@ -1,5 +1,10 @@
+import os
+
 p                           = dict()
 p['picklefolder']           = 'pickles'
+p['datafolder']             = 'datasets'
+p['artifactfolder']         = 'artifacts'
+p['tilefolder']             = os.path.join('static', 'tiles')
 # -----------------------------------
 
 p['geocode']                = 'PLZ'
@@ -11,6 +16,19 @@ p["file_residents"]         = "plz_einwohner.csv"
 
 p["file_geodat_plz"]       = "geodata_berlin_plz.csv"
 p["file_geodat_dis"]       = "geodata_berlin_dis.csv"
+p["file_shape_plz"]        = os.path.join("berlin_postleitzahlen", "berlin_postleitzahlen.shp")
+p["file_shape_dis"]        = os.path.join("berlin_bezirke", "bezirksgrenzen.shp")
+
+# Levels of detail of the map polygons: simplification tolerance and
+# coordinate grid in degrees, used from min_zoom on
+p["lod"]                    = {"low":    {"min_zoom": 0,  "tolerance": 0.002,  "grid_size": 0.001},
+                               "medium": {"min_zoom": 11, "tolerance": 0.0005, "grid_size": 0.0001},
+                               "high":   {"min_zoom": 13, "tolerance": 0.0001, "grid_size": 0.00001}}
+
+# Render the PLZ map from vector tiles (needs static serving, see .streamlit/config.toml)
+p["vector_tiles"]           = True
+# Zoom levels of the vector tile pyramid (higher zooms scale up the last level)
+p["tile_zooms"]             = list(range(8, 15))
 
 # p["gebaeude_filter"]        = ["Freistehendes Einzelgebäude", "Doppelhaushälfte"]
 
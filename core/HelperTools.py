@@ -2,6 +2,13 @@ import math
 import pandas as pd
 
 import pickle
+import os
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 import time    
 import functools   
@@ -31,6 +38,50 @@ def isElFilled(el, liste):
 # Are there NO row duplicates?      #Types: pandas dataframe --> Boolean
 validateIndex = lambda d: False if True in d.duplicated(keep="first") else False
 
+#------------------------------------------------------------------------------
+# Files
+def dataset_path(pdict, file_key):
+    return os.path.join(os.getcwd(), pdict['datafolder'], pdict[file_key])
+
+def file_signature(paths):
+    """Returns (path, mtime, size) for every file in paths"""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+@contextmanager
+def file_lock(path):
+    """Holds an exclusive lock on the file path, also across server processes"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a') as f:
+        _lock_file(f)
+        try:
+            yield
+        finally:
+            _unlock_file(f)
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    # msvcrt locks bytes from the file position, LK_LOCK gives up after 10 seconds
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            pass
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
 #------------------------------------------------------------------------------
 # Serialisierung    
 @timer 
@@ -0,0 +1,217 @@
+import os
+import json
+import threading
+import pandas as pd
+import geopandas as gpd
+import shapely
+import pyarrow.feather as feather
+import core.HelperTools as ht
+from core import methods as m1
+
+# Preprocessed tables are written as uncompressed Feather files (geometry as
+# WKB) next to the CSVs they come from. A manifest remembers the mtime/size of
+# the source files, so an artifact is only used while its sources are unchanged.
+# Build all artifacts ahead of deployment with:  python -m core.artifact_store
+
+# artifact name -> pdict keys of the source files it is derived from
+ARTIFACTS = {
+    'geodat_plz': ['file_geodat_plz'],
+    'stations':   ['file_lstations'],
+    'lstat_plz':  ['file_lstations', 'file_geodat_plz'],
+    'residents':  ['file_residents', 'file_geodat_plz'],
+}
+
+MANIFEST = 'manifest.json'
+_manifest_lock = threading.Lock()
+
+
+def artifact_folder(pdict):
+    return os.path.join(os.getcwd(), pdict['datafolder'], pdict['artifactfolder'])
+
+
+def artifact_path(pdict, name):
+    return os.path.join(artifact_folder(pdict), name + '.feather')
+
+
+def _read_manifest(pdict):
+    try:
+        with open(os.path.join(artifact_folder(pdict), MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict()
+
+
+def _write_manifest(pdict, manifest):
+    # Write to a temp file first so a concurrent reader never sees half a manifest
+    path = os.path.join(artifact_folder(pdict), MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _artifact_sources(name):
+    # Simplified polygons (geodat_plz_<level>) only depend on the PLZ polygons
+    if name.startswith('geodat_plz_'):
+        return ARTIFACTS['geodat_plz']
+    return ARTIFACTS[name]
+
+
+def _source_signature(pdict, name):
+    paths = [ht.dataset_path(pdict, key) for key in _artifact_sources(name)]
+    return [[mtime, size] for _, mtime, size in ht.file_signature(paths)]
+
+
+def is_current(pdict, name, params=None):
+    """Checks that an artifact exists and was built from the current source files and params"""
+    entry = _read_manifest(pdict).get(name)
+    return (entry is not None
+            and os.path.exists(artifact_path(pdict, name))
+            and entry['sources'] == _source_signature(pdict, name)
+            and entry.get('params') == params)
+
+
+def load_artifact(pdict, name, params=None):
+    """Memory-maps an artifact, returns None when it is missing or outdated"""
+    if not is_current(pdict, name, params):
+        return None
+
+    path = artifact_path(pdict, name)
+    if _read_manifest(pdict)[name]['geometry']:
+        return gpd.read_feather(path, memory_map=True)
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+def save_artifact(pdict, name, frame, params=None):
+    os.makedirs(artifact_folder(pdict), exist_ok=True)
+    path = artifact_path(pdict, name)
+    is_geo = isinstance(frame, gpd.GeoDataFrame)
+
+    # Uncompressed, otherwise the file cannot be memory-mapped without decoding
+    if is_geo:
+        frame.to_feather(path + '.tmp', compression='uncompressed')
+    else:
+        feather.write_feather(frame, path + '.tmp', compression='uncompressed')
+    os.replace(path + '.tmp', path)
+
+    with _manifest_lock:
+        manifest = _read_manifest(pdict)
+        manifest[name] = {'sources': _source_signature(pdict, name), 'params': params, 'geometry': is_geo}
+        _write_manifest(pdict, manifest)
+
+
+def _load_or_build(pdict, name, builder, params=None):
+    frame = load_artifact(pdict, name, params)
+    if frame is None:
+        frame = builder(pdict)
+        save_artifact(pdict, name, frame, params)
+    return frame
+
+# -----------------------------------------------------------------------------
+@ht.timer
+def _build_geodat_plz(pdict):
+    """Parsing PLZ polygons from geodata_berlin_plz.csv"""
+    df = pd.read_csv(ht.dataset_path(pdict, 'file_geodat_plz'), delimiter=';')
+    return gpd.GeoDataFrame(df, geometry=gpd.GeoSeries.from_wkt(df['geometry']))
+
+
+# Stored with the params of the simplified polygons, bump it when simplify_coverage
+# changes so artifacts built by an older version are rebuilt
+SIMPLIFY_VERSION = 2
+
+
+def simplify_coverage(geometries, tolerance, grid_size):
+    """Simplifies adjacent polygons and snaps their coordinates to a grid
+
+    The polygons are simplified as a coverage, so neighbouring areas keep
+    sharing their borders instead of developing gaps and overlaps. The shared
+    vertices are snapped alike, the spikes and overlaps the snapping leaves
+    are then removed from the coverage as a whole, not per polygon.
+    """
+    geometries = shapely.coverage_simplify(geometries, tolerance)
+    geometries = shapely.set_precision(geometries, grid_size, mode='pointwise')
+    return shapely.coverage_clean(geometries, snapping_distance=0)
+
+
+@ht.timer
+def _build_geodat_plz_lod(pdict, level):
+    """Simplifying PLZ polygons"""
+    gdf = load_geodat_plz(pdict)
+    lod = pdict['lod'][level]
+    geometries = simplify_coverage(gdf.geometry.values, lod['tolerance'], lod['grid_size'])
+    return gpd.GeoDataFrame(gdf[['PLZ']], geometry=geometries)
+
+
+@ht.timer
+def _build_stations(pdict):
+    """Cleaning Berlin rows of Ladesaeulenregister.csv"""
+    df = pd.read_csv(ht.dataset_path(pdict, 'file_lstations'), delimiter=';', low_memory=False)
+    df = df[df['Bundesland'] == 'Berlin'].reset_index(drop=True)
+
+    for col in ['Breitengrad', 'Längengrad', 'Nennleistung Ladeeinrichtung [kW]']:
+        df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '.'), errors='coerce')
+
+    # Columns with mixed types (e.g. house numbers) are stored as text
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    return df
+
+
+def _build_lstat_plz(pdict):
+    df_lstat2 = m1.preprop_lstat(load_stations(pdict), load_geodat_plz(pdict), pdict)
+    return gpd.GeoDataFrame(m1.count_plz_occurrences(df_lstat2), geometry='geometry')
+
+
+def _build_residents(pdict):
+    df_residents = pd.read_csv(ht.dataset_path(pdict, 'file_residents'), delimiter=',')
+    return m1.preprop_resid(df_residents, load_geodat_plz(pdict), pdict)
+
+
+def load_geodat_plz(pdict):
+    """PLZ polygons as GeoDataFrame"""
+    return _load_or_build(pdict, 'geodat_plz', _build_geodat_plz)
+
+
+def lod_params(pdict, level):
+    """Manifest params of the simplified polygons of a level of detail"""
+    return dict(pdict['lod'][level], algorithm=SIMPLIFY_VERSION)
+
+
+def load_geodat_plz_lod(pdict, level):
+    """PLZ polygons simplified for a level of detail from pdict['lod']"""
+    return _load_or_build(pdict, 'geodat_plz_' + level, lambda p: _build_geodat_plz_lod(p, level), lod_params(pdict, level))
+
+
+def load_stations(pdict):
+    """Berlin rows of the Ladesaeulenregister with numeric coordinates and power"""
+    return _load_or_build(pdict, 'stations', _build_stations)
+
+
+def load_lstat_plz(pdict):
+    """Number of charging stations per PLZ with geometry"""
+    return _load_or_build(pdict, 'lstat_plz', _build_lstat_plz)
+
+
+def load_residents(pdict):
+    """Residents per PLZ with geometry"""
+    return _load_or_build(pdict, 'residents', _build_residents)
+
+
+@ht.timer
+def build_artifacts(pdict):
+    """Building preprocessed dataset artifacts"""
+    for name, builder in [('geodat_plz', _build_geodat_plz), ('stations', _build_stations),
+                          ('lstat_plz', _build_lstat_plz), ('residents', _build_residents)]:
+        if not is_current(pdict, name):
+            save_artifact(pdict, name, builder(pdict))
+            print(" ====> Built artifact:", name)
+
+    for level in pdict['lod']:
+        if not is_current(pdict, 'geodat_plz_' + level, lod_params(pdict, level)):
+            save_artifact(pdict, 'geodat_plz_' + level, _build_geodat_plz_lod(pdict, level), lod_params(pdict, level))
+            print(" ====> Built artifact:", 'geodat_plz_' + level)
+
+
+if __name__ == "__main__":
+    from config import pdict
+    build_artifacts(pdict)
@@ -0,0 +1,110 @@
+import os
+import threading
+import pandas as pd
+import core.HelperTools as ht
+from core import artifact_store
+from core import tile_store
+from core import methods as m1
+
+# Process-wide cache shared by every Streamlit session of this server process.
+# Entries are keyed by name and remember the (path, mtime, size) signature of
+# the files they were built from, so a changed file triggers a rebuild.
+_cache = dict()
+_cache_lock = threading.Lock()
+_build_locks = dict()
+
+
+def _read_only(value):
+    # Sessions get their own copy of the frames (geometries are immutable and
+    # shared), so nothing a session does can alter the cached datasets.
+    if isinstance(value, (tuple, list)):
+        return type(value)(_read_only(v) for v in value)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    return value
+
+
+def get_or_build(name, paths, builder):
+    """Returns the cached value for name, rebuilding it when one of the paths changed"""
+    signature = ht.file_signature(paths)
+
+    with _cache_lock:
+        entry = _cache.get(name)
+        if entry is not None and entry[0] == signature:
+            return _read_only(entry[1])
+        build_lock = _build_locks.setdefault(name, threading.Lock())
+
+    # Only one session builds a given dataset, the others wait for its result
+    with build_lock:
+        with _cache_lock:
+            entry = _cache.get(name)
+            if entry is not None and entry[0] == signature:
+                return _read_only(entry[1])
+
+        value = builder()
+
+        with _cache_lock:
+            _cache[name] = (signature, value)
+
+    return _read_only(value)
+
+
+def invalidate(name=None):
+    """Drops one cached dataset, or all of them when no name is given"""
+    with _cache_lock:
+        if name is None:
+            _cache.clear()
+        else:
+            _cache.pop(name, None)
+
+
+# -----------------------------------------------------------------------------
+@ht.timer
+def _build_lstat(pdict):
+    """Loading Ladesaeulenregister datasets"""
+    return artifact_store.load_lstat_plz(pdict)
+
+
+@ht.timer
+def _build_residents(pdict):
+    """Loading residents dataset"""
+    return artifact_store.load_residents(pdict)
+
+
+def load_lstat(pdict):
+    """Returns the number of charging stations per PLZ with geometry"""
+    paths = [ht.dataset_path(pdict, 'file_lstations'), ht.dataset_path(pdict, 'file_geodat_plz')]
+    return get_or_build('lstat', paths, lambda: _build_lstat(pdict))
+
+
+def load_residents(pdict):
+    """Returns the residents per PLZ merged with the PLZ geometries"""
+    paths = [ht.dataset_path(pdict, 'file_residents'), ht.dataset_path(pdict, 'file_geodat_plz')]
+    return get_or_build('residents', paths, lambda: _build_residents(pdict))
+
+
+def load_plz_geometries(pdict):
+    """Returns (min_zoom, simplified PLZ polygons) per level of detail, ordered by min_zoom"""
+    paths = [ht.dataset_path(pdict, 'file_geodat_plz')]
+    levels = sorted(pdict['lod'].items(), key=lambda item: item[1]['min_zoom'])
+    return get_or_build('plz_geometries', paths,
+                        lambda: [(lod['min_zoom'], artifact_store.load_geodat_plz_lod(pdict, level)) for level, lod in levels])
+
+
+def load_tiles(pdict):
+    """Returns URL template and zoom range of the vector tiles, building them once per dataset version"""
+    return get_or_build('tiles', tile_store.sources(pdict), lambda: tile_store.ensure_tiles(pdict))
+
+
+def _sync_register(pdict):
+    # The server processes import one after the other, the database records
+    # the signature of the imported file, so the later ones skip it
+    with ht.file_lock(os.path.join(artifact_store.artifact_folder(pdict), 'register_sync.lock')):
+        _, mtime, size = ht.file_signature([ht.dataset_path(pdict, 'file_lstations')])[0]
+        m1.inspect_db(artifact_store.load_stations(pdict), f'{size}:{mtime}')
+
+
+def sync_register(pdict):
+    """Imports the Ladesaeulenregister into the database once per version of the file"""
+    paths = [ht.dataset_path(pdict, 'file_lstations')]
+    return get_or_build('register_sync', paths, lambda: _sync_register(pdict))
@@ -1,9 +1,13 @@
 import pandas                        as pd
+import numpy                         as np
 import geopandas                     as gpd
 import core.HelperTools              as ht
 
 import folium
 # from folium.plugins import HeatMap
+from folium.plugins import FastMarkerCluster
+from folium.plugins import VectorGridProtobuf
+from branca.element import MacroElement, Template
 import streamlit as st
 from streamlit_folium import folium_static
 from branca.colormap import LinearColormap
@@ -12,14 +16,17 @@ from folium.plugins import HeatMap
 import sys
 from pathlib import Path
 import os
+import html
+import functools
 
 project_root = Path(os.getcwd()).resolve().parent  # Adjust .parent if needed
 sys.path.append(str(project_root))
 
 from sqlalchemy import create_engine,inspect
 from sqlalchemy.orm import sessionmaker
-from database.database import SessionLocal,engine,Base
+from database.database import SessionLocal,engine,Base,session_scope
 from src.search_context.domain.value_objects.postal_code import PostalCode
+from src.search_context.domain.value_objects.power_category import CATEGORY_LIMITS, power_category_codes
 from src.search_context.domain.entities.chargingstation import ChargingStation
 from src.search_context.application.services.ChargingStationService import ChargingStationService
 from src.search_context.infrastructure.repositories.ChargingStationRepository import ChargingStationRepository
@@ -34,6 +41,7 @@ from src.register_context.application.services.AdminService import AdminService
 from src.register_context.infrastructure.repositories.CSOperatorRepository import CSOperatorRepository
 from src.register_context.application.services.CSOperatorService import CSOperatorService
 import time
+from datetime import datetime, timedelta
 from src.register_context.domain.entities.csoperator import CSOperator
 from src.register_context.domain.entities.admin import Admin
 from folium import Popup, Marker
@@ -42,6 +50,7 @@ from src.search_context.domain.events.PostalCodeNotFoundEvent import PostalCodeN
 from core import register_methods as register
 from src.report_context.application.services.NotificationService import NotificationService
 from src.report_context.infrastructure.repositories.NotificationRepository import NotificationRepository
+from src.report_context.infrastructure.NotificationDispatcher import get_notification_dispatcher
 from src.register_context.application.services.UserService import UserService
 from src.register_context.infrastructure.repositories.UserRepository import UserRepository
 from src.search_context.domain.events.StationNotFoundEvent import StationNotFoundEvent
@@ -50,10 +59,11 @@ from src.report_context.domain.aggregate.ReportAggregateService import ReportAgg
 from src.report_context.domain.events.ReportAlreadyExistsEvent import ReportAlreadyExistsEvent
 from src.report_context.domain.events.ReportCreateFailedEvent import ReportCreateFailedEvent
 from src.report_context.domain.events.ReportCreateEvent import ReportCreateEvent
-from src.report_context.domain.events.ReportUpdateEvent import ReportUpdateEvent
+from src.report_context.domain.events.ReportsUpdateEvent import ReportsUpdateEvent
 from src.report_context.domain.value_objects.report_description import ReportDescription
 from src.report_context.domain.value_objects.report_severity import ReportSeverity
 from src.report_context.domain.value_objects.report_type import ReportType
+from src.report_context.domain.value_objects.report_filter import ReportFilter, SORT_KEYS
 
 def sort_by_plz_add_geometry(dfr, dfg, pdict): 
     dframe                  = dfr.copy()
@@ -67,7 +77,9 @@ def sort_by_plz_add_geometry(dfr, dfg, pdict):
     sorted_df2              = sorted_df.merge(df_geo, on=pdict["geocode"], how ='left')
     sorted_df3              = sorted_df2.dropna(subset=['geometry'])
     
-    sorted_df3.loc[:, 'geometry'] = gpd.GeoSeries.from_wkt(sorted_df3['geometry'])
+    # Polygons loaded from the artifact store are already parsed
+    if not isinstance(df_geo, gpd.GeoDataFrame):
+        sorted_df3.loc[:, 'geometry'] = gpd.GeoSeries.from_wkt(sorted_df3['geometry'])
     ret                     = gpd.GeoDataFrame(sorted_df3, geometry='geometry')
     
     return ret
@@ -136,31 +148,233 @@ def preprop_resid(dfr, dfg, pdict):
     
     return ret
 
-def inspect_db(df):
-    service=ChargingStationService(ChargingStationRepository(SessionLocal()))
-    isempty=service.is_table_empty()
+def inspect_db(df, signature=None):
+    with session_scope() as session:
+        isempty=ChargingStationService(ChargingStationRepository(session)).is_table_empty()
     if isempty:
-        db.import_charging_stations_from_csv(df)
-
-
-def get_power_category_and_color(power):
-    power = float(power)  # Ensure power is a float for comparison
-    
-    if power <= 50:
-        return 'Low Power', 'green'  # Low Power
-    elif power <= 150:
-        return 'Medium Power', 'yellow'  # Medium Power
-    elif power <= 500:
-        return 'High Power', 'orange'  # High Power
+        db.import_charging_stations_from_csv(df, signature=signature)
     else:
-        return 'Ultra High Power', 'red'  # Ultra High Power
+        # Only new, changed or vanished stations are written, once per register signature
+        db.import_charging_stations_delta(df, signature=signature)
+
+
+POWER_CATEGORY_COLORS = {'Low Power': 'green', 'Medium Power': 'beige', 'High Power': 'orange', 'Ultra High Power': 'red'}
+
+# Notifications shown per "Load more" click
+NOTIFICATION_PAGE_SIZE = 20
+
+# Page sizes of the admin and operator report tables
+REPORT_PAGE_SIZES = [50, 100, 500]
+
+# Larger station results are drawn as one clustered layer instead of a Marker per station
+MARKER_CLUSTER_THRESHOLD = 200
+
+# Builds the marker of a [latitude, longitude, popup, color] row of the clustered layer in the browser
+STATION_MARKER_CALLBACK = """function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'cloud', markerColor: row[3], prefix: 'glyphicon'});
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    marker.bindPopup(row[2], {maxWidth: 300});
+    return marker;
+}"""
+
+def categorize_powers(powers, limits=CATEGORY_LIMITS):
+    """Power category of every rated power in kW at once, 'Unknown' where the register has none
+
+    limits are (category, upper limit) pairs in ascending order, the last one open ended.
+    """
+    # A code of -1 (no power) picks the trailing 'Unknown'
+    names = np.array([name for name, _ in limits] + ['Unknown'], dtype=object)
+    return names[power_category_codes(powers, limits)]
+
+@functools.lru_cache(maxsize=4096)
+def escape_html(value):
+    """HTML escaped text of a register value, districts, operators and device types repeat a lot"""
+    return html.escape(str(value))
+
+@functools.lru_cache(maxsize=16384)
+def station_popup(station, power_category):
+    """Popup HTML of a station, StationView rows are immutable so it is kept across reruns"""
+    return (
+        '<div style="font-size: 14px;">'
+        '<h4 style="color: #007bff;">Charging Station Information</h4>'
+        f'<strong>Street:</strong> {html.escape(str(station.street))}<br>'
+        f'<strong>District:</strong> {escape_html(station.district)}<br>'
+        f'<strong>Location:</strong> {escape_html(station.location)}<br>'
+        f'<strong>Power Charging Device:</strong> {station.power_charging_dev} kW<br>'
+        f'<strong>Charging Device Type:</strong> {escape_html(station.type_charging_device)}<br>'
+        f'<strong>Operator:</strong> {escape_html(station.operator)}<br>'
+        f'<strong>Power Category:</strong> {power_category}<br><br>'
+        '<p style="color: #888; font-size: 12px;">Click on the marker for more details.</p>'
+        '</div>'
+    )
+
+def style_stations(stations, limits=CATEGORY_LIMITS):
+    """(power category, marker color, popup HTML) of every station of a search result"""
+    categories = categorize_powers([station.power_charging_dev for station in stations], limits).tolist()
+    return [(category, POWER_CATEGORY_COLORS.get(category, 'gray'), station_popup(station, category))
+            for station, category in zip(stations, categories)]
+
+def add_station_markers(m, stations, cluster_threshold=MARKER_CLUSTER_THRESHOLD):
+    """Adds the located stations to the map and fits it to them
+
+    Up to cluster_threshold stations get a folium Marker each, more are sent
+    as plain rows to one FastMarkerCluster that builds the markers in the browser.
+    """
+    stations = [station for station in stations if station.latitude is not None and station.longitude is not None]
+    if not stations:
+        return
+    styles = style_stations(stations)
+    if len(stations) > cluster_threshold:
+        data = [[station.latitude, station.longitude, popup_content, color]
+                for station, (_, color, popup_content) in zip(stations, styles)]
+        FastMarkerCluster(data, callback=STATION_MARKER_CALLBACK, name="Charging Stations").add_to(m)
+    else:
+        for station, (_, color, popup_content) in zip(stations, styles):
+            Marker(location=[station.latitude, station.longitude],
+                   popup=Popup(popup_content, max_width=300),
+                   icon=folium.Icon(color=color, icon='cloud')).add_to(m)
+
+    # One bounds computation for the whole result
+    coordinates = np.array([[station.latitude, station.longitude] for station in stations])
+    m.fit_bounds([coordinates.min(axis=0).tolist(), coordinates.max(axis=0).tolist()])
+
+def get_color_map(data, value_column):
+    return LinearColormap(colors=['yellow', 'red'], vmin=data[value_column].min(), vmax=data[value_column].max())
+
+def geometries_for_zoom(plz_geometries, zoom):
+    """Picks the most detailed PLZ polygons meant for the given zoom level"""
+    selected = plz_geometries[0][1]
+    for min_zoom, geometries in plz_geometries:
+        if zoom >= min_zoom:
+            selected = geometries
+    return selected
+
+def add_choropleth_layer(m, data, value_column, layer_name, geometries=None):
+    """Adds all PLZ polygons as one GeoJSON FeatureCollection colored by value_column"""
+    color_map = get_color_map(data, value_column)
+
+    # Swap in simplified polygons when a level of detail is given
+    if geometries is not None:
+        data = data.drop(columns='geometry').merge(geometries[['PLZ', 'geometry']], on='PLZ')
+
+    # The fill color is computed once per PLZ and carried as a feature property
+    gdf = gpd.GeoDataFrame(data[['PLZ', value_column, 'geometry']], geometry='geometry')
+    gdf['color'] = [color_map(value) for value in gdf[value_column]]
+
+    folium.GeoJson(
+        gdf.to_json(drop_id=True),
+        name=layer_name,
+        style_function=lambda feature: {
+            'fillColor': feature['properties']['color'],
+            'color': 'black',
+            'weight': 1,
+            'fillOpacity': 0.7
+        },
+        tooltip=folium.GeoJsonTooltip(fields=['PLZ', value_column], aliases=['PLZ:', layer_name + ':'])
+    ).add_to(m)
+
+    return color_map
+
+class VectorTileTooltip(MacroElement):
+    """Shows PLZ and value_column of the hovered PLZ of a VectorGrid layer"""
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            {{ this._parent.get_name() }}.on('mouseover', function(e) {
+                var p = e.layer.properties;
+                if (p.PLZ === undefined) { return; }
+                L.tooltip()
+                    .setLatLng(e.latlng)
+                    .setContent('PLZ: ' + p.PLZ + ', {{ this.layer_name }}: ' + p['{{ this.value_column }}'])
+                    .openOn({{ this._parent._parent.get_name() }});
+            });
+        {% endmacro %}
+    """)
+
+    def __init__(self, value_column, layer_name):
+        super().__init__()
+        self.value_column = value_column
+        self.layer_name = layer_name
+
+def add_vector_tile_layer(m, tiles, data, value_column, layer_name):
+    """Adds the PLZ and Bezirk vector tiles, PLZ colored by value_column like add_choropleth_layer"""
+    color_map = get_color_map(data, value_column)
+
+    # Same yellow to red scale as the LinearColormap, evaluated in the browser
+    options = """{
+        vectorTileLayerStyles: {
+            plz: function(properties) {
+                var t = (properties['%(column)s'] - %(vmin)s) / Math.max(%(vmax)s - %(vmin)s, 1);
+                var g = Math.round(255 * (1 - Math.min(Math.max(t, 0), 1)));
+                return {fill: true, fillColor: 'rgb(255,' + g + ',0)', fillOpacity: 0.7, color: 'black', weight: 1};
+            },
+            bezirke: {fill: false, color: '#333333', weight: 2}
+        },
+        interactive: true,
+        minNativeZoom: %(min_zoom)s,
+        maxNativeZoom: %(max_zoom)s
+    }""" % {'column': value_column, 'vmin': color_map.vmin, 'vmax': color_map.vmax,
+             'min_zoom': tiles['min_zoom'], 'max_zoom': tiles['max_zoom']}
+
+    layer = VectorGridProtobuf(tiles['url'], name=layer_name, options=options)
+    layer.add_child(VectorTileTooltip(value_column, layer_name))
+    layer.add_to(m)
+
+    return color_map
+
+def load_notification_page(notification_service, inbox):
+    """Appends the page after inbox["cursor"] to inbox["notifications"] as plain dicts, which outlive the session"""
+    event = notification_service.get_notifications_page(inbox["user_id"], NOTIFICATION_PAGE_SIZE, inbox["cursor"])
+    inbox["notifications"] += [{"notification_id": n.notification_id, "created_at": n.created_at, "content": n.content}
+                               for n in event.notifications]
+    inbox["cursor"] = event.next_cursor
+
+def report_dashboard(report_service, key, **scope):
+    """Filter, sort and page controls of a report table, returns the reports of the current page
+
+    scope restricts the reports, e.g. admin_id=... Filtering, sorting and paging run in SQL.
+    """
+    with st.expander("Filter and sort"):
+        statuses = st.multiselect("Status", ["pending", "managed", "resolved"], key=f"{key}_statuses")
+        severities = st.multiselect("Severity", ["low", "medium", "high"], key=f"{key}_severities")
+        types = st.multiselect("Type", ["hardware", "software", "connectivity"], key=f"{key}_types")
+        district = st.text_input("District", key=f"{key}_district").strip()
+        created = st.date_input("Created between", value=(), key=f"{key}_created")
+        sort_by = st.selectbox("Sort by", SORT_KEYS, key=f"{key}_sort_by")
+        descending = st.checkbox("Descending", value=True, key=f"{key}_descending")
+        page_size = st.selectbox("Reports per page", REPORT_PAGE_SIZES, key=f"{key}_page_size")
+
+    report_filter = ReportFilter(
+        statuses=statuses or None, severities=severities or None, types=types or None,
+        districts=[district] if district else None,
+        created_from=datetime.combine(created[0], datetime.min.time()) if len(created) > 0 else None,
+        created_to=datetime.combine(created[1] + timedelta(days=1), datetime.min.time()) if len(created) > 1 else None,
+        sort_by=sort_by, descending=descending, **scope)
+
+    # Keyset cursors of the pages up to the current one, back to the first page when the filter changes
+    pages = st.session_state.setdefault(f"{key}_pages", {"filter": None, "cursors": [None]})
+    if pages["filter"] != (report_filter, page_size):
+        pages.update(filter=(report_filter, page_size), cursors=[None])
+    result = report_service.get_reports_page(report_filter, page_size, pages["cursors"][-1])
+
+    previous_column, page_column, next_column = st.columns(3)
+    if previous_column.button("Previous page", key=f"{key}_previous", disabled=len(pages["cursors"]) == 1):
+        pages["cursors"].pop()
+        st.rerun()
+    page_column.caption(f"Page {len(pages['cursors'])}")
+    if next_column.button("Next page", key=f"{key}_next", disabled=result.next_cursor is None):
+        pages["cursors"].append(result.next_cursor)
+        st.rerun()
+
+    return result.reports
 
 # -----------------------------------------------------------------------------
 
 @ht.timer
-def make_streamlit_electric_Charging_resid(df, dfr1, dfr2, role, user_id):
+def make_streamlit_electric_Charging_resid(dfr1, dfr2, role, user_id, plz_geometries=None, tiles=None, session=None):
     """Makes Streamlit App with Heatmap of Electric Charging Stations and Residents"""
-    inspect_db(df)
+
+    # All repositories of this rerun share the caller's session (see database.session_scope)
+    session = session or SessionLocal()
 
     # Define menu options based on role
     menu = {
@@ -170,35 +384,54 @@ def make_streamlit_electric_Charging_resid(df, dfr1, dfr2, role, user_id):
     }
     
     choice = st.sidebar.selectbox("Select Option", menu.get(role, []))
+
+    # Success message of the action that triggered this rerun
+    if "flash" in st.session_state:
+        st.success(st.session_state.pop("flash"))
+
+    if role == "admin":
+        metrics = get_notification_dispatcher().metrics()
+        st.sidebar.caption(f"Notification queue: {metrics['depth']} pending, oldest {metrics['oldest_lag']:.1f} s, {metrics['failed']} failed")
     
-    # REPORT REPOSITORY & SERVICE
-    report_repository = ReportRepository(SessionLocal())
-    report_service = ReportService(report_repository)
+    # REPORT REPOSITORY
+    report_repository = ReportRepository(session)
     
     # ADMIN REPOSITORY & SERVICE
-    admin_repository = AdminRepository(SessionLocal())
+    admin_repository = AdminRepository(session)
     admin_service = AdminService(admin_repository)
     
     # CHARGING STATION REPOSITORY & SERVICE
-    chargingstation_repository = ChargingStationRepository(SessionLocal())
+    chargingstation_repository = ChargingStationRepository(session)
     chargingstation_service = ChargingStationService(chargingstation_repository)
-    
+    if role == "admin":
+        metrics = chargingstation_service.cache.metrics()
+        st.sidebar.caption(f"Postal code cache: {metrics['size']} entries, {metrics['hits']} hits, {metrics['misses']} misses, {metrics['evictions']} evicted")
+
     # CHARGING STATION OPERATOR REPOSITORY & SERVICE
-    csoperator_repository = CSOperatorRepository(SessionLocal())
+    csoperator_repository = CSOperatorRepository(session)
     csoperator_service = CSOperatorService(csoperator_repository)
     
     # NOTIFICATION REPOSITORY & SERVICE
-    notification_repository = NotificationRepository(SessionLocal())
+    notification_repository = NotificationRepository(session)
     notification_service = NotificationService(notification_repository)
     
     # USER REPOSITORY & SERVICE
-    user_repository = UserRepository(SessionLocal())
+    user_repository = UserRepository(session)
     user_service = UserService(user_repository)
     
     # REPORT AGGREGATE REPOSITORY & SERVICE
     report_aggregate_service = ReportAggregateService(user_repository=user_repository, notification_repository=notification_repository, admin_repository=admin_repository, chargingstation_repository=chargingstation_repository,
     report_repository=report_repository,
-    csoperator_repository=csoperator_repository)
+    csoperator_repository=csoperator_repository,
+    notification_dispatcher=get_notification_dispatcher())
+    
+    # REPORT SERVICE
+    report_service = ReportService(report_repository, report_aggregate_service)
+
+    if role == "user":
+        unread = notification_service.count_unread(user_id)
+        unread_caption = st.sidebar.empty()
+        unread_caption.caption(f"{unread} unread notifications")
 
     if choice=="Logout":
         return "logout"
@@ -209,78 +442,46 @@ def make_streamlit_electric_Charging_resid(df, dfr1, dfr2, role, user_id):
         # Search Box
         search_query = st.text_input("Enter Postal Code (PLZ) to Search:", "")
         search_button = st.button("Search")
+        show_all = st.checkbox("Show all stations in Berlin")
 
         # Create a radio button for layer selection
         layer_selection = st.radio("Select Layer", ("Residents", "Charging_Stations"))
 
         # Create a Folium map
-        m = folium.Map(location=[52.52, 13.40], zoom_start=10)
-
-        # Function to add data to the map
-        def add_layer_to_map(data, color_map, layer_name):
-            for idx, row in data.iterrows():
-                popup = f"PLZ: {row['PLZ']}, {layer_name}: {row['Number'] if layer_name == 'Charging Stations' else row['Einwohner']}"
-                style = lambda x, color=color_map(row['Number'] if layer_name == 'Charging Stations' else row['Einwohner']): {
-                    'fillColor': color,
-                    'color': 'black',
-                    'weight': 1,
-                    'fillOpacity': 0.7
-                }
-                folium.GeoJson(row['geometry'], style_function=style, tooltip=popup).add_to(m)
-
-        # Create color map for Residents or Charging Stations
-        def get_color_map(data, value_column):
-            return LinearColormap(colors=['yellow', 'red'], vmin=data[value_column].min(), vmax=data[value_column].max())
+        zoom_start = 10
+        m = folium.Map(location=[52.52, 13.40], zoom_start=zoom_start)
+
+        # A search zooms into a single PLZ, which needs more detailed polygons
+        geometries = None
+        if plz_geometries:
+            geometries = geometries_for_zoom(plz_geometries, 14 if search_button else zoom_start)
 
         # Handle both Residents and Charging Stations
-        if layer_selection == "Residents":
-            color_map = get_color_map(dfr2, 'Einwohner')
-            add_layer_to_map(dfr2, color_map, "Residents")
+        data, value_column, layer_name = (dfr2, 'Einwohner', "Residents") if layer_selection == "Residents" else (dfr1, 'Number', "Charging Stations")
 
-        else:  # Charging Stations
-            color_map = get_color_map(dfr1, 'Number')
-            add_layer_to_map(dfr1, color_map, "Charging Stations")
+        # Reference the vector tiles when available, otherwise inline the polygons
+        if tiles:
+            color_map = add_vector_tile_layer(m, tiles, data, value_column, layer_name)
+        else:
+            color_map = add_choropleth_layer(m, data, value_column, layer_name, geometries)
 
         # Handle searching for charging stations by postal code
         if search_button:
             try:
-                session = SessionLocal()
                 event=chargingstation_service.verify_postal_code(search_query)
                 if isinstance(event, PostalCodeFoundEvent):
                     charging_station_event = chargingstation_service.find_stations_by_postal_code(event.postal_code)
                     if isinstance(charging_station_event, StationFoundEvent):
-                        charging_stations=charging_station_event.stations
-                        latitudes, longitudes = [], []
-                        for station in charging_stations:
-                            latitude = station.charging_station.latitude
-                            longitude = station.charging_station.longitude
-                            latitudes.append(latitude)
-                            longitudes.append(longitude)
-        
-                            power_category, color = get_power_category_and_color(station.charging_station.power_charging_dev)
-                            popup_content = f"""
-                            <div style="font-size: 14px;">
-                            <h4 style="color: #007bff;">Charging Station Information</h4>
-                            <strong>Street:</strong> {station.charging_station.street}<br>
-                            <strong>District:</strong> {station.charging_station.district}<br>
-                            <strong>Location:</strong> {station.charging_station.location}<br>
-                            <strong>Power Charging Device:</strong> {station.charging_station.power_charging_dev} kW<br>
-                            <strong>Charging Device Type:</strong> {station.charging_station.type_charging_device}<br>
-                            <strong>Operator:</strong> {station.charging_station.operator}<br>
-                            <strong>Power Category:</strong> {power_category}<br><br>
-                            <p style="color: #888; font-size: 12px;">Click on the marker for more details.</p>
-                            </div>
-                            """
-                            Marker(location=[latitude, longitude],
-                                   popup=Popup(popup_content, max_width=300),
-                                   icon=folium.Icon(color=color, icon='cloud')).add_to(m)
-        
-                            m.fit_bounds([[min(latitudes), min(longitudes)], [max(latitudes), max(longitudes)]])
+                        add_station_markers(m, charging_station_event.stations)
                 else:
                     st.error("No data found for the entered Postal Code (PLZ).")
 
             except (TypeError, ValueError) as e:
                 st.error(e)
+        elif show_all:
+            charging_station_event = chargingstation_service.find_all_stations()
+            if isinstance(charging_station_event, StationFoundEvent):
+                add_station_markers(m, charging_station_event.stations)
 
         # Add color map to the map and render
         color_map.add_to(m)
@@ -306,7 +507,7 @@ def make_streamlit_electric_Charging_resid(df, dfr1, dfr2, role, user_id):
                     st.error("No data found for the entered Postal Code (PLZ).")
                     station_id = None
                 else:
-                    station_id, station_id_label  = st.selectbox("Select Station", [(station.charging_station.station_id, 'Station ID: ' + str(station.charging_station.station_id) + ' | Street: ' + station.charging_station.street) for station in searched_stations.stations], format_func=lambda x: x[1])
+                    station_id, station_id_label  = st.selectbox("Select Station", [(station.station_id, 'Station ID: ' + str(station.station_id) + ' | Street: ' + station.street) for station in searched_stations.stations], format_func=lambda x: x[1])
             
             else:
                 station_id = None
@@ -330,9 +531,8 @@ def make_streamlit_electric_Charging_resid(df, dfr1, dfr2, role, user_id):
                 elif isinstance(result, ReportCreateFailedEvent):
                     st.error(result.reason)
                 elif isinstance(result, ReportCreateEvent):
-                    st.success("Malfunction issue report successfully forwarded")
-                    
-                    time.sleep(2)
+                    # Shown after the rerun instead of holding the request for it
+                    st.session_state.flash = "Malfunction issue report successfully forwarded"
                     st.rerun()
             
         except (TypeError, ValueError) as e:
@@ -341,8 +541,8 @@ def make_streamlit_electric_Charging_resid(df, dfr1, dfr2, role, user_id):
     elif choice == "Manage Malfunction Report":
         st.title('Manage Malfunction Report')
         
-        # Get all reports for logged in admin
-        all_reports = report_service.get_reports_by_admin_id(user_id).reports
+        # One page of the reports of the logged in admin
+        all_reports = report_dashboard(report_service, "admin_reports", admin_id=user_id)
         
         if not all_reports:
             st.text("No reports found for the logged in admin.")
@@ -370,26 +570,26 @@ def make_streamlit_electric_Charging_resid(df, dfr1, dfr2, role, user_id):
         
         reports_to_be_forwarded = [report for report in all_reports if report.status == "pending"]
         
-        report = st.selectbox("Forward Report to Charging Station Operator", reports_to_be_forwarded, format_func=lambda x: "REPORT ID: " + str(x.report_id) + " | Station ID: " + str(x.station_id))
+        # Several reports are forwarded with one set based update, e.g. during an outage
+        select_all = st.checkbox(f"Select all {len(reports_to_be_forwarded)} pending reports of this page")
+        reports = reports_to_be_forwarded if select_all else st.multiselect("Forward Reports to Charging Station Operators", reports_to_be_forwarded, format_func=lambda x: "REPORT ID: " + str(x.report_id) + " | Station ID: " + str(x.station_id))
         
-        forward_button = st.button("Forward", disabled=not report)
+        forward_button = st.button("Forward", disabled=not reports)
         
         if forward_button:
-            result = report_aggregate_service.forward_report_malfunction(report)
+            result = report_service.forward_reports(reports)
             
             if isinstance(result, ValueError):
                 st.error(result)
-            elif isinstance(result, ReportUpdateEvent) and result.success:
-                st.success("Malfunction issue report successfully forwarded")
-                
-                time.sleep(2)
+            elif isinstance(result, ReportsUpdateEvent) and result.success:
+                st.session_state.flash = f"{len(result.reports)} malfunction issue reports successfully forwarded"
                 st.rerun()
 
     elif choice == "Resolve Malfunction Report":
         st.title("Resolve Malfunction Report")
         
-        # Get all reports for logged in charging station operator
-        all_reports = report_service.get_reports_by_csoperator_id(user_id).reports
+        # One page of the reports of the logged in charging station operator
+        all_reports = report_dashboard(report_service, "csoperator_reports", csoperator_id=user_id)
         
         if not all_reports:
             st.text("No reports found for the logged in charging station operator.")
@@ -416,44 +616,51 @@ def make_streamlit_electric_Charging_resid(df, dfr1, dfr2, role, user_id):
         
         reports_to_be_resolved = [report for report in all_reports if report.status == "managed"]
         
-        report = st.selectbox("Mark as Resolved", reports_to_be_resolved, format_func=lambda x: "REPORT ID: " + str(x.report_id) + " | Station ID: " + str(x.station_id))
-        
-        # all_reports find report.id
-        selected_report = None
-        
-        for rep in all_reports:
-            if report and rep.report_id == report.report_id:
-                selected_report = rep
-                break
+        # Several reports are resolved with one set based update, e.g. after an outage
+        select_all = st.checkbox(f"Select all {len(reports_to_be_resolved)} reports to resolve of this page")
+        reports = reports_to_be_resolved if select_all else st.multiselect("Mark as Resolved", reports_to_be_resolved, format_func=lambda x: "REPORT ID: " + str(x.report_id) + " | Station ID: " + str(x.station_id))
             
-        resolve_button = st.button("Resolve", disabled=not selected_report)
+        resolve_button = st.button("Resolve", disabled=not reports)
         
         if resolve_button:
-            result = report_aggregate_service.resolve_report_malfunction(selected_report)
+            result = report_service.resolve_reports(reports)
             
             if isinstance(result, ValueError):
                 st.error(result)
-            elif isinstance(result, ReportUpdateEvent) and result.success:
-                st.success("Malfunction issue report successfully resolved")
-                
-                time.sleep(2)
+            elif isinstance(result, ReportsUpdateEvent) and result.success:
+                st.session_state.flash = f"{len(result.reports)} malfunction issue reports successfully resolved"
                 st.rerun()
                 
     elif choice == "Notifications":
         st.title('Notifications')
         
-        # Get all notifications for logged in user
-        all_notifications = notification_service.get_notifications_by_user_id(user_id).notifications
-        
-        if not all_notifications:
+        # Pages are loaded on demand and kept in the session state, each continues after the last
+        # notification of the previous one. They are loaded again from the newest when new ones arrive.
+        inbox = st.session_state.get("notification_inbox")
+        if inbox is None or inbox["user_id"] != user_id or unread:
+            # Without unread notifications none is new, whatever the read marker says
+            read_until = notification_service.get_read_until(user_id) if unread else None
+            inbox = st.session_state.notification_inbox = {"user_id": user_id, "notifications": [], "cursor": None,
+                                                           "read_until": read_until}
+            load_notification_page(notification_service, inbox)
+        
+        if not inbox["notifications"]:
             st.text("No notifications found for the logged in user.")
             return
         
-        all_notifications = sorted(all_notifications, key=lambda x: x.created_at, reverse=True)
-        
-        for notification in all_notifications:
-            st.write("Created At: ", notification.created_at)
-            st.write(notification.content, unsafe_allow_html=True)
+        # Notifications after the newest one read before are new
+        for notification in inbox["notifications"]:
+            is_new = inbox["read_until"] is not None and notification["notification_id"] > inbox["read_until"]
+            st.write("New" if is_new else "", "Created At: ", notification["created_at"])
+            st.write(notification["content"], unsafe_allow_html=True)
             st.html("<hr/>")
         
+        if unread:
+            notification_service.mark_all_read(user_id)
+            unread_caption.caption("0 unread notifications")
+        
+        if inbox["cursor"] is not None and st.button("Load more"):
+            load_notification_page(notification_service, inbox)
+            st.rerun()
+        
     return role
\ No newline at end of file
@@ -15,7 +15,8 @@ sys.path.append(str(project_root))
 
 from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import sessionmaker
-from database.database import SessionLocal, engine, Base
+from sqlalchemy.exc import IntegrityError
+from database.database import SessionLocal, engine, Base, session_scope
 
 from src.register_context.infrastructure.repositories.UserRepository import UserRepository
 from src.register_context.application.services.UserService import UserService
@@ -42,12 +43,14 @@ from src.register_context.domain.events.CSOperatorNotFoundEvent import CSOperato
 from src.register_context.domain.entities.csoperator import CSOperator
 
 from src.search_context.domain.entities.chargingstation import ChargingStation
+from src.report_context.application.services.NotificationService import NotificationService
+from src.report_context.infrastructure.repositories.NotificationRepository import NotificationRepository
 from src.register_context.domain.value_objects.password import Password
 from src.register_context.domain.events.PasswordVerifiedEvent import PasswordVerifiedEvent
 
 
 def inspect_and_create_tables():
-    table_names = ['chargingstation', 'user', 'admin', 'csoperators', 'report', 'notification']  
+    table_names = ['chargingstation', 'user', 'admin', 'csoperators', 'report', 'notification', 'notification_inbox', 'register_import', 'station_version']  
     inspector = inspect(engine)
     
     for table_name in table_names:
@@ -56,6 +59,23 @@ def inspect_and_create_tables():
             print('Creating TABLE:', table_name)
             Base.metadata.create_all(engine)  
 
+    # Indexes added after a table was created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(engine, checkfirst=True)
+            except IntegrityError as e:
+                # e.g. a station with several open reports from before uq_report_open_station
+                print('Could not create INDEX:', index.name, e.orig)
+
+    # Columns added after a table was created
+    inbox_columns = {column['name'] for column in inspect(engine).get_columns('notification_inbox')}
+    for column in ['broadcasts_after', 'read_until']:
+        if column not in inbox_columns:
+            print('Adding COLUMN: notification_inbox.' + column)
+            with engine.begin() as connection:
+                connection.exec_driver_sql(f"ALTER TABLE notification_inbox ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+
     existing_tables = inspector.get_table_names()
     print('Existing tables:', existing_tables)
 
@@ -78,13 +98,12 @@ def register_login():
                 event_class = {"user": UserLoginEvent, "admin": AdminLoginEvent, "csoperator": CSOperatorLoginEvent}[role]
                 not_found_class = {"user": UserNotFoundEvent, "admin": AdminNotFoundEvent, "csoperator": CSOperatorNotFoundEvent}[role]
                 
-                repository = repository_class(SessionLocal())
-                service = service_class(repository)
-                
-                event_password = service.verify_password(password)
-                if isinstance(event_password, PasswordVerifiedEvent):
-                    event = getattr(service, login_method)(username, password)
+                with session_scope() as session:
+                    service = service_class(repository_class(session))
+                    event_password = service.verify_password(password)
+                    event = getattr(service, login_method)(username, password) if isinstance(event_password, PasswordVerifiedEvent) else None
 
+                if isinstance(event_password, PasswordVerifiedEvent):
                     if isinstance(event, event_class):
                         return role, event.user_id if role == "user" else event.sys_admin_id if role == "admin" else event.cs_operator_id
                     elif isinstance(event, not_found_class):
@@ -115,13 +134,15 @@ def register_login():
                 created_class = {"user": UserCreatedEvent, "admin": AdminCreatedEvent, "csoperator": CSOperatorCreatedEvent}[role]
                 not_found_class = {"user": UserAlreadyExistEvent, "admin": AdminAlreadyExistEvent, "csoperator": CSOperatorAlreadyExistEvent}[role]
 
-                repository = repository_class(SessionLocal())
-                service = service_class(repository)
-                
-                event_password = service.verify_password(new_password)
+                with session_scope() as session:
+                    service = service_class(repository_class(session))
+                    event_password = service.verify_password(new_password)
+                    event = getattr(service, register_method)(new_username, new_password) if isinstance(event_password, PasswordVerifiedEvent) else None
+                    if role == "user" and isinstance(event, UserCreatedEvent):
+                        # Broadcasts sent before the registration are not the new user's
+                        NotificationService(NotificationRepository(session)).open_inbox(event.user_id)
+
                 if isinstance(event_password, PasswordVerifiedEvent):
-                    event = getattr(service, register_method)(new_username, new_password)
-    
                     if isinstance(event, created_class):
                         st.success("Registration successful!")
                         return role, None
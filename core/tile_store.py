@@ -0,0 +1,206 @@
+import os
+import json
+import shutil
+import tempfile
+import time
+import geopandas as gpd
+import shapely
+import mapbox_vector_tile
+import core.HelperTools as ht
+from core import artifact_store
+
+# Precomputed Mapbox Vector Tile pyramid of the PLZ and Bezirk polygons.
+# Tiles are written to static/tiles/<version>/{z}/{x}/{y}.pbf and served by
+# Streamlit's static file serving (.streamlit/config.toml), so the map page
+# only references them instead of inlining the geometry. Every build is a new
+# version directory, current.json names the served one and is replaced in one
+# step once a build is complete. The previous version is kept for pages that
+# still reference it. Builds hold a lock shared by all server processes.
+# Build the pyramid ahead of deployment with:  python -m core.tile_store
+
+TILE_URL = '/app/static/tiles/{version}/{{z}}/{{x}}/{{y}}.pbf'
+EXTENT = 4096                     # MVT coordinate range of one tile
+BUFFER = 64                       # clip margin in tile units, hides seams between tiles
+WORLD = 20037508.342789244        # half the width of the Web Mercator square
+
+MANIFEST = 'manifest.json'
+CURRENT = 'current.json'
+
+
+def tile_folder(pdict):
+    return os.path.join(os.getcwd(), pdict['tilefolder'])
+
+
+def _lock_path(pdict):
+    folder = tile_folder(pdict)
+    return os.path.join(os.path.dirname(folder), '.' + os.path.basename(folder) + '.lock')
+
+
+def tile_bounds(z, x, y):
+    """Web Mercator bounds (minx, miny, maxx, maxy) of a tile"""
+    size = 2 * WORLD / 2 ** z
+    return (-WORLD + x * size, WORLD - (y + 1) * size, -WORLD + (x + 1) * size, WORLD - y * size)
+
+
+def tile_range(bounds, z):
+    """Tiles x0..x1, y0..y1 covering Web Mercator bounds at zoom z"""
+    size = 2 * WORLD / 2 ** z
+    minx, miny, maxx, maxy = bounds
+    x0, x1 = int((minx + WORLD) // size), int((maxx + WORLD) // size)
+    y0, y1 = int((WORLD - maxy) // size), int((WORLD - miny) // size)
+    return range(x0, x1 + 1), range(y0, y1 + 1)
+
+
+def sources(pdict):
+    # The station and resident numbers come from artifacts joined on geodata_berlin_plz.csv
+    keys = ['file_shape_plz', 'file_shape_dis', 'file_lstations', 'file_residents', 'file_geodat_plz']
+    return [ht.dataset_path(pdict, key) for key in keys]
+
+
+def _source_signature(pdict):
+    return [[mtime, size] for _, mtime, size in ht.file_signature(sources(pdict))]
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def current_version(pdict):
+    """Version directory of the served tile pyramid, None before the first build"""
+    current = _read_json(os.path.join(tile_folder(pdict), CURRENT))
+    return current and current['version']
+
+
+def is_current(pdict):
+    """Checks that the tile pyramid was built from the current datasets"""
+    version = current_version(pdict)
+    manifest = version and _read_json(os.path.join(tile_folder(pdict), version, MANIFEST))
+    if not manifest:
+        return False
+    return manifest['sources'] == _source_signature(pdict) and manifest['zooms'] == list(pdict['tile_zooms'])
+
+
+# -----------------------------------------------------------------------------
+def _load_layers(pdict):
+    """PLZ polygons with station and resident numbers, Bezirk polygons, in Web Mercator"""
+    plz = gpd.read_file(ht.dataset_path(pdict, 'file_shape_plz'))
+    plz = plz[['PLZ99_N', 'geometry']].rename(columns={'PLZ99_N': 'PLZ'})
+
+    stations = artifact_store.load_lstat_plz(pdict)[['PLZ', 'Number']]
+    residents = artifact_store.load_residents(pdict)[['PLZ', 'Einwohner']]
+    plz = plz.merge(stations, on='PLZ', how='left').merge(residents, on='PLZ', how='left')
+    plz[['Number', 'Einwohner']] = plz[['Number', 'Einwohner']].fillna(0).astype(int)
+
+    dis = gpd.read_file(ht.dataset_path(pdict, 'file_shape_dis'))
+    dis = dis[['Gemeinde_n', 'geometry']].rename(columns={'Gemeinde_n': 'Bezirk'})
+
+    return {'plz': plz.to_crs(epsg=3857), 'bezirke': dis.to_crs(epsg=3857)}
+
+
+def _encode_tile(layers, z, x, y):
+    bounds = tile_bounds(z, x, y)
+    margin = (bounds[2] - bounds[0]) * BUFFER / EXTENT
+    clip = (bounds[0] - margin, bounds[1] - margin, bounds[2] + margin, bounds[3] + margin)
+
+    tile_layers = []
+    for name, gdf in layers.items():
+        geometries = shapely.clip_by_rect(gdf.geometry.values, *clip)
+        keep = ~shapely.is_empty(geometries)
+        if not keep.any():
+            continue
+        properties = gdf.drop(columns='geometry')[keep].to_dict('records')
+        features = [{'geometry': geometry, 'properties': props} for geometry, props in zip(geometries[keep], properties)]
+        tile_layers.append({'name': name, 'features': features})
+
+    if not tile_layers:
+        return None
+    return mapbox_vector_tile.encode(tile_layers, default_options={'quantize_bounds': bounds, 'extents': EXTENT})
+
+
+@ht.timer
+def _build_tiles(pdict):
+    """Building vector tile pyramid"""
+    layers = _load_layers(pdict)
+    total_bounds = layers['bezirke'].total_bounds
+
+    folder = tile_folder(pdict)
+    os.makedirs(folder, exist_ok=True)
+    build = tempfile.mkdtemp(prefix='.build-', dir=folder)
+    try:
+        count = 0
+        for z in pdict['tile_zooms']:
+            # Simplify to about one tile unit at this zoom, as neighbouring polygons
+            resolution = 2 * WORLD / 2 ** z / EXTENT
+            zoom_layers = {name: gpd.GeoDataFrame(gdf.drop(columns='geometry'),
+                                                  geometry=artifact_store.simplify_coverage(gdf.geometry.values, resolution, resolution / 4),
+                                                  crs=gdf.crs)
+                           for name, gdf in layers.items()}
+
+            xs, ys = tile_range(total_bounds, z)
+            for x in xs:
+                for y in ys:
+                    tile = _encode_tile(zoom_layers, z, x, y)
+                    if tile is None:
+                        continue
+                    path = os.path.join(build, str(z), str(x), f'{y}.pbf')
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, 'wb') as f:
+                        f.write(tile)
+                    count += 1
+
+        with open(os.path.join(build, MANIFEST), 'w') as f:
+            json.dump({'sources': _source_signature(pdict), 'zooms': list(pdict['tile_zooms'])}, f)
+        os.chmod(build, 0o755)
+
+        version = f'v{time.time_ns()}'
+        os.replace(build, os.path.join(folder, version))
+        _publish(folder, version)
+    finally:
+        shutil.rmtree(build, ignore_errors=True)
+    print(" ====> Built tiles:", count)
+
+
+def _publish(folder, version):
+    """Serves version instead of the current pyramid, which is kept, older ones are removed"""
+    previous = _read_json(os.path.join(folder, CURRENT))
+    keep = {CURRENT, version, previous and previous['version']}
+
+    # Written to a temp file first, readers see either the old or the new current.json
+    path = os.path.join(folder, CURRENT)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'version': version}, f)
+    os.replace(path + '.tmp', path)
+
+    for name in os.listdir(folder):
+        if name not in keep:
+            entry = os.path.join(folder, name)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                os.remove(entry)
+
+
+def build_tiles(pdict):
+    """Builds the tile pyramid and replaces the served one"""
+    with ht.file_lock(_lock_path(pdict)):
+        _build_tiles(pdict)
+
+
+def ensure_tiles(pdict):
+    """Builds the tile pyramid if it is missing or outdated, returns its URL template and zoom range"""
+    if not is_current(pdict):
+        with ht.file_lock(_lock_path(pdict)):
+            # Another server process may have built it while this one waited
+            if not is_current(pdict):
+                _build_tiles(pdict)
+    return {'url': TILE_URL.format(version=current_version(pdict)),
+            'min_zoom': min(pdict['tile_zooms']), 'max_zoom': max(pdict['tile_zooms'])}
+
+
+if __name__ == "__main__":
+    from config import pdict
+    build_tiles(pdict)
@@ -1,28 +1,99 @@
 import pandas as pd
-import uuid
-from datetime import datetime
+import numpy as np
+import hashlib
+from datetime import date
+from sqlalchemy import insert, update, delete, select, bindparam
 from sqlalchemy.orm import sessionmaker
 from database.database import SessionLocal
-from src.search_context.domain.entities.chargingstation import ChargingStation
+from src.search_context.domain.entities.chargingstation import ChargingStation, RegisterImport, StationId
+from src.report_context.domain.entities.report import Report
+from src.search_context.infrastructure.repositories.ChargingStationRepository import reset_spatial_index, bump_station_version
 
-def convert_to_date(date_str):
-    """Converts a date string to a datetime.date object."""
-    if pd.isna(date_str) or date_str is None:
-        return None  # Handle missing dates
-    try:
-        return datetime.strptime(str(date_str), "%Y-%m-%d").date()  # Ensure correct format
-    except ValueError:
-        return None  # Handle incorrect format
+def convert_to_dates(series):
+    """Converts a column of date strings to ISO dates as stored by SQLAlchemy (NaN if invalid)."""
+    dates = pd.to_datetime(series, format="%Y-%m-%d", errors="coerce")
+    return dates.dt.strftime("%Y-%m-%d")
 
-def clean_number(value):
-    """Converts a number string with commas to a float."""
-    if pd.isna(value) or value is None:
-        return None
-    return float(str(value).replace(",", "."))  # Convert '52,510055' → '52.510055'
+def clean_numbers(series):
+    """Converts a column of number strings with commas to floats."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    return pd.to_numeric(series.astype(str).str.replace(",", "."), errors="coerce")
 
-def import_charging_stations_from_csv(df):
-    print("====> Importing Charging Stations Data")
+def clean_postal_codes(series):
+    """Converts a column of postal codes to strings without decimal part."""
+    codes = pd.to_numeric(series, errors="coerce").astype("Int64")
+    return codes.astype(str).astype(object).where(codes.notna(), None)
+
+def station_keys(df):
+    """Derives deterministic 63 bit station ids from the register columns.
+
+    The id is a hash of operator, street, postal code, coordinates and
+    commission date, so the same station gets the same id on every import.
+    Identical register rows are told apart by their order of occurrence.
+    """
+    key_columns = ["operator", "street", "postal_code", "latitude", "longitude", "commission_date"]
+    keys = df[key_columns].astype(object).where(df[key_columns].notna(), None)
+    keys["latitude"] = df["latitude"].round(6)
+    keys["longitude"] = df["longitude"].round(6)
+    keys["occurrence"] = keys.groupby(key_columns, dropna=False).cumcount()
+
+    ids = []
+    for row in zip(*(keys[col].tolist() for col in keys.columns)):
+        digest = hashlib.blake2b("|".join(str(v).strip() for v in row).encode("utf-8"), digest_size=8).digest()
+        ids.append(int.from_bytes(digest, "big") & (2**63 - 1))
+    return np.array(ids, dtype=np.int64)
+
+# Version of station_keys, recorded with every import. Tables without a
+# recorded import hold the random ids of the first imports.
+STATION_KEY_VERSION = 1
+
+def last_import(connection):
+    """The RegisterImport row of the latest import, None if no import was recorded."""
+    table = RegisterImport.__table__
+    return connection.execute(select(table).order_by(table.c.import_id.desc()).limit(1)).first()
+
+def _record_import(connection, signature):
+    connection.execute(insert(RegisterImport.__table__).values(signature=signature, key_version=STATION_KEY_VERSION))
+
+def rekey_charging_stations(connection, chunk_size=5000):
+    """Moves stations with random ids to their station_keys id, together with their reports.
 
+    The random ids were handed out in ascending order of the register rows,
+    so sorting by them restores the order station_keys tells identical rows
+    apart by. Stations already keyed stay as they are. Returns the number of
+    moved stations.
+    """
+    table, reports = ChargingStation.__table__, Report.__table__
+    key_columns = ["operator", "street", "postal_code", "latitude", "longitude", "commission_date"]
+    existing = pd.DataFrame(connection.execute(select(table.c.station_id, *[table.c[col] for col in key_columns])
+                                               .order_by(table.c.station_id)).all(), columns=["station_id"] + key_columns)
+    existing["commission_date"] = existing["commission_date"].map(lambda d: d.isoformat() if d else None)
+    existing["new_id"] = station_keys(existing)
+
+    moved = existing[~existing["station_id"].isin(existing["new_id"]) & ~existing["new_id"].isin(existing["station_id"])]
+    ids = [{"old_id": int(old), "new_id": int(new)} for old, new in zip(moved["station_id"], moved["new_id"])]
+    if not ids:
+        return 0
+
+    # Copy, repoint the reports, then delete, so the report foreign key holds at every step
+    columns = [column for column in table.c if column.key != "station_id"]
+    copy = insert(table).from_select(["station_id"] + [column.key for column in columns],
+                                     select(bindparam("new_id", type_=StationId), *columns).where(table.c.station_id == bindparam("old_id")))
+    repoint = update(reports).where(reports.c.station_id == bindparam("old_id")).values(station_id=bindparam("new_id"))
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        connection.execute(copy, chunk)
+        connection.execute(repoint, chunk)
+        connection.execute(delete(table).where(table.c.station_id.in_([row["old_id"] for row in chunk])))
+    return len(ids)
+
+# Columns taken over from the register (everything except id and status)
+REGISTER_COLUMNS = ["postal_code", "latitude", "longitude", "location", "street", "district", "federal_state",
+                    "operator", "power_charging_dev", "type_charging_device", "commission_date"]
+
+def prepare_charging_stations(df):
+    """Maps the register columns to the chargingstation table and converts their types."""
     column_mapping = {
         "Postleitzahl": "postal_code",
         "Breitengrad": "latitude",
@@ -37,44 +108,132 @@ def import_charging_stations_from_csv(df):
         "Inbetriebnahmedatum": "commission_date"
     }
 
-    df = df.rename(columns=column_mapping)
+    df = df.rename(columns=column_mapping)[list(column_mapping.values())]
 
     # Convert data types to match SQLite schema
-    df["commission_date"] = df["commission_date"].apply(convert_to_date)
-    df["latitude"] = df["latitude"].apply(clean_number)  # Convert to float
-    df["longitude"] = df["longitude"].apply(clean_number)  # Convert to float
-    df["power_charging_dev"] = df["power_charging_dev"].apply(clean_number)  # Convert to float
+    df["commission_date"] = convert_to_dates(df["commission_date"])
+    df["latitude"] = clean_numbers(df["latitude"])
+    df["longitude"] = clean_numbers(df["longitude"])
+    df["power_charging_dev"] = clean_numbers(df["power_charging_dev"])
+    df["postal_code"] = clean_postal_codes(df["postal_code"])
+    df["station_id"] = station_keys(df)
+    df["cs_status"] = "available"
+
+    # Ascending ids are appended to the primary key b-tree instead of scattered over it
+    return df.sort_values("station_id", ignore_index=True)
+
+def _insert_rows(connection, df, chunk_size, progress):
+    """Inserts the rows of df with the DBAPI executemany in chunks of chunk_size."""
+    # Rows go straight to the DBAPI executemany, skipping SQLAlchemy's
+    # per-row parameter processing which dominates the import time
+    compiled = insert(ChargingStation.__table__).compile(dialect=connection.dialect, column_keys=list(df.columns))
+    columns = list(compiled.positiontup) if compiled.positiontup else list(df.columns)
+
+    # NaN -> None so missing values are stored as NULL
+    values = [df[col].astype(object).where(df[col].notna(), None).tolist() for col in columns]
+    rows = list(zip(*values))
+    if not compiled.positiontup:
+        rows = [dict(zip(columns, row)) for row in rows]
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        connection.exec_driver_sql(compiled.string, chunk)
+        if progress:
+            progress(start + len(chunk), len(rows))
+
+def import_charging_stations_from_csv(df, chunk_size=5000, progress=None, signature=None):
+    """Imports the charging station register into an empty table.
+
+    Rows are converted column-wise and inserted with executemany in chunks
+    of chunk_size. progress(imported, total) is called after every chunk.
+    The import is recorded with the signature of the register file.
+    """
+    print("====> Importing Charging Stations Data")
+
+    df = prepare_charging_stations(df)
 
-    # Initialize database session
     session = SessionLocal()
-    charging_stations = []
-
-    for _, row in df.iterrows():
-        station_id = uuid.uuid4().int % (2**63) # Generate unique ID
-        
-        charging_station = ChargingStation(
-            station_id=station_id,
-            postal_code=str(row["postal_code"]).split('.')[0] if pd.notna(row["postal_code"]) else None,
-            latitude=row["latitude"],
-            longitude=row["longitude"],
-            street=row["street"],
-            district=row["district"],
-            location=row["location"],
-            federal_state=row["federal_state"],
-            operator=row["operator"],
-            power_charging_dev=row["power_charging_dev"],  # ✅ Converted to float
-            type_charging_device=row["type_charging_device"],
-            commission_date=row["commission_date"],  # ✅ Converted to date
-            cs_status="available"
-        )
-        charging_stations.append(charging_station)
-
-    session.bulk_save_objects(charging_stations)
-    session.commit()
-    session.close()
+    try:
+        _insert_rows(session.connection(), df, chunk_size, progress)
+        _record_import(session.connection(), signature)
+        bump_station_version(session.connection())
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    reset_spatial_index()
     
     print("✅ Data successfully imported!")
 
+def import_charging_stations_delta(df, chunk_size=5000, progress=None, signature=None):
+    """Applies a newer charging station register to the existing table.
+
+    Stations are matched on their deterministic id (see station_keys). New
+    stations are inserted, changed ones updated and stations missing from
+    the register are marked as decommissioned, so reports keep pointing at
+    their station. Stations of a table without a recorded import are rekeyed
+    first (see rekey_charging_stations). A register whose signature was
+    already imported is skipped. Returns the number of inserted, updated and
+    removed rows.
+    """
+    print("====> Importing Charging Stations Delta")
+
+    df = prepare_charging_stations(df)
+    table = ChargingStation.__table__
+
+    session = SessionLocal()
+    try:
+        connection = session.connection()
+        latest = last_import(connection)
+        if signature is not None and latest is not None and latest.signature == signature:
+            print("✅ Register already imported")
+            return {"inserted": 0, "updated": 0, "removed": 0}
+        if latest is None or latest.key_version < STATION_KEY_VERSION:
+            print("====> Rekeyed Charging Stations:", rekey_charging_stations(connection, chunk_size))
+
+        existing = pd.DataFrame(connection.execute(select(*[table.c[col] for col in df.columns])).all(), columns=df.columns)
+        existing["commission_date"] = existing["commission_date"].map(lambda d: d.isoformat() if d else None)
+
+        is_new = ~df["station_id"].isin(existing["station_id"])
+        _insert_rows(connection, df[is_new], chunk_size, progress)
+
+        # Compare the register columns of stations that are already known
+        merged = df[~is_new].merge(existing, on="station_id", suffixes=("", "_db"))
+        changed = merged["cs_status_db"] == "decommissioned"
+        for col in REGISTER_COLUMNS:
+            new, old = merged[col], merged[col + "_db"]
+            changed |= ~((new == old) | (new.isna() & old.isna()))
+
+        updates = merged.loc[changed, REGISTER_COLUMNS + ["station_id"]].rename(columns={"station_id": "b_station_id"})
+        # Stations that come back are available again, all others keep their status
+        updates["cs_status"] = merged.loc[changed, "cs_status_db"].replace("decommissioned", "available")
+        updates["commission_date"] = updates["commission_date"].map(lambda d: date.fromisoformat(d) if isinstance(d, str) else None)
+        updates = updates.astype(object).where(updates.notna(), None)
+        if len(updates):
+            statement = update(table).where(table.c.station_id == bindparam("b_station_id"))
+            connection.execute(statement, updates.to_dict("records"))
+
+        vanished = existing.loc[~existing["station_id"].isin(df["station_id"]) & (existing["cs_status"] != "decommissioned"), "station_id"].tolist()
+        for start in range(0, len(vanished), chunk_size):
+            statement = update(table).where(table.c.station_id.in_(vanished[start:start + chunk_size])).values(cs_status="decommissioned")
+            connection.execute(statement)
+
+        _record_import(connection, signature)
+        bump_station_version(connection)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    reset_spatial_index()
+
+    result = {"inserted": int(is_new.sum()), "updated": len(updates), "removed": len(vanished)}
+    print("✅ Delta successfully imported!", result)
+    return result
+
 if __name__ == "__main__":
     df = pd.read_csv("../datasets/Ladesaeulenregister.csv")  # Load CSV
     import_charging_stations_from_csv(df)
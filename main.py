@@ -3,9 +3,10 @@ import os
 import pandas as pd
 from core import register_methods as register
 from core import methods as m1
+from core import dataset_cache
 from config import pdict
 import streamlit as st
-from database.database import SessionLocal,engine,Base
+from database.database import SessionLocal,engine,Base,session_scope
 from sqlalchemy import create_engine,inspect
 
 
@@ -37,27 +38,18 @@ def main():
 
 def after_registration(role, user_id):
 
-    # Load datasets
-    df_geodat_plz = pd.read_csv(
-        os.path.join(os.getcwd(), 'datasets', 'geodata_berlin_plz.csv'), delimiter=';'
-    )
+    # Load datasets (cached process-wide, rebuilt only when a file changes)
+    gdf_lstat3 = dataset_cache.load_lstat(pdict)
+    gdf_residents2 = dataset_cache.load_residents(pdict)
+    plz_geometries = dataset_cache.load_plz_geometries(pdict)
+    tiles = dataset_cache.load_tiles(pdict) if pdict['vector_tiles'] else None
 
-    df_lstat = pd.read_csv(
-        os.path.join(os.getcwd(), 'datasets', 'Ladesaeulenregister.csv'),
-        delimiter=';',
-        low_memory=False
-    )
-    df_lstat = df_lstat[df_lstat['Bundesland'] == 'Berlin']
-    df_lstat2 = m1.preprop_lstat(df_lstat, df_geodat_plz, pdict)
-    gdf_lstat3 = m1.count_plz_occurrences(df_lstat2)
+    # Import new, changed or vanished stations once per register version
+    dataset_cache.sync_register(pdict)
 
-    df_residents = pd.read_csv(
-        os.path.join(os.getcwd(), 'datasets', 'plz_einwohner.csv'), delimiter=','
-    )
-    gdf_residents2 = m1.preprop_resid(df_residents, df_geodat_plz, pdict)
-
-    # Generate the Streamlit visualization
-    to_register=m1.make_streamlit_electric_Charging_resid(df_lstat,gdf_lstat3, gdf_residents2,role, user_id)
+    # Generate the Streamlit visualization, all repositories of this rerun share one session
+    with session_scope() as session:
+        to_register=m1.make_streamlit_electric_Charging_resid(gdf_lstat3, gdf_residents2,role, user_id, plz_geometries, tiles, session)
     if to_register=="logout":
         open_registration_form()
         st.rerun()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from database.database import Base  # Ensure Base is imported
 from sqlalchemy.orm import relationship
 
@@ -10,4 +10,9 @@ class Admin(Base):
     password = Column(String, nullable=False)
     number_reports_assigned = Column(Integer, nullable=False)
     
-    reports = relationship("Report", back_populates="admin")
\ No newline at end of file
+    reports = relationship("Report", back_populates="admin")
+
+    # The least loaded admin is the first row of this index
+    __table_args__ = (
+        Index('ix_admin_load', number_reports_assigned, sys_admin_id),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Index
 from database.database import engine, Base  # Adjust import path as needed
 from sqlalchemy.orm import relationship
 
@@ -12,3 +12,8 @@ class CSOperator(Base):
     number_reports_assigned = Column(Integer, nullable=False)
     
     reports = relationship("Report", back_populates="csoperator")
+
+    # The least loaded operator is the first row of this index
+    __table_args__ = (
+        Index('ix_csoperators_load', number_reports_assigned, cs_operator_id),
+    )
@@ -3,6 +3,7 @@ from src.register_context.domain.entities.admin import Admin
 from src.register_context.domain.value_objects import Password
 from src.register_context.domain.events.AdminAlreadyExistEvent import AdminAlreadyExistEvent
 from sqlalchemy.orm import Session
+from database.database import commit
 from typing import List
 
 class AdminRepository:
@@ -17,7 +18,7 @@ class AdminRepository:
 
     def add_admin(self, admin: Admin):
         self.session.add(admin)
-        self.session.commit()
+        commit(self.session)
 
     def signin_admin(self, username: str, password: Password) -> Admin:
         return self.session.query(Admin).filter_by(username=username,password=password).first()
@@ -27,6 +28,6 @@ class AdminRepository:
     
     def update_admin(self, admin: Admin) -> Admin:
         updated_admin = self.session.merge(admin)
-        self.session.commit()
+        commit(self.session)
         return updated_admin
  
\ No newline at end of file
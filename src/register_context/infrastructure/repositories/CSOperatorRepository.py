@@ -3,6 +3,7 @@ from src.register_context.domain.entities.csoperator import CSOperator
 from src.register_context.domain.value_objects import Password
 from src.register_context.domain.events.CSOperatorAlreadyExistEvent import CSOperatorAlreadyExistEvent
 from sqlalchemy.orm import Session
+from database.database import commit
 
 class CSOperatorRepository:
     def __init__(self, session: Session):
@@ -16,7 +17,7 @@ class CSOperatorRepository:
 
     def add_csoperator(self, csoperator: CSOperator):
         self.session.add(csoperator)
-        self.session.commit()
+        commit(self.session)
 
     def signin_csoperator(self, username: str, password: str) -> CSOperator:
         return self.session.query(CSOperator).filter_by(username=username,password=password).first()
@@ -26,5 +27,5 @@ class CSOperatorRepository:
     
     def update_csoperator(self, csoperator: CSOperator) -> CSOperator:
         updated_operator = self.session.merge(csoperator)
-        self.session.commit()
+        commit(self.session)
         return updated_operator
\ No newline at end of file
@@ -1,5 +1,5 @@
 from src.report_context.infrastructure.repositories.NotificationRepository import NotificationRepository
-from typing import List
+from typing import List, Optional
 from src.report_context.domain.events.NotificationCreateEvent import NotificationCreateEvent
 from src.report_context.domain.events.GetUserNotificationsEvent import GetUserNotificationsEvent
 
@@ -12,8 +12,38 @@ class NotificationService:
       """Create a new notification."""
       success = self.notification_repository.create_notifications(users_id, content)
       return NotificationCreateEvent(success)
+
+  def broadcast_notification(self, content: str) -> NotificationCreateEvent:
+      """Create one notification for all users."""
+      success = self.notification_repository.create_broadcast_notification(content)
+      return NotificationCreateEvent(success)
   
+  def open_inbox(self, user_id: int) -> bool:
+      """Start the inbox of a newly registered user, without the broadcasts sent before."""
+      return self.notification_repository.open_inbox(user_id)
+
   def get_notifications_by_user_id(self, user_id: int) -> GetUserNotificationsEvent:
       """Find notifications by a user ID."""
       notifications = self.notification_repository.find_notifications_by_user_id(user_id)
-      return GetUserNotificationsEvent(notifications, user_id)
\ No newline at end of file
+      return GetUserNotificationsEvent(notifications, user_id)
+
+  def get_notifications_page(self, user_id: int, limit: int = 20, before: Optional[int] = None) -> GetUserNotificationsEvent:
+      """Find a page of notifications of a user, newest first, older than the before notification ID."""
+      notifications = self.notification_repository.find_notifications_page(user_id, limit + 1, before)
+      next_cursor = None
+      if len(notifications) > limit:
+          notifications = notifications[:limit]
+          next_cursor = notifications[-1].notification_id
+      return GetUserNotificationsEvent(notifications, user_id, next_cursor=next_cursor)
+
+  def count_unread(self, user_id: int) -> int:
+      """Count the unread notifications of a user."""
+      return self.notification_repository.count_unread(user_id)
+
+  def get_read_until(self, user_id: int) -> int:
+      """Newest notification ID the user has read, notifications with a greater ID are new."""
+      return self.notification_repository.find_read_until(user_id)
+
+  def mark_all_read(self, user_id: int) -> bool:
+      """Mark all notifications of a user as read."""
+      return self.notification_repository.mark_all_read(user_id)
@@ -1,26 +1,38 @@
 from src.report_context.infrastructure.repositories.ReportRepository import ReportRepository
 from src.report_context.domain.entities.report import Report
+from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
+from src.report_context.domain.value_objects.report_filter import ReportFilter
 from src.report_context.domain.events.ReportDeleteEvent import ReportDeleteEvent
 from src.report_context.domain.events.ReportUpdateEvent import ReportUpdateEvent
+from src.report_context.domain.events.ReportsUpdateEvent import ReportsUpdateEvent
 from src.report_context.domain.events.GetAllReportsEvent import GetAllReportsEvent
 from src.report_context.domain.events.GetAdminReportsEvent import GetAdminReportsEvent
 from src.report_context.domain.events.ReportCreateEvent import ReportCreateEvent
 from src.report_context.domain.events.ReportAlreadyExistsEvent import ReportAlreadyExistsEvent
 
 class ReportService:
-  def __init__(self, report_repository: ReportRepository):
-      """Initialize the service with a ReportRepository."""
+  def __init__(self, report_repository: ReportRepository, report_aggregate_service=None):
+      """Initialize the service with a ReportRepository and the ReportAggregateService of the bulk updates."""
       self.report_repository = report_repository
+      self.report_aggregate_service = report_aggregate_service
       
   def create_report(self, report: Report) -> ReportCreateEvent | ReportAlreadyExistsEvent:
       """Create a new report."""
-      exisiting_reports = self.report_repository.find_reports_by_station_id(report.station_id)
+      exisiting_report = self.report_repository.find_open_report_by_station_id(report.station_id)
       
-      for exisiting_report in exisiting_reports:
-          if exisiting_report is not None and exisiting_report.status != "resolved":
-            return ReportAlreadyExistsEvent(exisiting_report, "Malfunction report has already been forwarded for this station")
-        
-      success = self.report_repository.create_report(report)
+      if exisiting_report is not None:
+          return ReportAlreadyExistsEvent(exisiting_report, "Malfunction report has already been forwarded for this station")
+      
+      try:
+          success = self.report_repository.create_report(report)
+      except IntegrityError:
+          # A concurrent report for the station won the partial unique index
+          self.report_repository.session.rollback()
+          exisiting_report = self.report_repository.find_open_report_by_station_id(report.station_id)
+          if exisiting_report is None:
+              raise
+          return ReportAlreadyExistsEvent(exisiting_report, "Malfunction report has already been forwarded for this station")
       return ReportCreateEvent(success)
 
   def get_reports_by_admin_id(self, admin_id: int) -> GetAdminReportsEvent:
@@ -33,11 +45,29 @@ class ReportService:
       reports = self.report_repository.find_reports_by_csoperator_id(csoperator_id)
       return GetAllReportsEvent(reports)
   
+  def get_reports_page(self, report_filter: ReportFilter, limit: int = 50, after: Optional[int] = None) -> GetAllReportsEvent:
+      """Find a page of reports matching the filter, after the report with the ID after."""
+      reports = self.report_repository.find_reports_page(report_filter, limit + 1, after)
+      next_cursor = None
+      if len(reports) > limit:
+          reports = reports[:limit]
+          next_cursor = reports[-1].report_id
+      return GetAllReportsEvent(reports, next_cursor=next_cursor)
+  
   def update_report(self, report: Report) -> ReportUpdateEvent:
       """Update a report in the database."""
       updated_event = self.report_repository.update_report(report)
       return ReportUpdateEvent(updated_event)
       
+  def forward_reports(self, reports: List[Report]) -> ReportsUpdateEvent | ValueError:
+      """Forward several pending reports to the charging station operators."""
+      # The aggregate keeps the status guard, the assignee counters and the notifications
+      return self.report_aggregate_service.forward_report_malfunctions(reports)
+      
+  def resolve_reports(self, reports: List[Report]) -> ReportsUpdateEvent | ValueError:
+      """Resolve several managed reports."""
+      return self.report_aggregate_service.resolve_report_malfunctions(reports)
+      
   def delete_report(self, report_id: int) -> ReportDeleteEvent:
       """Delete a report from the database."""
       result = self.report_repository.delete_report(report_id) 
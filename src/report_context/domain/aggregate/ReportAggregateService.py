@@ -1,5 +1,8 @@
 from src.report_context.infrastructure.repositories.ReportRepository import ReportRepository
 from src.report_context.infrastructure.repositories.NotificationRepository import NotificationRepository
+from src.report_context.infrastructure.NotificationDispatcher import NotificationDispatcher
+from src.report_context.infrastructure.ReportAssigner import ReportAssigner, ADMINS, CSOPERATORS
+from database.database import unit_of_work, after_commit
 from src.register_context.infrastructure.repositories.UserRepository import UserRepository
 from src.register_context.infrastructure.repositories.AdminRepository import AdminRepository
 from src.search_context.infrastructure.repositories.ChargingStationRepository import ChargingStationRepository
@@ -8,66 +11,112 @@ from src.report_context.domain.entities.report import Report
 from src.report_context.domain.events.ReportCreateFailedEvent import ReportCreateFailedEvent
 from src.report_context.domain.events.ReportCreateEvent import ReportCreateEvent
 from src.register_context.infrastructure.repositories.CSOperatorRepository import CSOperatorRepository
-from typing import Union
+from collections import Counter
+from sqlalchemy.exc import IntegrityError
+from typing import List, Union
 from src.report_context.domain.events.ReportUpdateEvent import ReportUpdateEvent
+from src.report_context.domain.events.ReportsUpdateEvent import ReportsUpdateEvent
+
+class _ReportMalfunctionFailed(Exception):
+    """Leaves the unit of work of a failed report, which rolls back the assignee's counter"""
+    def __init__(self, event: ReportCreateFailedEvent):
+        super().__init__(event.reason)
+        self.event = event
+
 
 class ReportAggregateService:
-    def __init__(self, report_repository: ReportRepository, user_repository: UserRepository, notification_repository: NotificationRepository, admin_repository: AdminRepository, chargingstation_repository: ChargingStationRepository, csoperator_repository: CSOperatorRepository):
+    def __init__(self, report_repository: ReportRepository, user_repository: UserRepository, notification_repository: NotificationRepository, admin_repository: AdminRepository, chargingstation_repository: ChargingStationRepository, csoperator_repository: CSOperatorRepository, notification_dispatcher: NotificationDispatcher = None, admin_policy=None, csoperator_policy=None):
         self.report_repository = report_repository
         self.user_repository = user_repository
         self.notification_repository = notification_repository
         self.admin_repository = admin_repository
         self.chargingstation_repository = chargingstation_repository
         self.csoperator_repository = csoperator_repository
+        # Without a dispatcher notifications are written within the request
+        self.notification_dispatcher = notification_dispatcher
+        # Least loaded assignee by default, see ReportAssigner for the other policies
+        self.admin_assigner = ReportAssigner(report_repository.session, ADMINS, admin_policy)
+        self.csoperator_assigner = ReportAssigner(report_repository.session, CSOPERATORS, csoperator_policy)
         self.events = []
         
     def get_events(self):
         return self.events
 
-    def report_malfunction(self, report: Report) -> Union[ReportAlreadyExistsEvent, ReportCreateFailedEvent, ReportCreateEvent]:
-        all_admins = self.admin_repository.get_all_admins()
-        admin = None
-        for admin in all_admins:
-            if(admin.number_reports_assigned < 10):
-                admin = admin
-                break
-        # If no admin with less than 10 reports is found, get the first admin
-        if not admin:
-            admin = all_admins[0]
-            
-        report.admin_id = admin.sys_admin_id
-        
-        exisiting_reports = self.report_repository.find_reports_by_station_id(report.station_id)
-    
-        for exisiting_report in exisiting_reports:
-            if exisiting_report is not None and exisiting_report.status != "resolved":
-                event = ReportAlreadyExistsEvent(exisiting_report, "Malfunction report has already been forwarded for this station")
-                self.events.append(("REPORT MALFUNCTION", event))
-                return event
+    def _broadcast(self, content: str):
+        if self.notification_dispatcher:
+            # Queued once the report is committed, a rolled back report notifies nobody
+            after_commit(self.report_repository.session, lambda: self.notification_dispatcher.broadcast(content))
+        else:
+            self.notification_repository.create_broadcast_notification(content)
 
-        success = self.report_repository.create_report(report)
-        
-        if not success:
-            event = ReportCreateFailedEvent("Report creation failed")
-            self.events.append(("REPORT MALFUNCTION", event))
-            return event
-        
-        # Update the number of reports assigned to the admin
-        admin.number_reports_assigned += 1
-        self.admin_repository.update_admin(admin)
-        
-        # Change status of station to "out_of_service"
-        self.chargingstation_repository.update_charging_station(report.station_id, "out_of_service")
-        
-        # Send notification to users
-        all_users = self.user_repository.get_all_users()
-        self.notification_repository.create_notifications([user.user_id for user in all_users], f"""<h5>MALFUNCTION HAS BEEN REPORTED FOR STATION ID: {report.station_id}</h5>
+    def _broadcast_many(self, contents: List[str]):
+        if self.notification_dispatcher:
+            after_commit(self.report_repository.session, lambda: [self.notification_dispatcher.broadcast(content) for content in contents])
+        else:
+            self.notification_repository.create_notification_batch([(None, content) for content in contents])
+
+    @staticmethod
+    def _malfunction_message(report: Report) -> str:
+        return f"""<h5>MALFUNCTION HAS BEEN REPORTED FOR STATION ID: {report.station_id}</h5>
             <ul>
                 <li>Street: {report.chargingstation.street}</li>
                 <li>Postal Code: {report.chargingstation.postal_code}</li>
                 <li>District: {report.chargingstation.district}</li>
             </ul>
-            <strong>Please check nearby charging stations for alternative options while this issue is addressed. Thank you for your cooperation.</strong>""")
+            <strong>Please check nearby charging stations for alternative options while this issue is addressed. Thank you for your cooperation.</strong>"""
+
+    @staticmethod
+    def _resolved_message(report: Report) -> str:
+        return f"""<h5>ISSUE RESOLVED FOR STATION ID: {report.station_id}</h5>
+            <ul>
+                <li>Street: {report.chargingstation.street}</li>
+                <li>Postal Code: {report.chargingstation.postal_code}</li>
+                <li>District: {report.chargingstation.district}</li>
+            </ul>
+            <strong>The reported malfunction has been resolved, and the charging station is now fully operational. Thank you for your patience and cooperation..</strong>"""
+
+    def report_malfunction(self, report: Report) -> Union[ReportAlreadyExistsEvent, ReportCreateFailedEvent, ReportCreateEvent]:
+        try:
+            return self._report_malfunction(report)
+        except IntegrityError:
+            # A concurrent report for the station won the partial unique index
+            exisiting_report = self.report_repository.find_open_report_by_station_id(report.station_id)
+            if exisiting_report is None:
+                raise
+            event = ReportAlreadyExistsEvent(exisiting_report, "Malfunction report has already been forwarded for this station")
+            self.events.append(("REPORT MALFUNCTION", event))
+            return event
+
+    def _report_malfunction(self, report: Report) -> Union[ReportAlreadyExistsEvent, ReportCreateFailedEvent, ReportCreateEvent]:
+        # One transaction for the report, the admin's counter, the station status and the notification
+        try:
+            with unit_of_work(self.report_repository.session):
+                exisiting_report = self.report_repository.find_open_report_by_station_id(report.station_id)
+            
+                if exisiting_report is not None:
+                    event = ReportAlreadyExistsEvent(exisiting_report, "Malfunction report has already been forwarded for this station")
+                    self.events.append(("REPORT MALFUNCTION", event))
+                    return event
+
+                admin = self.admin_assigner.assign(report)
+                if admin is None:
+                    raise _ReportMalfunctionFailed(ReportCreateFailedEvent("No admin to assign the report to"))
+                report.admin_id = admin.sys_admin_id
+                
+                success = self.report_repository.create_report(report)
+                
+                if not success:
+                    # Raised, not returned, so the admin's counter is rolled back
+                    raise _ReportMalfunctionFailed(ReportCreateFailedEvent("Report creation failed"))
+                
+                # Change status of station to "out_of_service"
+                self.chargingstation_repository.update_charging_station(report.station_id, "out_of_service")
+                
+                # Send notification to users, one broadcast row instead of one row per user
+                self._broadcast(self._malfunction_message(report))
+        except _ReportMalfunctionFailed as failed:
+            self.events.append(("REPORT MALFUNCTION", failed.event))
+            return failed.event
         
         event = ReportCreateEvent(True)
         self.events.append(("REPORT MALFUNCTION", event))
@@ -75,27 +124,14 @@ class ReportAggregateService:
        
     def forward_report_malfunction(self, report: Report) -> Union[ReportUpdateEvent, ValueError]:
         try: 
-            all_csoperators = self.csoperator_repository.get_all_csoperators()
-            cs_operator = None
-            # Get the first operator with less than 10 reports assigned
-            for operator in all_csoperators:
-                if(operator.number_reports_assigned < 10):
-                    cs_operator = operator
-                    break
-            # If no operator with less than 10 reports is found, get the first operator
-            if not cs_operator:
-                cs_operator = all_csoperators[0]
-            
-            # Update the report
-            report.csoperator = cs_operator
-            report.status = "managed"
-            updated_report = self.report_repository.update_report(report)
-            
-            # report_service.update_report(report)
-            
-            # Update the charging station operator
-            cs_operator.number_reports_assigned += 1
-            self.csoperator_repository.update_csoperator(cs_operator)
+            # One transaction for the report and the operator's counter
+            with unit_of_work(self.report_repository.session):
+                cs_operator = self.csoperator_assigner.assign(report)
+                if cs_operator is None:
+                    raise ValueError("No charging station operator to forward the report to")
+                report.csoperator = cs_operator
+                report.status = "managed"
+                updated_report = self.report_repository.update_report(report)
             
             event = ReportUpdateEvent(updated_report)
             self.events.append(("FORWARD REPORT MALFUNCTION", event))
@@ -107,32 +143,21 @@ class ReportAggregateService:
         
     def resolve_report_malfunction(self, report: Report) -> Union[ReportUpdateEvent, ValueError]:
         try: 
-            # Update the admin
-            admin = report.admin
-            admin.number_reports_assigned -= 1
-            self.admin_repository.update_admin(admin)
-            
-            # Update the charging station operator
-            cs_operator = report.csoperator
-            cs_operator.number_reports_assigned -= 1
-            self.csoperator_repository.update_csoperator(cs_operator)
-            
-            # Change status of station
-            self.chargingstation_repository.update_charging_station(report.station_id, "available")
-            
-            # Send notification to users
-            all_users = self.user_repository.get_all_users()
-            self.notification_repository.create_notifications([user.user_id for user in all_users], f"""<h5>ISSUE RESOLVED FOR STATION ID: {report.station_id}</h5>
-                <ul>
-                    <li>Street: {report.chargingstation.street}</li>
-                    <li>Postal Code: {report.chargingstation.postal_code}</li>
-                    <li>District: {report.chargingstation.district}</li>
-                </ul>
-                <strong>The reported malfunction has been resolved, and the charging station is now fully operational. Thank you for your patience and cooperation..</strong>""")
-            
-            # Update the report
-            report.status = "resolved"
-            updated_report = self.report_repository.update_report(report)
+            # One transaction for the counters, the station status, the notification and the report
+            with unit_of_work(self.report_repository.session):
+                # Decremented in SQL, so concurrent resolutions do not lose updates
+                self.admin_assigner.release(report.admin_id)
+                self.csoperator_assigner.release(report.csoperator_id)
+                
+                # Change status of station
+                self.chargingstation_repository.update_charging_station(report.station_id, "available")
+                
+                # Send notification to users, one broadcast row instead of one row per user
+                self._broadcast(self._resolved_message(report))
+                
+                # Update the report
+                report.status = "resolved"
+                updated_report = self.report_repository.update_report(report)
             
             event = ReportUpdateEvent(updated_report)
             self.events.append(("RESOLVE REPORT MALFUNCTION", event))
@@ -141,4 +166,52 @@ class ReportAggregateService:
         except (TypeError, ValueError) as e:
             event = ValueError(e)
             self.events.append(("RESOLVE REPORT MALFUNCTION", event))
-            return e
\ No newline at end of file
+            return e
+
+    def forward_report_malfunctions(self, reports: List[Report]) -> Union[ReportsUpdateEvent, ValueError]:
+        """Forward the pending reports among the operators, one UPDATE per operator"""
+        try:
+            reports = [report for report in reports if report.status == "pending"]
+            with unit_of_work(self.report_repository.session):
+                groups = self.csoperator_assigner.assign_many(reports)
+                if reports and not groups:
+                    raise ValueError("No charging station operator to forward the reports to")
+                for cs_operator_id, group in groups.items():
+                    updated = self.report_repository.update_reports([report.report_id for report in group],
+                        {Report.csoperator_id: cs_operator_id, Report.status: "managed"}, from_status="pending")
+                    if updated != len(group):
+                        raise ValueError("Some of the reports were changed in the meantime, please reload them")
+            
+            event = ReportsUpdateEvent(reports)
+            self.events.append(("FORWARD REPORT MALFUNCTIONS", event))
+            return event
+        except (TypeError, ValueError) as e:
+            event = ValueError(e)
+            self.events.append(("FORWARD REPORT MALFUNCTIONS", event))
+            return e
+
+    def resolve_report_malfunctions(self, reports: List[Report]) -> Union[ReportsUpdateEvent, ValueError]:
+        """Resolve the managed reports with one UPDATE per table"""
+        try:
+            reports = [report for report in reports if report.status == "managed"]
+            with unit_of_work(self.report_repository.session):
+                updated = self.report_repository.update_reports([report.report_id for report in reports], {Report.status: "resolved"}, from_status="managed")
+                if updated != len(reports):
+                    raise ValueError("Some of the reports were changed in the meantime, please reload them")
+                
+                for admin_id, count in Counter(report.admin_id for report in reports).items():
+                    self.admin_assigner.release(admin_id, count)
+                for cs_operator_id, count in Counter(report.csoperator_id for report in reports).items():
+                    self.csoperator_assigner.release(cs_operator_id, count)
+                
+                if reports:
+                    self.chargingstation_repository.update_charging_stations([report.station_id for report in reports], "available")
+                    self._broadcast_many([self._resolved_message(report) for report in reports])
+            
+            event = ReportsUpdateEvent(reports)
+            self.events.append(("RESOLVE REPORT MALFUNCTIONS", event))
+            return event
+        except (TypeError, ValueError) as e:
+            event = ValueError(e)
+            self.events.append(("RESOLVE REPORT MALFUNCTIONS", event))
+            return e
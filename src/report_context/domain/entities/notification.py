@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, func, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Enum, func, ForeignKey, Boolean, Index
 from database.database import Base
 from sqlalchemy.orm import relationship
 
@@ -10,7 +10,33 @@ class Notification(Base):
     content = Column(String, nullable=False)
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
-    
+
+    # None for a broadcast, which every user reads from this single row
     user_id = Column(Integer, ForeignKey('user.user_id'))
     user = relationship("User", back_populates="notifications")
-    
\ No newline at end of file
+
+    # Inbox pages are read newest first per user (and for the broadcasts, user_id NULL)
+    __table_args__ = (
+        Index('ix_notification_user_created', user_id, created_at.desc(), notification_id.desc()),
+    )
+
+
+# Define the NotificationInbox table
+class NotificationInbox(Base):
+    """Notification counters of a user, so the unread count is two primary key lookups
+
+    The row with user_id BROADCASTS counts the broadcasts, which every user receives.
+    A user registered later only receives the broadcasts after broadcasts_after.
+    """
+    __tablename__ = 'notification_inbox'  # Table name
+
+    BROADCASTS = 0
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    received = Column(Integer, nullable=False, default=0)
+    read = Column(Integer, nullable=False, default=0)
+    broadcasts_read = Column(Integer, nullable=False, default=0)
+    # notification_id of the last broadcast sent before the user registered
+    broadcasts_after = Column(Integer, nullable=False, default=0, server_default="0")
+    # notification_id of the newest notification when the user last read them all
+    read_until = Column(Integer, nullable=False, default=0, server_default="0")
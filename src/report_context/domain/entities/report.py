@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, func, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Enum, func, ForeignKey, Index
 from database.database import Base
+from src.search_context.domain.entities.chargingstation import StationId
 from sqlalchemy.orm import relationship
 
 # Define the Report table
@@ -7,14 +8,14 @@ class Report(Base):
     __tablename__ = 'report'  # Table name
 
     report_id = Column(Integer, primary_key=True, autoincrement=True)
-    status = Column(Enum('pending', 'managed', 'resolved'), nullable=False, default='pending')
+    status = Column(Enum('pending', 'managed', 'resolved', name='report_status'), nullable=False, default='pending')
     description = Column(String, nullable=False)
-    severity = Column(Enum('low', 'medium', 'high'), nullable=False, default='low')
-    type = Column(Enum('hardware', 'software', 'connectivity'), nullable=False, default='hardware')
+    severity = Column(Enum('low', 'medium', 'high', name='report_severity'), nullable=False, default='low')
+    type = Column(Enum('hardware', 'software', 'connectivity', name='report_type'), nullable=False, default='hardware')
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
-    station_id = Column(Integer, ForeignKey('chargingstation.station_id'))
+    station_id = Column(StationId, ForeignKey('chargingstation.station_id'))
     user_id = Column(Integer, ForeignKey('user.user_id'))
     admin_id = Column(Integer, ForeignKey('admin.sys_admin_id'))
     csoperator_id = Column(Integer, ForeignKey('csoperators.cs_operator_id'))
@@ -22,4 +23,13 @@ class Report(Base):
     user = relationship("User", back_populates="reports")
     admin = relationship("Admin", back_populates="reports")
     csoperator = relationship("CSOperator", back_populates="reports")
-    chargingstation = relationship("ChargingStation", back_populates="reports")
\ No newline at end of file
+    chargingstation = relationship("ChargingStation", back_populates="reports")
+
+    # The dashboards list an admin's or operator's reports by status, newest first
+    # A station has at most one open report, the duplicate check is a lookup in this partial index
+    __table_args__ = (
+        Index('ix_report_admin_status', admin_id, status, created_at),
+        Index('ix_report_csoperator_status', csoperator_id, status, created_at),
+        Index('uq_report_open_station', station_id, unique=True,
+              sqlite_where=status != 'resolved', postgresql_where=status != 'resolved'),
+    )
@@ -1,19 +1,21 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from src.report_context.domain.entities.report import Report
 
 class GetAllReportsEvent:
-    def __init__(self, reports: List[Report], success: bool = True):
+    def __init__(self, reports: List[Report], success: bool = True, next_cursor: Optional[int] = None):
       self.reports = reports
       self.success = success
+      self.next_cursor = next_cursor  # report_id to continue after, None on the last page
       self.timestamp = datetime.now()
 
     def __repr__(self):
-      return f"<GetAllReportsEvent(reports={self.reports}, success={self.success})>"
+      return f"<GetAllReportsEvent(reports={self.reports}, success={self.success}, next_cursor={self.next_cursor})>"
 
     def as_dict(self):
       return {
         "reports": self.reports,
         "success": self.success,
+        "next_cursor": self.next_cursor,
         "timestamp": self.timestamp.isoformat()
       }
\ No newline at end of file
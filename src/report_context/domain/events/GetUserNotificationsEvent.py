@@ -1,21 +1,23 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from src.report_context.domain.entities.notification import Notification
 
 class GetUserNotificationsEvent:
-  def __init__(self, notifications: List[Notification], user_id: int, success: bool = True):
+  def __init__(self, notifications: List[Notification], user_id: int, success: bool = True, next_cursor: Optional[int] = None):
       self.user_id = user_id
       self.notifications = notifications
       self.success = success
+      self.next_cursor = next_cursor  # notification_id to continue after, None on the last page
       self.timestamp = datetime.now()
 
   def __repr__(self):
-    return f"<GetUserNotificationsEvent(notifications={self.notifications}, user_id={self.user_id}, success={self.success})>"
+    return f"<GetUserNotificationsEvent(notifications={self.notifications}, user_id={self.user_id}, success={self.success}, next_cursor={self.next_cursor})>"
 
   def as_dict(self):
     return {
       "notifications": self.notifications,
       "user_id": self.user_id,
       "success": self.success,
+      "next_cursor": self.next_cursor,
       "timestamp": self.timestamp.isoformat()
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+# Keys the report dashboards can be sorted by, the report ID breaks ties
+SORT_KEYS = ("created_at", "updated_at", "severity", "status")
+
+@dataclass(frozen=True)
+class ReportFilter:
+    admin_id: Optional[int] = None
+    csoperator_id: Optional[int] = None
+    statuses: Optional[Tuple[str, ...]] = None
+    severities: Optional[Tuple[str, ...]] = None
+    types: Optional[Tuple[str, ...]] = None
+    districts: Optional[Tuple[str, ...]] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None  # exclusive
+    sort_by: str = "created_at"
+    descending: bool = True
+
+    def __post_init__(self):
+        # Lists are accepted, stored as tuples so the filter stays hashable
+        for name in ("statuses", "severities", "types", "districts"):
+            value = getattr(self, name)
+            if value is not None:
+                object.__setattr__(self, name, tuple(value))
+
+        if self.sort_by not in SORT_KEYS:
+            raise ValueError(f"Reports can only be sorted by one of {', '.join(SORT_KEYS)}.")
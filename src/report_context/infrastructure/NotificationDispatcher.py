@@ -0,0 +1,125 @@
+import atexit
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+from database.database import SessionLocal, session_scope
+from src.report_context.infrastructure.repositories.NotificationRepository import NotificationRepository
+
+
+@dataclass
+class NotificationJob:
+    content: str
+    users_id: Optional[List[int]] = None  # None for a broadcast to all users
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class NotificationDispatcher:
+    """Writes notifications on a background thread, off the request that caused them
+
+    Jobs are queued in memory and written in batches of up to batch_size jobs
+    per transaction. A failed batch is retried up to max_attempts times with
+    a growing delay, after that its jobs are counted as failed and dropped.
+    """
+
+    def __init__(self, session_factory=None, batch_size: int = 100, max_attempts: int = 3, retry_delay: float = 0.5):
+        self.session_factory = session_factory or SessionLocal
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._dispatched = 0
+        self._failed = 0
+        self._retries = 0
+        self._last_lag = 0.0
+        self._worker = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+        self._worker.start()
+
+    def dispatch(self, users_id: List[int], content: str):
+        """Queue a notification for each of the users"""
+        self._queue.put(NotificationJob(content, list(users_id)))
+
+    def broadcast(self, content: str):
+        """Queue a notification for all users"""
+        self._queue.put(NotificationJob(content))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued job is written or has failed, False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def metrics(self) -> dict:
+        """Queue depth, age of the oldest queued job and counters, lags in seconds"""
+        with self._queue.mutex:
+            pending = list(self._queue.queue)
+        with self._lock:
+            return {
+                "depth": len(pending),
+                "oldest_lag": time.monotonic() - min(job.enqueued_at for job in pending) if pending else 0.0,
+                "last_lag": self._last_lag,
+                "dispatched": self._dispatched,
+                "retries": self._retries,
+                "failed": self._failed,
+            }
+
+    # -----------------------------------------------------------------------------
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        rows = [(None, job.content) for job in batch if job.users_id is None]
+        rows += [(user_id, job.content) for job in batch if job.users_id is not None for user_id in job.users_id]
+        with session_scope(self.session_factory) as session:
+            NotificationRepository(session).create_notification_batch(rows)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._write(batch)
+            except Exception as e:
+                retry = [job for job in batch if job.attempts + 1 < self.max_attempts]
+                with self._lock:
+                    self._retries += len(retry)
+                    self._failed += len(batch) - len(retry)
+                print(f" ====> Notification batch failed ({len(retry)} of {len(batch)} jobs retried): {e}")
+                time.sleep(self.retry_delay * 2 ** batch[0].attempts)
+                for job in retry:
+                    job.attempts += 1
+                    self._queue.put(job)
+            else:
+                with self._lock:
+                    self._dispatched += len(batch)
+                    self._last_lag = time.monotonic() - min(job.enqueued_at for job in batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_notification_dispatcher() -> NotificationDispatcher:
+    """The dispatcher shared by all sessions of this process, started on first use"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher()
+            # Give queued notifications a chance to be written on shutdown
+            atexit.register(_dispatcher.flush, 5)
+    return _dispatcher
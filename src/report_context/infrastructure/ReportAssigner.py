@@ -0,0 +1,160 @@
+import heapq
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.register_context.domain.entities.admin import Admin
+from src.register_context.domain.entities.csoperator import CSOperator
+from src.report_context.domain.entities.report import Report
+from src.search_context.domain.entities.chargingstation import ChargingStation
+
+
+@dataclass(frozen=True)
+class AssigneeRole:
+    """Who a report is assigned to: the assignee table and the report column pointing to it"""
+    model: type
+    id_column: object
+    report_column: object
+
+    @property
+    def load_column(self):
+        return self.model.number_reports_assigned
+
+
+ADMINS = AssigneeRole(Admin, Admin.sys_admin_id, Report.admin_id)
+CSOPERATORS = AssigneeRole(CSOperator, CSOperator.cs_operator_id, Report.csoperator_id)
+
+
+class LeastLoadedPolicy:
+    """The assignee with the fewest reports, ties broken by ID
+
+    Reads the first row of the (number_reports_assigned, id) index. On
+    PostgreSQL rows locked by a concurrent assignment are skipped, so two
+    reports filed at once go to different assignees.
+    """
+
+    def choose(self, session: Session, role: AssigneeRole, report: Report) -> Optional[int]:
+        query = session.query(role.id_column).order_by(role.load_column, role.id_column).limit(1)
+        row = query.with_for_update(skip_locked=True).first() or query.first()
+        return row[0] if row else None
+
+    def choose_many(self, session: Session, role: AssigneeRole, reports: List[Report]) -> List[int]:
+        # One read of all loads, then a heap keeps the least loaded on top
+        heap = [(load, id) for id, load in session.query(role.id_column, role.load_column).with_for_update()]
+        if not heap:
+            return []
+        heapq.heapify(heap)
+        chosen = []
+        for _ in reports:
+            load, id = heapq.heappop(heap)
+            chosen.append(id)
+            heapq.heappush(heap, (load + 1, id))
+        return chosen
+
+
+class RoundRobinPolicy:
+    """The assignees in turn, by ID, regardless of their load
+
+    The position is kept in the policy, so share one instance between requests.
+    """
+
+    def __init__(self):
+        self.last_id = {}
+
+    def choose(self, session: Session, role: AssigneeRole, report: Report) -> Optional[int]:
+        last_id = self.last_id.get(role.model)
+        query = session.query(role.id_column).order_by(role.id_column)
+        row = (query.filter(role.id_column > last_id).first() if last_id is not None else None) or query.first()
+        if row is None:
+            return None
+        self.last_id[role.model] = row[0]
+        return row[0]
+
+    def choose_many(self, session: Session, role: AssigneeRole, reports: List[Report]) -> List[int]:
+        ids = [id for id, in session.query(role.id_column).order_by(role.id_column)]
+        if not ids:
+            return []
+        last_id = self.last_id.get(role.model)
+        start = next((i for i, id in enumerate(ids) if last_id is not None and id > last_id), 0)
+        chosen = [ids[(start + i) % len(ids)] for i in range(len(reports))]
+        if chosen:
+            self.last_id[role.model] = chosen[-1]
+        return chosen
+
+
+class DistrictAffinityPolicy:
+    """An assignee already handling open reports in the station's district
+
+    The least loaded of them is chosen as long as it has at most max_extra
+    reports more than the least loaded assignee overall, otherwise the
+    fallback policy decides.
+    """
+
+    def __init__(self, max_extra: int = 2, fallback=None):
+        self.max_extra = max_extra
+        self.fallback = fallback or LeastLoadedPolicy()
+
+    def choose(self, session: Session, role: AssigneeRole, report: Report) -> Optional[int]:
+        district = session.query(ChargingStation.district).filter(ChargingStation.station_id == report.station_id).scalar()
+        min_load = session.query(func.min(role.load_column)).scalar()
+        if district is not None and min_load is not None:
+            row = (session.query(role.id_column)
+                .join(Report, role.report_column == role.id_column)
+                .join(ChargingStation, ChargingStation.station_id == Report.station_id)
+                .filter(ChargingStation.district == district, Report.status != "resolved", role.load_column <= min_load + self.max_extra)
+                .order_by(role.load_column, role.id_column)
+                .first())
+            if row is not None:
+                return row[0]
+        return self.fallback.choose(session, role, report)
+
+
+class ReportAssigner:
+    """Assigns reports to admins or operators and keeps their report counters
+
+    The counters are changed with an UPDATE ... SET n = n + 1 and are not
+    committed, so they are written in the same transaction as the report.
+    """
+
+    def __init__(self, session: Session, role: AssigneeRole, policy=None):
+        self.session = session
+        self.role = role
+        self.policy = policy or LeastLoadedPolicy()
+
+    def assign(self, report: Report):
+        """Assign the report, the chosen assignee or None when there is none"""
+        assignee_id = self.policy.choose(self.session, self.role, report)
+        if assignee_id is None:
+            return None
+        self._add_load(assignee_id, 1)
+        return self.session.get(self.role.model, assignee_id)
+
+    def assign_many(self, reports: List[Report]) -> Dict[int, List[Report]]:
+        """Assign several reports, grouped by the chosen assignee ID, empty when there is no assignee
+
+        Policies with a choose_many method choose for all reports at once and
+        each assignee's counter is changed by one UPDATE.
+        """
+        groups = defaultdict(list)
+        if hasattr(self.policy, "choose_many"):
+            for assignee_id, report in zip(self.policy.choose_many(self.session, self.role, reports), reports):
+                groups[assignee_id].append(report)
+            for assignee_id, group in groups.items():
+                self._add_load(assignee_id, len(group))
+        else:
+            for report in reports:
+                assignee_id = self.policy.choose(self.session, self.role, report)
+                if assignee_id is None:
+                    return {}
+                self._add_load(assignee_id, 1)
+                groups[assignee_id].append(report)
+        return dict(groups)
+
+    def release(self, assignee_id: int, count: int = 1):
+        """count reports less for the assignee"""
+        self._add_load(assignee_id, -count)
+
+    def _add_load(self, assignee_id: int, count: int):
+        self.session.query(self.role.model).filter(self.role.id_column == assignee_id).update(
+            {self.role.load_column: self.role.load_column + count}, synchronize_session="fetch")
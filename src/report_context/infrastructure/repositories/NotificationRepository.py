@@ -1,21 +1,132 @@
+import heapq
+from collections import Counter
+from itertools import islice
+from sqlalchemy import and_, or_, func, select, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from database.database import SessionLocal  # Ensure SessionLocal is imported
-from typing import List
-from src.report_context.domain.entities.notification import Notification
+from database.database import SessionLocal, commit  # Ensure SessionLocal is imported
+from typing import Dict, List, Optional, Tuple
+from src.report_context.domain.entities.notification import Notification, NotificationInbox
 
 
-class NotificationRepository: 
+class NotificationRepository:
   def __init__(self, session: Session = None):
         """Initialize the repository with a SQLAlchemy session."""
         self.session = session or SessionLocal()
-        
+
   def create_notifications(self, users_id: List[int], content: str) -> bool:
       """Create a new notification in the database."""
+      self._add_received(Counter(users_id))
       self.session.bulk_save_objects([Notification(user_id=user_id, content=content) for user_id in users_id])
-      self.session.commit()
+      commit(self.session)
+      return True
+
+  def create_notification_batch(self, rows: List[Tuple[Optional[int], str]]) -> bool:
+      """Create (user_id, content) notifications in one transaction, user_id None for a broadcast."""
+      self._add_received(Counter(NotificationInbox.BROADCASTS if user_id is None else user_id for user_id, _ in rows))
+      self.session.bulk_save_objects([Notification(user_id=user_id, content=content) for user_id, content in rows])
+      commit(self.session)
+      return True
+
+  def create_broadcast_notification(self, content: str) -> bool:
+      """Create one notification for all users, resolved per user when it is read."""
+      self._add_received({NotificationInbox.BROADCASTS: 1})
+      self.session.add(Notification(user_id=None, content=content))
+      commit(self.session)
       return True
-      
+
+  def open_inbox(self, user_id: int) -> bool:
+      """Create the counters of a newly registered user, who receives only the broadcasts sent from now on."""
+      if self.session.get(NotificationInbox, user_id) is not None:
+          return False
+      last_broadcast = self.session.query(func.max(Notification.notification_id)).filter(Notification.user_id.is_(None)).scalar()
+      self.session.add(NotificationInbox(user_id=user_id, received=0, read=0,
+                                         broadcasts_read=self._counters(NotificationInbox.BROADCASTS).received,
+                                         broadcasts_after=last_broadcast or 0))
+      commit(self.session)
+      return True
+
   def find_notifications_by_user_id(self, user_id: int) -> List[Notification]:
-      """Find notifications by a user ID."""
-      notifications = self.session.query(Notification).filter_by(user_id=user_id).all()
-      return notifications
\ No newline at end of file
+      """Find the notifications of a user, including broadcasts."""
+      notifications = self.session.query(Notification).filter(or_(Notification.user_id == user_id, self._broadcasts_of(user_id))).all()
+      return notifications
+
+  def _broadcasts_of(self, user_id: int):
+      """Condition for the broadcasts a user receives, those sent after the user registered."""
+      inbox = self.session.get(NotificationInbox, user_id)
+      if inbox is None or not inbox.broadcasts_after:
+          return Notification.user_id.is_(None)
+      return and_(Notification.user_id.is_(None), Notification.notification_id > inbox.broadcasts_after)
+
+  def find_notifications_page(self, user_id: int, limit: int = 20, before: Optional[int] = None) -> List[Notification]:
+      """Find the newest notifications of a user, including broadcasts, older than the before notification.
+
+      before is the notification_id of the last notification of the previous page.
+      """
+      after_cursor = None
+      if before is not None:
+          # Compared to the stored row, so created_at is in the same representation on both sides
+          anchor = Notification.__table__.alias("anchor")
+          cursor = select(anchor.c.created_at, anchor.c.notification_id).where(anchor.c.notification_id == before).scalar_subquery()
+          after_cursor = tuple_(Notification.created_at, Notification.notification_id) < cursor
+
+      # The user's and the broadcast notifications are each read in index order and merged
+      pages = []
+      for owner in (Notification.user_id == user_id, self._broadcasts_of(user_id)):
+          query = self.session.query(Notification).filter(owner)
+          if after_cursor is not None:
+              query = query.filter(after_cursor)
+          pages.append(query.order_by(Notification.created_at.desc(), Notification.notification_id.desc()).limit(limit).all())
+      newest_first = heapq.merge(*pages, key=lambda n: (n.created_at, n.notification_id), reverse=True)
+      return list(islice(newest_first, limit))
+
+  def count_unread(self, user_id: int) -> int:
+      """Count the notifications a user has not read yet, including broadcasts."""
+      inbox = self._counters(user_id)
+      broadcasts = self._counters(NotificationInbox.BROADCASTS)
+      return (inbox.received - inbox.read) + (broadcasts.received - inbox.broadcasts_read)
+
+  def find_read_until(self, user_id: int) -> int:
+      """notification_id of the newest notification when the user last read them all, the newer ones are unread."""
+      return self._counters(user_id).read_until
+
+  def mark_all_read(self, user_id: int) -> bool:
+      """Mark all notifications of a user, including broadcasts, as read."""
+      read_until = self.session.query(func.max(Notification.notification_id)).filter(or_(Notification.user_id == user_id, self._broadcasts_of(user_id))).scalar()
+      inbox = self._inbox(user_id)
+      inbox.read = inbox.received
+      inbox.broadcasts_read = self._inbox(NotificationInbox.BROADCASTS).received
+      inbox.read_until = read_until or 0
+      commit(self.session)
+      return True
+
+  def _counters(self, user_id: int) -> NotificationInbox:
+      """Counters of a user for reading, all zero while the user has no inbox row (see _inbox)."""
+      inbox = self.session.get(NotificationInbox, user_id)
+      if inbox is None:
+          # Not added to the session, reads never write
+          inbox = NotificationInbox(user_id=user_id, received=0, read=0, broadcasts_read=0, broadcasts_after=0, read_until=0)
+      return inbox
+
+  def _inbox(self, user_id: int) -> NotificationInbox:
+      """Counters of a user for writing, created from the existing notifications on the first write."""
+      inbox = self.session.get(NotificationInbox, user_id)
+      if inbox is None:
+          owner = Notification.user_id.is_(None) if user_id == NotificationInbox.BROADCASTS else Notification.user_id == user_id
+          received = self.session.query(func.count(Notification.notification_id)).filter(owner).scalar()
+          inbox = NotificationInbox(user_id=user_id, received=received, read=0, broadcasts_read=0)
+          try:
+              with self.session.begin_nested():
+                  self.session.add(inbox)
+          except IntegrityError:
+              # Created by a concurrent writer in the meantime
+              inbox = self.session.get(NotificationInbox, user_id)
+      return inbox
+
+  def _add_received(self, counts: Dict[int, int]):
+      """Count new notifications per user (key NotificationInbox.BROADCASTS for broadcasts)."""
+      for user_id, count in counts.items():
+          inbox = self._inbox(user_id)
+          # Incremented in SQL, so concurrent writers do not overwrite each other
+          inbox.received = NotificationInbox.received + count
+      self.session.flush()
@@ -1,8 +1,20 @@
-from sqlalchemy.orm import Session
-from database.database import SessionLocal  # Ensure SessionLocal is imported
+from sqlalchemy import case, select, tuple_
+from sqlalchemy.orm import Session, joinedload, contains_eager
+from database.database import SessionLocal, commit  # Ensure SessionLocal is imported
 
 from src.report_context.domain.entities.report import Report
-from typing import List
+from src.report_context.domain.value_objects.report_filter import ReportFilter
+from src.search_context.domain.entities.chargingstation import ChargingStation
+from typing import List, Optional
+
+# Sort expressions by key of a report table (or an alias of it), severity and
+# status in their natural order rather than alphabetically
+SORT_EXPRESSIONS = {
+    "created_at": lambda table: table.c.created_at,
+    "updated_at": lambda table: table.c.updated_at,
+    "severity": lambda table: case({"low": 0, "medium": 1, "high": 2}, value=table.c.severity),
+    "status": lambda table: case({"pending": 0, "managed": 1, "resolved": 2}, value=table.c.status),
+}
 
 class ReportRepository: 
   def __init__(self, session: Session = None):
@@ -12,7 +24,7 @@ class ReportRepository:
   def create_report(self, report: Report) -> bool:
       """Create a new report in the database."""
       self.session.add(report)
-      self.session.commit()
+      commit(self.session)
       return True
       
   def find_reports_by_station_id(self, station_id: int) -> List[Report]:
@@ -20,25 +32,85 @@ class ReportRepository:
       reports = self.session.query(Report).filter_by(station_id=station_id).all()
       return reports
 
+  def _listing_query(self):
+      """Reports with the station and operator the dashboards show, loaded in the same SELECT."""
+      return self.session.query(Report).options(joinedload(Report.chargingstation), joinedload(Report.csoperator))
+
+  def find_open_report_by_station_id(self, station_id: int) -> Optional[Report]:
+      """Find the report of a station that is not resolved yet, if any."""
+      # Served by the partial unique index uq_report_open_station, whatever the station's history
+      return self.session.query(Report).filter(Report.station_id == station_id, Report.status != "resolved").first()
+
   def find_reports_by_admin_id(self, admin_id: int) -> List[Report]:
-      """Find reports by an admin ID."""
-      reports = self.session.query(Report).filter_by(admin_id=admin_id).all()
+      """Find reports by an admin ID, with their station and operator."""
+      reports = self._listing_query().filter_by(admin_id=admin_id).all()
       return reports
 
   def find_reports_by_csoperator_id(self, csoperator_id: int) -> List[Report]:
-      """Find reports by a CS operator ID."""
-      reports = self.session.query(Report).filter_by(csoperator_id=csoperator_id).all()
+      """Find reports by a CS operator ID, with their station and operator."""
+      reports = self._listing_query().filter_by(csoperator_id=csoperator_id).all()
       return reports
 
+  def find_reports_page(self, report_filter: ReportFilter, limit: int = 50, after: Optional[int] = None) -> List[Report]:
+      """Find the reports matching the filter in its sort order, after the report with the ID after.
+
+      Filtering, sorting and paging run in SQL, the station and operator are loaded in the same query.
+      """
+      table = Report.__table__
+      sort_key = SORT_EXPRESSIONS[report_filter.sort_by]
+      query = (self.session.query(Report)
+          .outerjoin(Report.chargingstation)
+          .options(contains_eager(Report.chargingstation), joinedload(Report.csoperator)))
+
+      if report_filter.admin_id is not None:
+          query = query.filter(Report.admin_id == report_filter.admin_id)
+      if report_filter.csoperator_id is not None:
+          query = query.filter(Report.csoperator_id == report_filter.csoperator_id)
+      if report_filter.statuses is not None:
+          query = query.filter(Report.status.in_(report_filter.statuses))
+      if report_filter.severities is not None:
+          query = query.filter(Report.severity.in_(report_filter.severities))
+      if report_filter.types is not None:
+          query = query.filter(Report.type.in_(report_filter.types))
+      if report_filter.districts is not None:
+          query = query.filter(ChargingStation.district.in_(report_filter.districts))
+      if report_filter.created_from is not None:
+          query = query.filter(Report.created_at >= report_filter.created_from)
+      if report_filter.created_to is not None:
+          query = query.filter(Report.created_at < report_filter.created_to)
+
+      position = tuple_(sort_key(table), table.c.report_id)
+      if after is not None:
+          # Compared to the stored row, like the notification pages
+          anchor = table.alias("anchor")
+          cursor = select(sort_key(anchor), anchor.c.report_id).where(anchor.c.report_id == after).scalar_subquery()
+          query = query.filter(position < cursor if report_filter.descending else position > cursor)
+
+      order = [sort_key(table), table.c.report_id]
+      query = query.order_by(*[column.desc() if report_filter.descending else column.asc() for column in order])
+      return query.limit(limit).all()
+
   def update_report(self, report: Report) -> Report:
       """Update a report in the database."""
       updated_report = self.session.merge(report)
-      self.session.commit()
+      commit(self.session)
       return updated_report
 
+  def update_reports(self, report_ids: List[int], values: dict, from_status: Optional[str] = None) -> int:
+      """Update several reports with one UPDATE, if from_status is given only those still in it.
+
+      Returns the number of updated reports.
+      """
+      query = self.session.query(Report).filter(Report.report_id.in_(report_ids))
+      if from_status is not None:
+          query = query.filter(Report.status == from_status)
+      count = query.update(values, synchronize_session="fetch")
+      commit(self.session)
+      return count
+
   def delete_report(self, report_id: int) -> bool:
       """Delete a report from the database."""
       report = self.session.query(Report).filter_by(report_id=report_id).first()
       self.session.delete(report)
-      self.session.commit()   
+      commit(self.session)   
       return True  
\ No newline at end of file
@@ -6,13 +6,15 @@ from src.search_context.domain.events.PostalCodeNotFoundEvent import PostalCodeN
 from src.search_context.domain.events.PostalCodeFoundEvent import PostalCodeFoundEvent
 from src.search_context.domain.events.StationFoundEvent import StationFoundEvent
 from src.search_context.domain.value_objects.postal_code import PostalCode
-from typing import List, Union
+from typing import Iterable, List, Optional, Union
 from src.search_context.domain.events.StationUpdateEvent import StationUpdateEvent
+from src.search_context.application.services.PostalCodeSearchCache import PostalCodeSearchCache, get_postal_code_cache
 
 class ChargingStationService:
-    def __init__(self, station_repository: ChargingStationRepository):
-        """Initialize with the repository."""
+    def __init__(self, station_repository: ChargingStationRepository, cache: Optional[PostalCodeSearchCache] = None):
+        """Initialize with the repository and the postal code cache, by default the one of the repository's database."""
         self.chargingstation_repository = station_repository
+        self.cache = cache or get_postal_code_cache(station_repository.session.get_bind())
 
     def verify_postal_code(self,postcode:str):
         try:
@@ -22,11 +24,18 @@ class ChargingStationService:
         except ValueError as e:
             return PostalCodeNotFoundEvent(PostalCode(postcode),str(e))
 
-    def find_stations_by_postal_code(self, postal_code: str) -> Union[List[ChargingStationAggregate], StationNotFoundEvent]:
-        """Retrieve a list of ChargingStation aggregates by postal code."""
+    def find_stations_by_postal_code(self, postal_code: str) -> Union[StationFoundEvent, StationNotFoundEvent]:
+        """Retrieve the available charging stations of a postal code as StationView rows."""
         
-        # Retrieve charging stations from the repository
-        charging_stations = self.chargingstation_repository.find_by_postal_code(postal_code)
+        # Retrieve charging stations from the cache, on a miss from the repository.
+        # The station version tells cached results apart from changes of other processes.
+        version = self.chargingstation_repository.data_version()
+        charging_stations = self.cache.get(postal_code, version)
+        if charging_stations is None:
+            token = self.cache.token(postal_code)
+            charging_stations = self.chargingstation_repository.find_by_postal_code(postal_code)
+            self.cache.put(postal_code, charging_stations, token, version)
+        charging_stations = list(charging_stations)
         
         if not charging_stations:
             # If no stations are found, return a StationNotFoundEvent
@@ -49,7 +58,35 @@ class ChargingStationService:
             )
             return event
 
-        # Return the found ChargingStation aggregates
+        # Return the found stations
+        return StationFoundEvent(charging_stations)
+
+    def find_all_stations(self, statuses: Optional[Iterable[str]] = ("available",)) -> Union[StationFoundEvent, StationNotFoundEvent]:
+        """Retrieve all charging stations in Berlin with one of the statuses as StationView rows."""
+        charging_stations = self.chargingstation_repository.find_all(statuses)
+        return self._found_or_not_found(charging_stations, None, None)
+
+    def find_nearest_stations(self, latitude: float, longitude: float, k: int = 5,
+                              power_categories: Optional[Iterable[str]] = None,
+                              statuses: Optional[Iterable[str]] = ("available",)) -> Union[StationFoundEvent, StationNotFoundEvent]:
+        """Retrieve the k charging stations closest to a location, nearest first."""
+        charging_stations = self.chargingstation_repository.find_nearest(latitude, longitude, k, power_categories, statuses)
+        return self._found_or_not_found(charging_stations, latitude, longitude)
+
+    def find_stations_within_radius(self, latitude: float, longitude: float, radius_m: float,
+                                    power_categories: Optional[Iterable[str]] = None,
+                                    statuses: Optional[Iterable[str]] = ("available",)) -> Union[StationFoundEvent, StationNotFoundEvent]:
+        """Retrieve all charging stations within radius_m metres of a location, nearest first."""
+        charging_stations = self.chargingstation_repository.find_within_radius(latitude, longitude, radius_m, power_categories, statuses)
+        return self._found_or_not_found(charging_stations, latitude, longitude)
+
+    def _found_or_not_found(self, charging_stations, latitude, longitude):
+        if not charging_stations:
+            return StationNotFoundEvent(
+                ChargingStation(station_id=None, postal_code=None, latitude=latitude, longitude=longitude,
+                                location=None, street=None, district=None, federal_state=None, operator=None,
+                                power_charging_dev=None, commission_date=None, type_charging_device=None, cs_status=None)
+            )
         return StationFoundEvent(charging_stations)
 
     def is_table_empty(self) -> bool:
@@ -0,0 +1,111 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Hashable, Optional
+from src.search_context.infrastructure.repositories.ChargingStationRepository import add_status_listener
+
+
+class PostalCodeSearchCache:
+    """Bounded LRU cache of postal code search results with a time to live
+
+    Entries older than ttl seconds are searched again, beyond maxsize the
+    least recently used postal code is evicted. invalidate drops the entries
+    of postal codes whose stations changed status. A search that was running
+    while its postal code was invalidated is not stored (see token).
+
+    invalidate only sees the changes of this process. Results are therefore
+    stored with the station version they were searched at (see
+    ChargingStationRepository.data_version) and only returned for the same
+    version, so changes of other processes are searched again as well.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # postal code -> (expires at, station version, result)
+        self._versions = dict()        # postal code -> number of invalidations
+        self._epoch = 0                # number of clears
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, postal_code: Hashable, version: Optional[int] = None):
+        """The cached result of a postal code at a station version, None on a miss"""
+        with self._lock:
+            entry = self._entries.get(postal_code)
+            if entry is None or entry[0] < time.monotonic() or entry[1] != version:
+                if entry is not None:
+                    del self._entries[postal_code]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(postal_code)
+            self._hits += 1
+            return entry[2]
+
+    def token(self, postal_code: Hashable):
+        """Taken before searching, put stores the result only if it is still the same"""
+        with self._lock:
+            return self._epoch, self._versions.get(postal_code, 0)
+
+    def put(self, postal_code: Hashable, result, token=None, version: Optional[int] = None):
+        with self._lock:
+            if token is not None and token != (self._epoch, self._versions.get(postal_code, 0)):
+                return
+            self._entries[postal_code] = (time.monotonic() + self.ttl, version, result)
+            self._entries.move_to_end(postal_code)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, postal_codes: Optional[set] = None):
+        """Drops the entries of the postal codes, all entries for None"""
+        with self._lock:
+            if postal_codes is None:
+                self._invalidations += len(self._entries)
+                self._entries.clear()
+                self._versions.clear()
+                self._epoch += 1
+                return
+            for postal_code in postal_codes:
+                self._versions[postal_code] = self._versions.get(postal_code, 0) + 1
+                if self._entries.pop(postal_code, None) is not None:
+                    self._invalidations += 1
+
+    def metrics(self) -> dict:
+        """Size and counters of the cache"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+# One cache per database engine, shared by the services of all sessions
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def get_postal_code_cache(engine) -> PostalCodeSearchCache:
+    """The postal code cache of an engine, created on first use"""
+    with _caches_lock:
+        cache = _caches.get(engine)
+        if cache is None:
+            cache = _caches[engine] = PostalCodeSearchCache()
+        return cache
+
+
+def _invalidate(engine, postal_codes):
+    with _caches_lock:
+        caches = list(_caches.values()) if engine is None else [_caches.get(engine)]
+    for cache in caches:
+        if cache is not None:
+            cache.invalidate(postal_codes)
+
+
+add_status_listener(_invalidate)
@@ -3,8 +3,9 @@ from src.search_context.domain.entities.chargingstation import ChargingStation
 from src.search_context.domain.events.StationFoundEvent import StationFoundEvent
 
 class ChargingStationAggregate:
-    def __init__(self, charging_station: ChargingStation):
+    def __init__(self, charging_station: ChargingStation, distance: float = None):
         self.charging_station = charging_station
+        self.distance = distance  # metres from the search point, for location based searches
         self.events = []
 
     def change_station_status(self, new_status: str):
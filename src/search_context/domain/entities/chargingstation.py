@@ -1,12 +1,17 @@
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, func
 from sqlalchemy.ext.declarative import declarative_base
 from database.database import Base  # Adjust import path as needed
 from sqlalchemy.orm import relationship
 
+# Station ids are 63 bit hashes (see database.import_database.station_keys). SQLite
+# keeps INTEGER so the id stays the rowid, other databases need a BIGINT.
+StationId = BigInteger().with_variant(Integer, "sqlite")
+
+
 class ChargingStation(Base):
     __tablename__ = "chargingstation"
 
-    station_id = Column(Integer, primary_key=True, index=True) 
+    station_id = Column(StationId, primary_key=True, index=True, autoincrement=False)
     postal_code = Column(String, index=True)
     latitude = Column(Float)  
     longitude = Column(Float)  
@@ -21,3 +26,30 @@ class ChargingStation(Base):
     cs_status = Column(String)
     
     reports = relationship("Report", back_populates="chargingstation")
+
+
+class RegisterImport(Base):
+    """One row per Ladesaeulenregister imported into the chargingstation table
+
+    signature tells the register files apart (size and mtime), key_version is
+    the version of station_keys the station ids of the import were derived with.
+    """
+    __tablename__ = "register_import"
+
+    import_id = Column(Integer, primary_key=True, autoincrement=True)
+    signature = Column(String)
+    key_version = Column(Integer, nullable=False)
+    imported_at = Column(DateTime, default=func.now(), nullable=False)
+
+
+class StationVersion(Base):
+    """Single row counting the changes of the chargingstation table
+
+    Status changes and imports bump it in their own transaction, so every
+    server process can tell whether its in-memory copies of the table are
+    current, also after writes of other processes.
+    """
+    __tablename__ = "station_version"
+
+    version_id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,12 +1,13 @@
-from typing import List
+from typing import List, Union
 from datetime import datetime
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from src.search_context.domain.aggregates.chargingstation_aggregate import ChargingStationAggregate
+    from src.search_context.domain.value_objects.station_view import StationView
 
 class StationFoundEvent:
-    def __init__(self, stations: List["ChargingStationAggregate"], success: bool = True):
+    def __init__(self, stations: List[Union["ChargingStationAggregate", "StationView"]], success: bool = True):
         self.stations = stations
         self.timestamp = datetime.utcnow()
         self.success = success  
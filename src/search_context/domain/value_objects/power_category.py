@@ -0,0 +1,33 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Optional
+
+# Upper power limits in kW of each category, the last one is open ended
+CATEGORY_LIMITS = [('Low Power', 50), ('Medium Power', 150), ('High Power', 500), ('Ultra High Power', None)]
+CATEGORIES = [name for name, _ in CATEGORY_LIMITS]
+
+
+def power_category_codes(powers, limits=CATEGORY_LIMITS) -> np.ndarray:
+    """Index into the categories of limits of every rated power in kW at once, -1 where it is missing
+
+    A power belongs to the first category whose upper limit it does not exceed.
+    """
+    powers = np.asarray(powers, dtype=float)
+    codes = np.digitize(powers, [limit for _, limit in limits if limit is not None], right=True)
+    codes[np.isnan(powers)] = -1
+    return codes
+
+
+@dataclass(frozen=True)
+class PowerCategory:
+    value: str
+
+    def __post_init__(self):
+        if self.value not in CATEGORIES:
+            raise ValueError(f"Invalid power category: {self.value}, expected one of {CATEGORIES}")
+
+    @classmethod
+    def from_power(cls, power: Optional[float]) -> Optional["PowerCategory"]:
+        """Category of a charging device by its rated power in kW, None when the power is unknown"""
+        code = int(power_category_codes([power])[0])
+        return None if code < 0 else cls(CATEGORIES[code])
@@ -0,0 +1,26 @@
+from datetime import date
+from typing import NamedTuple, Optional
+
+
+class StationView(NamedTuple):
+    """Read only projection of a charging station row for rendering search results
+
+    A plain tuple without ORM instrumentation or an event list, built from the
+    chargingstation columns of the same names with StationView._make(row).
+    """
+    station_id: int
+    postal_code: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    location: Optional[str]
+    street: Optional[str]
+    district: Optional[str]
+    federal_state: Optional[str]
+    operator: Optional[str]
+    power_charging_dev: Optional[float]
+    commission_date: Optional[date]
+    type_charging_device: Optional[str]
+    cs_status: Optional[str]
+
+    def as_dict(self):
+        return self._asdict()
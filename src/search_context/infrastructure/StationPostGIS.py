@@ -0,0 +1,29 @@
+from sqlalchemy import text
+
+# Geo index of the chargingstation table on PostgreSQL. With PostGIS the
+# station points get a GiST expression index, which bounding-box queries use
+# through the && operator. Without PostGIS a plain (latitude, longitude)
+# b-tree narrows the latitude range at least.
+
+STATION_POINT = "ST_SetSRID(ST_MakePoint({table}longitude, {table}latitude), 4326)"
+
+POSTGIS_INDEX_DDL = f"""
+    CREATE INDEX IF NOT EXISTS chargingstation_point_idx ON chargingstation
+    USING GIST (({STATION_POINT.format(table='')}))
+"""
+
+LAT_LON_INDEX_DDL = """
+    CREATE INDEX IF NOT EXISTS chargingstation_lat_lon_idx ON chargingstation (latitude, longitude)
+"""
+
+
+def has_postgis(connection):
+    return connection.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")).first() is not None
+
+
+def create_station_postgis_index(connection):
+    connection.execute(text(POSTGIS_INDEX_DDL))
+
+
+def create_station_lat_lon_index(connection):
+    connection.execute(text(LAT_LON_INDEX_DDL))
@@ -0,0 +1,57 @@
+from sqlalchemy import event, text
+from src.search_context.domain.entities.chargingstation import ChargingStation
+
+# SQLite R*Tree companion of the chargingstation table. Every located station
+# is stored as a point box (latitude, longitude) under its station_id. The
+# triggers keep it in step with inserts, moves and deletes, whatever code path
+# writes the table (bulk import, delta import, ORM). Status and power stay in
+# chargingstation and are filtered through a join.
+
+RTREE_TABLE = "chargingstation_rtree"
+
+RTREE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE}
+        USING rtree(station_id, min_lat, max_lat, min_lon, max_lon)""",
+    f"""CREATE TRIGGER IF NOT EXISTS chargingstation_rtree_insert AFTER INSERT ON chargingstation
+        WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+        BEGIN
+            INSERT OR REPLACE INTO {RTREE_TABLE} VALUES (NEW.station_id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS chargingstation_rtree_update AFTER UPDATE OF station_id, latitude, longitude ON chargingstation
+        BEGIN
+            DELETE FROM {RTREE_TABLE} WHERE station_id = OLD.station_id;
+            INSERT OR REPLACE INTO {RTREE_TABLE}
+                SELECT NEW.station_id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+                WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS chargingstation_rtree_delete AFTER DELETE ON chargingstation
+        BEGIN
+            DELETE FROM {RTREE_TABLE} WHERE station_id = OLD.station_id;
+        END""",
+]
+
+RTREE_BACKFILL = f"""
+    INSERT INTO {RTREE_TABLE}
+    SELECT station_id, latitude, latitude, longitude, longitude FROM chargingstation
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+      AND station_id NOT IN (SELECT station_id FROM {RTREE_TABLE})
+"""
+
+
+def create_station_rtree(connection):
+    """Creates the R*Tree and its triggers if missing and indexes stations written before they existed"""
+    for statement in RTREE_DDL:
+        connection.execute(text(statement))
+    connection.execute(text(RTREE_BACKFILL))
+
+
+@event.listens_for(ChargingStation.__table__, "after_create")
+def _create_rtree_with_table(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        create_station_rtree(connection)
+
+
+@event.listens_for(ChargingStation.__table__, "after_drop")
+def _drop_rtree_with_table(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {RTREE_TABLE}"))
@@ -0,0 +1,101 @@
+import numpy as np
+from typing import Iterable, List, Optional
+from src.search_context.domain.value_objects.power_category import CATEGORIES, power_category_codes
+from src.search_context.domain.value_objects.station_view import StationView
+
+# Columns with few distinct values, stored as integer codes into a list of the values
+ENCODED_COLUMNS = ("postal_code", "district", "federal_state", "operator", "type_charging_device", "cs_status")
+# Columns kept as they are, mostly distinct per station
+PLAIN_COLUMNS = ("location", "street", "commission_date")
+
+
+class StationSnapshot:
+    """Columnar in-memory copy of the charging station table
+
+    Built once from rows in StationView field order. Coordinates and powers
+    are float arrays (NaN for NULL), the power category is precomputed and
+    the text columns with few distinct values are dictionary encoded, so
+    the filters are integer comparisons over arrays. Statuses are one byte
+    codes changed in place by set_status. version is the StationVersion the
+    rows were read at.
+    """
+
+    def __init__(self, rows, version: int = 0):
+        self.version = version
+        columns = dict(zip(StationView._fields, zip(*rows) if rows else [()] * len(StationView._fields)))
+
+        self.station_ids = np.asarray(columns["station_id"], dtype=np.int64)
+        self.latitudes = np.asarray(columns["latitude"], dtype=float)
+        self.longitudes = np.asarray(columns["longitude"], dtype=float)
+        self.powers = np.asarray(columns["power_charging_dev"], dtype=float)
+        self.categories = power_category_codes(self.powers).astype(np.int8)
+
+        self.codes, self.values, self._lookup = {}, {}, {}
+        for name in ENCODED_COLUMNS:
+            self._lookup[name], self.values[name] = {}, []
+            dtype = np.int8 if name == "cs_status" else np.int32
+            self.codes[name] = np.array([self._code(name, value) for value in columns[name]], dtype=dtype)
+        self.plain = {name: np.array(columns[name], dtype=object) for name in PLAIN_COLUMNS}
+
+        self._positions = {station_id: i for i, station_id in enumerate(self.station_ids.tolist())}
+
+    def __len__(self):
+        return len(self.station_ids)
+
+    def _code(self, name, value):
+        code = self._lookup[name].get(value)
+        if code is None:
+            code = self._lookup[name][value] = len(self.values[name])
+            self.values[name].append(value)
+        return code
+
+    def column(self, name) -> np.ndarray:
+        """The decoded values of a dictionary encoded column"""
+        return np.array(self.values[name], dtype=object)[self.codes[name]]
+
+    @staticmethod
+    def _isin(codes, wanted, size):
+        if len(wanted) == 1:
+            return codes == wanted[0]
+        # Lookup table indexed by the codes, a code of -1 hits the last entry, which stays False
+        table = np.zeros(size + 1, dtype=bool)
+        table[wanted] = True
+        return table[codes]
+
+    def mask(self, postal_codes: Optional[Iterable[str]] = None,
+             power_categories: Optional[Iterable[str]] = None,
+             statuses: Optional[Iterable[str]] = None,
+             operators: Optional[Iterable[str]] = None,
+             districts: Optional[Iterable[str]] = None,
+             federal_states: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Boolean mask of the stations matching all given filters, None leaves a column unfiltered"""
+        mask = np.ones(len(self), dtype=bool)
+        for name, values in (("postal_code", postal_codes), ("cs_status", statuses), ("operator", operators),
+                             ("district", districts), ("federal_state", federal_states)):
+            if values is not None:
+                lookup = self._lookup[name]
+                mask &= self._isin(self.codes[name], [lookup[value] for value in set(values) if value in lookup], len(lookup))
+        if power_categories is not None:
+            wanted = [CATEGORIES.index(c) for c in {getattr(c, 'value', c) for c in power_categories}]
+            mask &= self._isin(self.categories, wanted, len(CATEGORIES))
+        return mask
+
+    def find(self, **filters) -> List[StationView]:
+        """The stations matching the filters of mask, in station ID order"""
+        return self.views(np.flatnonzero(self.mask(**filters)))
+
+    def views(self, positions) -> List[StationView]:
+        """StationView rows of the stations at the positions"""
+        columns = {name: [values[code] for code in self.codes[name][positions].tolist()]
+                   for name, values in self.values.items()}
+        columns.update((name, column[positions].tolist()) for name, column in self.plain.items())
+        for name, array in (("latitude", self.latitudes), ("longitude", self.longitudes), ("power_charging_dev", self.powers)):
+            columns[name] = [None if value != value else value for value in array[positions].tolist()]
+        columns["station_id"] = self.station_ids[positions].tolist()
+        return list(map(StationView._make, zip(*(columns[name] for name in StationView._fields))))
+
+    def set_status(self, station_ids: Iterable[int], status: str):
+        """Keeps the status column in step with committed station updates"""
+        positions = [self._positions[id] for id in station_ids if id in self._positions]
+        if positions:
+            self.codes["cs_status"][positions] = self._code("cs_status", status)
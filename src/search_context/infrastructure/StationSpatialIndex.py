@@ -0,0 +1,112 @@
+import math
+import numpy as np
+from scipy.spatial import cKDTree
+from typing import Iterable, List, Optional, Tuple
+from src.search_context.domain.value_objects.power_category import CATEGORIES, power_category_codes
+
+EARTH_RADIUS_M = 6371008.8
+
+
+class StationSpatialIndex:
+    """In-memory k-d tree over the charging station coordinates
+
+    Coordinates are projected onto a plane tangent at the mean latitude of the
+    stations (equirectangular), which is accurate to well below a metre per
+    kilometre within a city like Berlin. Queries return (station_id, distance
+    in metres) pairs ordered by distance.
+    """
+
+    def __init__(self, station_ids, latitudes, longitudes, powers, statuses):
+        latitudes = np.asarray(latitudes, dtype=float)
+        longitudes = np.asarray(longitudes, dtype=float)
+        located = ~(np.isnan(latitudes) | np.isnan(longitudes))
+
+        self.station_ids = np.asarray(station_ids, dtype=np.int64)[located]
+        # Statuses are kept as small integer codes, which makes filtering a cheap integer comparison
+        self._status_codes = dict()
+        self.statuses = np.array([self._status_code(status) for status in np.asarray(statuses, dtype=object)[located]], dtype=np.int32)
+        self._masks = dict()
+        self.categories = power_category_codes(np.asarray(powers, dtype=float)[located])
+        self._positions = {station_id: i for i, station_id in enumerate(self.station_ids.tolist())}
+
+        self.ref_latitude = float(latitudes[located].mean()) if located.any() else 0.0
+        self._cos_ref = math.cos(math.radians(self.ref_latitude))
+        self.tree = cKDTree(self._project(latitudes[located], longitudes[located]))
+
+    def __len__(self):
+        return len(self.station_ids)
+
+    def _status_code(self, status):
+        return self._status_codes.setdefault(status, len(self._status_codes))
+
+    def _project(self, latitudes, longitudes):
+        x = EARTH_RADIUS_M * np.radians(longitudes) * self._cos_ref
+        y = EARTH_RADIUS_M * np.radians(latitudes)
+        return np.column_stack([x, y])
+
+    def _mask(self, power_categories, statuses):
+        """Boolean mask of the stations matching the filters, None when nothing is filtered"""
+        if power_categories is None and statuses is None:
+            return None
+        key = (None if power_categories is None else frozenset(getattr(c, 'value', c) for c in power_categories),
+               None if statuses is None else frozenset(statuses))
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.ones(len(self), dtype=bool)
+            if key[0] is not None:
+                mask &= np.isin(self.categories, [CATEGORIES.index(c) for c in key[0]])
+            if key[1] is not None:
+                mask &= np.isin(self.statuses, [self._status_codes[s] for s in key[1] if s in self._status_codes])
+            # Searches repeat the same few filters, masks are kept until a status changes
+            self._masks[key] = mask
+        return mask
+
+    def set_status(self, station_id: int, status: str):
+        """Keeps the status filter in step with a station update"""
+        position = self._positions.get(station_id)
+        if position is not None:
+            self.statuses[position] = self._status_code(status)
+            self._masks = dict()
+
+    def nearest(self, latitude: float, longitude: float, k: int = 5,
+                power_categories: Optional[Iterable[str]] = None,
+                statuses: Optional[Iterable[str]] = None) -> List[Tuple[int, float]]:
+        """The k stations closest to a point that match the filters"""
+        mask = self._mask(power_categories, statuses)
+        n = len(self) if mask is None else int(mask.sum())
+        k = min(k, n)
+        if k <= 0:
+            return []
+
+        point = self._project(np.array([latitude]), np.array([longitude]))[0]
+        # Ask the tree for more neighbours until enough of them pass the filters,
+        # starting from the share of stations that match them
+        fetch = k if mask is None else min(len(self), 2 * k * len(self) // n)
+        while True:
+            distances, positions = self.tree.query(point, k=fetch)
+            distances, positions = np.atleast_1d(distances), np.atleast_1d(positions)
+            if mask is not None:
+                keep = mask[positions]
+                distances, positions = distances[keep], positions[keep]
+            if len(positions) >= k or fetch == len(self):
+                break
+            fetch = min(len(self), fetch * 4)
+
+        return list(zip(self.station_ids[positions[:k]].tolist(), distances[:k].tolist()))
+
+    def within_radius(self, latitude: float, longitude: float, radius_m: float,
+                      power_categories: Optional[Iterable[str]] = None,
+                      statuses: Optional[Iterable[str]] = None) -> List[Tuple[int, float]]:
+        """All stations within radius_m metres of a point that match the filters"""
+        if len(self) == 0:
+            return []
+        point = self._project(np.array([latitude]), np.array([longitude]))[0]
+        positions = np.asarray(self.tree.query_ball_point(point, r=radius_m), dtype=np.intp)
+
+        mask = self._mask(power_categories, statuses)
+        if mask is not None:
+            positions = positions[mask[positions]]
+
+        distances = np.hypot(*(self.tree.data[positions] - point).T)
+        order = np.argsort(distances, kind='stable')
+        return list(zip(self.station_ids[positions[order]].tolist(), distances[order].tolist()))
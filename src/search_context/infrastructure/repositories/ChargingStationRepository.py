@@ -1,48 +1,245 @@
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import create_engine, inspect, text, bindparam, select, update, insert
 from sqlalchemy.orm import sessionmaker, Session
-from typing import List
-from src.search_context.domain.entities.chargingstation import ChargingStation
+import math
+import threading
+import weakref
+from typing import Iterable, List, Optional
+from src.search_context.domain.entities.chargingstation import ChargingStation, StationVersion
 from src.search_context.domain.aggregates.chargingstation_aggregate import ChargingStationAggregate  
-from database.database import SessionLocal  # Ensure SessionLocal is imported
+from src.search_context.domain.value_objects.power_category import CATEGORY_LIMITS
+from src.search_context.domain.value_objects.station_view import StationView
+from src.search_context.infrastructure.StationSpatialIndex import StationSpatialIndex, EARTH_RADIUS_M
+from src.search_context.infrastructure.StationSnapshot import StationSnapshot
+from src.search_context.infrastructure.StationRTree import RTREE_TABLE, create_station_rtree
+from src.search_context.infrastructure.StationPostGIS import STATION_POINT, has_postgis, create_station_postgis_index, create_station_lat_lon_index
+from database.database import SessionLocal, commit, after_commit  # Ensure SessionLocal is imported
+
+# One snapshot and spatial index per database engine, shared by all repositories of the process.
+# The snapshot remembers the StationVersion it was loaded at, the index the snapshot it was built from.
+_snapshots = weakref.WeakKeyDictionary()
+_spatial_indexes = weakref.WeakKeyDictionary()  # engine -> (snapshot, index)
+_spatial_index_lock = threading.Lock()
+# Geo index used by each database engine: "rtree" (SQLite), "postgis" or "btree"
+_geo_backends = weakref.WeakKeyDictionary()
+
+# FROM clause and index prefilter of the bounding-box queries per geo index.
+# The R*Tree stores 32 bit floats rounded outwards, so it preselects by overlap
+# and the exact bounds are always checked on the table's own coordinates.
+GEO_PREFILTERS = {
+    "rtree": (f"{RTREE_TABLE} r JOIN chargingstation cs ON cs.station_id = r.station_id",
+              "r.max_lat >= :min_lat AND r.min_lat <= :max_lat AND r.max_lon >= :min_lon AND r.min_lon <= :max_lon AND "),
+    "postgis": ("chargingstation cs",
+                STATION_POINT.format(table="cs.") + " && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326) AND "),
+    "btree": ("chargingstation cs", ""),
+}
+
+
+# listener(engine, postal_codes) is called once station status changes are
+# committed, with the postal codes of the changed stations. After an import
+# both are None: any station of any database may have changed.
+_status_listeners = []
+
+
+def add_status_listener(listener):
+    """Registers a listener for committed station status changes, e.g. to invalidate caches."""
+    _status_listeners.append(listener)
+
+
+def bump_station_version(connection) -> int:
+    """Counts a change of the station table in the caller's transaction and returns the new version."""
+    table = StationVersion.__table__
+    if connection.execute(update(table).where(table.c.version_id == 1).values(version=table.c.version + 1)).rowcount == 0:
+        connection.execute(insert(table).values(version_id=1, version=1))
+    return connection.execute(select(table.c.version).where(table.c.version_id == 1)).scalar_one()
+
+
+def reset_spatial_index():
+    """Drops the snapshots and spatial indexes, they are rebuilt from the table on the next search.
+
+    The status listeners are told that every station may have changed.
+    """
+    with _spatial_index_lock:
+        _snapshots.clear()
+        _spatial_indexes.clear()
+    for listener in _status_listeners:
+        listener(None, None)
+
 
 class ChargingStationRepository:
     def __init__(self, session: Session = None):
         """Initialize the repository with a SQLAlchemy session."""
         self.session = session or SessionLocal()
 
-    def find_by_postal_code(self, postal_code: str) -> List[ChargingStationAggregate]:
-        """Find charging stations by postal code and return ChargingStationAggregate objects."""
-        
-        query = text("""
-            SELECT * FROM chargingstation 
-            WHERE postal_code = :postal_code AND federal_state = 'Berlin' AND cs_status = 'available'
+    def find_by_postal_code(self, postal_code: str) -> List[StationView]:
+        """Find the available charging stations of a postal code as read only StationView rows."""
+        return self.snapshot().find(postal_codes=[postal_code], federal_states=["Berlin"], statuses=["available"])
+
+    def find_all(self, statuses: Optional[Iterable[str]] = ("available",)) -> List[StationView]:
+        """Find all charging stations in Berlin with one of the statuses as read only StationView rows."""
+        return self.snapshot().find(federal_states=["Berlin"], statuses=statuses)
+
+    def data_version(self) -> int:
+        """Version of the station table (see StationVersion), 0 before the first change."""
+        table = StationVersion.__table__
+        return self.session.execute(select(table.c.version).where(table.c.version_id == 1)).scalar() or 0
+
+    @staticmethod
+    def _to_aggregate(row, distance: Optional[float] = None) -> ChargingStationAggregate:
+        charging_station = ChargingStation(
+            station_id=row["station_id"],
+            postal_code=row["postal_code"],
+            latitude=row["latitude"],
+            longitude=row["longitude"],
+            location=row["location"],
+            street=row["street"],
+            district=row["district"],
+            federal_state=row["federal_state"],
+            operator=row["operator"],
+            power_charging_dev=row["power_charging_dev"],
+            commission_date=row["commission_date"],
+            type_charging_device=row["type_charging_device"],
+            cs_status=row["cs_status"]
+        )
+        return ChargingStationAggregate(charging_station, distance=distance)
+
+    def snapshot(self) -> StationSnapshot:
+        """Return the in-memory snapshot of the charging station table.
+
+        It is loaded on first use and again once the station version shows a
+        change this process did not apply, e.g. one of another server process.
+        """
+        engine = self.session.get_bind()
+        version = self.data_version()
+        with _spatial_index_lock:
+            snapshot = _snapshots.get(engine)
+            if snapshot is None or snapshot.version != version:
+                # Through the typed columns, so e.g. commission_date is a date on SQLite as well
+                table = ChargingStation.__table__
+                query = select(*[table.c[name] for name in StationView._fields]).order_by(table.c.station_id)
+                rows = self.session.execute(query).all()
+                snapshot = _snapshots[engine] = StationSnapshot(rows, version)
+        return snapshot
+
+    def spatial_index(self) -> StationSpatialIndex:
+        """Return the spatial index of the charging station table, built from the current snapshot."""
+        engine = self.session.get_bind()
+        snapshot = self.snapshot()
+        with _spatial_index_lock:
+            built_from, index = _spatial_indexes.get(engine, (None, None))
+            if built_from is not snapshot:
+                # NULL coordinates and powers are NaN, unlocated stations are left out of the index
+                index = StationSpatialIndex(snapshot.station_ids, snapshot.latitudes, snapshot.longitudes,
+                                            snapshot.powers, snapshot.column("cs_status"))
+                _spatial_indexes[engine] = (snapshot, index)
+        return index
+
+    def _find_by_ids(self, matches) -> List[ChargingStationAggregate]:
+        """Load (station_id, distance) matches as aggregates, keeping their order."""
+        if not matches:
+            return []
+        query = text("SELECT * FROM chargingstation WHERE station_id IN :ids").bindparams(bindparam("ids", expanding=True))
+        rows = {row["station_id"]: row for row in self.session.execute(query, {"ids": [id for id, _ in matches]}).mappings()}
+        return [self._to_aggregate(rows[id], distance) for id, distance in matches if id in rows]
+
+    def find_nearest(self, latitude: float, longitude: float, k: int = 5,
+                     power_categories: Optional[Iterable[str]] = None,
+                     statuses: Optional[Iterable[str]] = None) -> List[ChargingStationAggregate]:
+        """Find the k charging stations closest to a point, nearest first."""
+        matches = self.spatial_index().nearest(latitude, longitude, k, power_categories, statuses)
+        return self._find_by_ids(matches)
+
+    def find_within_radius(self, latitude: float, longitude: float, radius_m: float,
+                           power_categories: Optional[Iterable[str]] = None,
+                           statuses: Optional[Iterable[str]] = None) -> List[ChargingStationAggregate]:
+        """Find all charging stations within radius_m metres of a point, nearest first."""
+        matches = self.spatial_index().within_radius(latitude, longitude, radius_m, power_categories, statuses)
+        return self._find_by_ids(matches)
+
+    def _geo_backend(self) -> str:
+        """Set up the geo index of the database once per engine and return which one it is."""
+        engine = self.session.get_bind()
+        backend = _geo_backends.get(engine)
+        if backend is None:
+            connection = self.session.connection()
+            if engine.dialect.name == "sqlite":
+                create_station_rtree(connection)
+                backend = "rtree"
+            elif engine.dialect.name == "postgresql" and has_postgis(connection):
+                create_station_postgis_index(connection)
+                backend = "postgis"
+            else:
+                create_station_lat_lon_index(connection)
+                backend = "btree"
+            # Flushed only inside a unit of work, so the caller's pending writes are not committed early
+            commit(self.session)
+            # Recorded once committed, a rolled back unit of work sets the index up again (the DDL is idempotent)
+            after_commit(self.session, lambda: _geo_backends.__setitem__(engine, backend))
+        return backend
+
+    @staticmethod
+    def _filter_clause(power_categories, statuses):
+        """SQL conditions and parameters for the power category and status filters."""
+        conditions, params = [], {}
+        if power_categories is not None:
+            ranges, lower = [], None
+            categories = {getattr(c, 'value', c) for c in power_categories}
+            for i, (name, limit) in enumerate(CATEGORY_LIMITS):
+                if name in categories:
+                    clause = ["cs.power_charging_dev IS NOT NULL"]
+                    if lower is not None:
+                        clause.append(f"cs.power_charging_dev > :power_min_{i}")
+                        params[f"power_min_{i}"] = lower
+                    if limit is not None:
+                        clause.append(f"cs.power_charging_dev <= :power_max_{i}")
+                        params[f"power_max_{i}"] = limit
+                    ranges.append("(" + " AND ".join(clause) + ")")
+                lower = limit
+            conditions.append("(" + (" OR ".join(ranges) or "1 = 0") + ")")
+        if statuses is not None:
+            conditions.append("cs.cs_status IN :statuses")
+            params["statuses"] = list(statuses)
+        return "".join(" AND " + condition for condition in conditions), params
+
+    def _find_in_bounds(self, bounds, power_categories, statuses, distance_to=None, radius_m=None):
+        tables, prefilter = GEO_PREFILTERS[self._geo_backend()]
+        filters, params = self._filter_clause(power_categories, statuses)
+        params.update(zip(["min_lat", "min_lon", "max_lat", "max_lon"], bounds))
+
+        distance, order = "NULL", ""
+        if distance_to is not None:
+            # Squared equirectangular distance in metres, exact enough at city scale and plain SQL arithmetic
+            ky = EARTH_RADIUS_M * math.pi / 180
+            params.update(lat=distance_to[0], lon=distance_to[1], ky=ky, kx=ky * math.cos(math.radians(distance_to[0])), r2=radius_m ** 2)
+            distance = "((cs.latitude - :lat) * :ky) * ((cs.latitude - :lat) * :ky) + ((cs.longitude - :lon) * :kx) * ((cs.longitude - :lon) * :kx)"
+            filters += f" AND {distance} <= :r2"
+            order = " ORDER BY distance_sq"
+
+        query = text(f"""
+            SELECT cs.*, {distance} AS distance_sq FROM {tables}
+            WHERE {prefilter}cs.latitude BETWEEN :min_lat AND :max_lat AND cs.longitude BETWEEN :min_lon AND :max_lon{filters}{order}
         """)
+        if statuses is not None:
+            query = query.bindparams(bindparam("statuses", expanding=True))
+        rows = self.session.execute(query, params).mappings()
+        return [self._to_aggregate(row, None if row["distance_sq"] is None else math.sqrt(row["distance_sq"])) for row in rows]
 
-    
-        result = self.session.execute(query, {"postal_code": postal_code}).mappings()
-        rows = result.all()  # Fetch all results
-
-        charging_stations = []
-        for row in rows:
-            charging_station = ChargingStation(
-                station_id=row["station_id"],
-                postal_code=row["postal_code"],
-                latitude=row["latitude"],
-                longitude=row["longitude"],
-                location=row["location"],
-                street=row["street"],
-                district=row["district"],
-                federal_state=row["federal_state"],
-                operator=row["operator"],
-                power_charging_dev=row["power_charging_dev"],
-                commission_date=row["commission_date"],
-                type_charging_device=row["type_charging_device"],
-                cs_status=row["cs_status"]
-            )
-            aggregate = ChargingStationAggregate(charging_station)
-            charging_stations.append(aggregate)
-        
-        return charging_stations
+    def find_in_bounds(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                       power_categories: Optional[Iterable[str]] = None,
+                       statuses: Optional[Iterable[str]] = None) -> List[ChargingStationAggregate]:
+        """Find the charging stations inside a bounding box (e.g. the map viewport) through the geo index."""
+        return self._find_in_bounds((min_lat, min_lon, max_lat, max_lon), power_categories, statuses)
+
+    def find_within_radius_sql(self, latitude: float, longitude: float, radius_m: float,
+                               power_categories: Optional[Iterable[str]] = None,
+                               statuses: Optional[Iterable[str]] = None) -> List[ChargingStationAggregate]:
+        """Find all charging stations within radius_m metres of a point in SQL, nearest first.
+
+        Unlike find_within_radius this needs no in-process index, so every worker sees the same data.
+        """
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        dlon = dlat / max(math.cos(math.radians(latitude)), 1e-6)
+        bounds = (latitude - dlat, longitude - dlon, latitude + dlat, longitude + dlon)
+        return self._find_in_bounds(bounds, power_categories, statuses, (latitude, longitude), radius_m)
 
     def is_table_empty(self) -> bool:
         """Check if the charging station table is empty."""
@@ -52,7 +249,39 @@ class ChargingStationRepository:
     
     def update_charging_station(self, id: int, status: str) -> bool:
         """Update a charging station in the database."""
-        query = text("UPDATE chargingstation SET cs_status = :status WHERE station_id = :id")
-        self.session.execute(query, {"id": id, "status": status})
-        self.session.commit()
+        return self.update_charging_stations([id], status)
+
+    def update_charging_stations(self, ids: List[int], status: str) -> bool:
+        """Update the status of several charging stations with one UPDATE."""
+        ids = list(ids)
+        # Postal codes of the stations whose status really changes
+        changed = text("""
+            SELECT DISTINCT postal_code FROM chargingstation
+            WHERE station_id IN :ids AND (cs_status <> :status OR cs_status IS NULL)
+        """).bindparams(bindparam("ids", expanding=True))
+        postal_codes = {postal_code for postal_code, in self.session.execute(changed, {"ids": ids, "status": status})}
+
+        query = text("UPDATE chargingstation SET cs_status = :status WHERE station_id IN :ids").bindparams(bindparam("ids", expanding=True))
+        self.session.execute(query, {"ids": ids, "status": status})
+        version = bump_station_version(self.session.connection()) if postal_codes else None
+        commit(self.session)
+
+        engine = self.session.get_bind()
+        snapshot = _snapshots.get(engine)
+        built_from, index = _spatial_indexes.get(engine, (None, None))
+
+        def committed():
+            # Applied in place only if the snapshot missed no other change, otherwise it is reloaded on the next search
+            if version is not None and snapshot is not None and snapshot.version == version - 1:
+                snapshot.set_status(ids, status)
+                snapshot.version = version
+                if built_from is snapshot:
+                    for id in ids:
+                        index.set_status(id, status)
+            if postal_codes:
+                for listener in _status_listeners:
+                    listener(engine, postal_codes)
+
+        # Only committed statuses, a rolled back report leaves the snapshot, the index and the listeners as they are
+        after_commit(self.session, committed)
         return True
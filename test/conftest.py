@@ -0,0 +1,67 @@
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from sqlalchemy import event
+
+# The repository tests run against every backend in BACKENDS. SQLite runs in
+# memory, PostgreSQL runs against TEST_POSTGRES_URL when it is set, otherwise
+# against a throwaway server started with testing.postgresql (needs the
+# PostgreSQL binaries on the PATH, no docker). Without either the PostgreSQL
+# variants are skipped.
+BACKENDS = ["sqlite", "postgresql"]
+
+
+@pytest.fixture(scope="session")
+def postgres_url():
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if url:
+        yield url
+        return
+
+    try:
+        import psycopg2  # noqa: F401  driver of the postgresql:// URLs
+        import testing.postgresql
+    except ImportError as e:
+        pytest.skip(f"PostgreSQL backend not available: {e}")
+
+    try:
+        server = testing.postgresql.Postgresql()
+    except RuntimeError as e:
+        pytest.skip(f"PostgreSQL server could not be started: {e}")
+
+    yield server.url()
+    server.stop()
+
+
+@pytest.fixture(scope="session", params=BACKENDS)
+def database_url(request):
+    """SQLAlchemy URL of an empty test database, once per backend"""
+    if request.param == "sqlite":
+        return "sqlite:///:memory:"
+    return request.getfixturevalue("postgres_url")
+
+
+@pytest.fixture
+def count_queries():
+    """with count_queries(engine) as statements: collects the SQL run in the block
+
+    Assert on len(statements) to keep N+1 lazy loads out of a code path.
+    """
+    @contextmanager
+    def count(engine):
+        statements = []
+
+        def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return count
@@ -0,0 +1,175 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import os
+import pytest
+import numpy as np
+import pandas as pd
+import shapely
+from core import artifact_store
+from core import methods as m1
+from config import pdict as config_pdict
+
+DATASETS = Path(__file__).resolve().parents[2] / "datasets"
+
+PLZ_POLYGONS = {
+    10117: "POLYGON ((13.38 52.51, 13.40 52.51, 13.40 52.52, 13.38 52.52, 13.38 52.51))",
+    10119: "POLYGON ((13.40 52.52, 13.42 52.52, 13.42 52.54, 13.40 52.54, 13.40 52.52))",
+    12047: "POLYGON ((13.42 52.48, 13.44 52.48, 13.44 52.50, 13.42 52.50, 13.42 52.48))",
+}
+
+
+def station(plz, state="Berlin", lat="52,515", lon="13,39", power="22,0"):
+    return {"Betreiber": "GreenCharge", "Straße": "Street", "Hausnummer": "1a", "Adresszusatz": None,
+            "Postleitzahl": plz, "Ort": "Berlin", "Bundesland": state, "Kreis/kreisfreie Stadt": "Berlin",
+            "Breitengrad": lat, "Längengrad": lon, "Inbetriebnahmedatum": "2020-01-01",
+            "Nennleistung Ladeeinrichtung [kW]": power, "Art der Ladeeinrichung": "Normalladeeinrichtung",
+            "Anzahl Ladepunkte": 2}
+
+
+@pytest.fixture
+def pdict(tmp_path, monkeypatch):
+    """pdict reading small copies of the datasets below tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "datasets").mkdir()
+
+    pd.DataFrame({"PLZ": list(PLZ_POLYGONS), "geometry": list(PLZ_POLYGONS.values())}) \
+        .to_csv(tmp_path / "datasets" / "geodata_berlin_plz.csv", sep=";", index=False)
+    pd.DataFrame([station(10117), station(10117, power="150,0"), station(12047, lat="52,49", lon="13,43"),
+                  station(10119, state="Bayern"), station(10969)]) \
+        .to_csv(tmp_path / "datasets" / "Ladesaeulenregister.csv", sep=";", index=False)
+    pd.DataFrame({"plz": ["01067", "10117", "10119", "12047", "10969"], "note": "Berlin",
+                  "einwohner": [11957, 3500, 18000, 25000, 30000], "qkm": 1.0,
+                  "lat": [51.06, 52.51, 52.53, 52.49, 52.50], "lon": [13.71, 13.39, 13.41, 13.43, 13.40]}) \
+        .to_csv(tmp_path / "datasets" / "plz_einwohner.csv", index=False)
+
+    return dict(config_pdict, datafolder="datasets")
+
+
+def csv_pipeline(pdict):
+    """Station numbers and residents per PLZ the way they were computed from the CSVs before the artifacts"""
+    df_geodat_plz = pd.read_csv(os.path.join("datasets", "geodata_berlin_plz.csv"), delimiter=";")
+    df_lstat = pd.read_csv(os.path.join("datasets", "Ladesaeulenregister.csv"), delimiter=";", low_memory=False)
+    df_lstat = df_lstat[df_lstat["Bundesland"] == "Berlin"]
+    gdf_lstat3 = m1.count_plz_occurrences(m1.preprop_lstat(df_lstat, df_geodat_plz, pdict))
+    df_residents = pd.read_csv(os.path.join("datasets", "plz_einwohner.csv"), delimiter=",")
+    return gdf_lstat3, m1.preprop_resid(df_residents, df_geodat_plz, pdict)
+
+
+def assert_same_frame(artifact, expected, columns):
+    assert artifact[columns].reset_index(drop=True).equals(expected[columns].reset_index(drop=True))
+    assert artifact.geometry.reset_index(drop=True).geom_equals(expected.geometry.reset_index(drop=True)).all()
+
+
+def test_artifacts_match_csv_pipeline(pdict):
+    lstat, residents = csv_pipeline(pdict)
+
+    # Built from the CSVs and saved, then memory-mapped from the Feather files
+    for _ in range(2):
+        assert_same_frame(artifact_store.load_lstat_plz(pdict), lstat, ["PLZ", "Number"])
+        assert_same_frame(artifact_store.load_residents(pdict), residents, ["PLZ", "Einwohner"])
+
+    assert artifact_store.load_lstat_plz(pdict)[["PLZ", "Number"]].values.tolist() == [[10117, 2], [12047, 1]]
+    assert artifact_store.load_residents(pdict)["PLZ"].tolist() == [10117, 10119, 12047]
+
+
+def test_stations_artifact(pdict):
+    stations = artifact_store.load_stations(pdict)
+
+    assert stations["Postleitzahl"].tolist() == [10117, 10117, 12047, 10969]
+    assert stations["Breitengrad"].tolist() == [52.515, 52.515, 52.49, 52.515]
+    assert stations["Nennleistung Ladeeinrichtung [kW]"].tolist() == [22.0, 150.0, 22.0, 22.0]
+    assert stations["Hausnummer"].tolist() == ["1a"] * 4
+
+
+def test_artifact_rebuilt_when_source_changes(pdict, monkeypatch):
+    artifact_store.build_artifacts(pdict)
+    assert all(artifact_store.is_current(pdict, name) for name in artifact_store.ARTIFACTS)
+
+    def build_stations(pdict):
+        raise AssertionError("current artifacts are not rebuilt")
+    with monkeypatch.context() as patch:
+        patch.setattr(artifact_store, "_build_stations", build_stations)
+        artifact_store.load_stations(pdict)
+
+    # The residents only depend on their own CSV and the PLZ polygons
+    Path("datasets", "plz_einwohner.csv").write_text("plz,note,einwohner,qkm,lat,lon\n10117,Berlin,4000,1.0,52.51,13.39\n")
+    assert not artifact_store.is_current(pdict, "residents")
+    assert artifact_store.is_current(pdict, "lstat_plz")
+    assert artifact_store.load_residents(pdict)[["PLZ", "Einwohner"]].values.tolist() == [[10117, 4000]]
+    assert artifact_store.is_current(pdict, "residents")
+
+
+def test_lod_artifact_rebuilt_when_params_change(pdict):
+    artifact_store.load_geodat_plz_lod(pdict, "low")
+    params = artifact_store.lod_params(pdict, "low")
+    assert artifact_store.is_current(pdict, "geodat_plz_low", params)
+
+    changed = dict(params, tolerance=0.01)
+    assert not artifact_store.is_current(pdict, "geodat_plz_low", changed)
+    assert artifact_store.load_artifact(pdict, "geodat_plz_low", changed) is None
+
+
+def test_lod_artifact_rebuilt_when_algorithm_changes(pdict, monkeypatch):
+    # Built before the algorithm was recorded
+    artifact_store.save_artifact(pdict, "geodat_plz_low", artifact_store.load_geodat_plz(pdict), pdict["lod"]["low"])
+    assert not artifact_store.is_current(pdict, "geodat_plz_low", artifact_store.lod_params(pdict, "low"))
+
+    artifact_store.build_artifacts(pdict)
+    assert artifact_store.is_current(pdict, "geodat_plz_low", artifact_store.lod_params(pdict, "low"))
+
+    monkeypatch.setattr(artifact_store, "SIMPLIFY_VERSION", artifact_store.SIMPLIFY_VERSION + 1)
+    assert artifact_store.load_artifact(pdict, "geodat_plz_low", artifact_store.lod_params(pdict, "low")) is None
+
+
+def gaps(geometries, outline):
+    """Holes in the union of geometries that lie mostly inside outline, i.e. between neighbours"""
+    holes = [shapely.Polygon(shapely.get_interior_ring(part, i))
+             for part in shapely.get_parts(shapely.union_all(geometries))
+             for i in range(shapely.get_num_interior_rings(part))]
+    return [hole for hole in holes if hole.intersection(outline).area > hole.area / 2]
+
+
+def assert_coverage(geometries, simplified, grid_size):
+    # Every polygon is kept, valid, and does not overlap its neighbours
+    assert len(simplified) == len(geometries)
+    assert not shapely.is_empty(simplified).any()
+    assert shapely.is_valid(simplified).all()
+    assert shapely.coverage_is_valid(simplified)
+    # No gaps open between neighbours
+    assert gaps(simplified, shapely.union_all(geometries)) == []
+    # All coordinates are on the grid
+    coordinates = shapely.get_coordinates(simplified) / grid_size
+    assert np.allclose(coordinates, np.round(coordinates), rtol=0, atol=1e-6)
+
+
+def test_simplify_coverage_keeps_neighbours_together():
+    # Row of PLZ areas with jagged shared borders, finer than the grid
+    borders = [[(x + 0.0003 * np.sin(7 * y), y) for y in np.linspace(0, 1, 200)] for x in range(1, 4)]
+    left = [(0, 1), (0, 0)]
+    geometries = []
+    for border in borders + [[(4, 0), (4, 1)]]:
+        geometries.append(shapely.Polygon(left + border))
+        left = border[::-1]
+    geometries = np.array(geometries)
+    assert shapely.coverage_is_valid(geometries)
+
+    simplified = artifact_store.simplify_coverage(geometries, 0.01, 0.001)
+
+    assert_coverage(geometries, simplified, 0.001)
+    assert shapely.get_num_coordinates(simplified).sum() < shapely.get_num_coordinates(geometries).sum() / 10
+    for a, b in zip(simplified[:-1], simplified[1:]):
+        assert a.intersection(b).length == pytest.approx(1, abs=0.01)
+
+
+@pytest.mark.parametrize("level", config_pdict["lod"])
+def test_simplify_coverage_berlin_plz(level):
+    df = pd.read_csv(DATASETS / "geodata_berlin_plz.csv", delimiter=";")
+    geometries = shapely.from_wkt(df["geometry"].values)
+    lod = config_pdict["lod"][level]
+
+    simplified = artifact_store.simplify_coverage(geometries, lod["tolerance"], lod["grid_size"])
+
+    assert_coverage(geometries, simplified, lod["grid_size"])
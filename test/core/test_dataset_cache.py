@@ -0,0 +1,106 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import os
+import threading
+import time
+import pytest
+import pandas as pd
+from core import dataset_cache
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.csv"
+    path.write_text("PLZ;Number\n10117;2\n")
+    yield path
+    dataset_cache.invalidate()
+
+
+@pytest.fixture
+def builder():
+    """Builder returning a new frame per call, the calls are counted in builder.calls"""
+    def build():
+        build.calls += 1
+        return pd.DataFrame({"PLZ": [10117], "Number": [build.calls]})
+    build.calls = 0
+    return build
+
+
+def test_cache_hit_skips_builder(source, builder):
+    first = dataset_cache.get_or_build("lstat", [source], builder)
+    second = dataset_cache.get_or_build("lstat", [source], builder)
+
+    assert builder.calls == 1
+    assert first.equals(second)
+
+
+def test_changed_mtime_rebuilds(source, builder):
+    dataset_cache.get_or_build("lstat", [source], builder)
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert dataset_cache.get_or_build("lstat", [source], builder)["Number"].tolist() == [2]
+    assert dataset_cache.get_or_build("lstat", [source], builder)["Number"].tolist() == [2]
+    assert builder.calls == 2
+
+
+def test_changed_size_rebuilds(source, builder):
+    dataset_cache.get_or_build("lstat", [source], builder)
+
+    # Same mtime, only the size tells the files apart
+    stat = os.stat(source)
+    source.write_text("PLZ;Number\n10117;2\n10119;1\n")
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    dataset_cache.get_or_build("lstat", [source], builder)
+    assert builder.calls == 2
+
+
+def test_invalidate_rebuilds(source, builder):
+    dataset_cache.get_or_build("lstat", [source], builder)
+    dataset_cache.get_or_build("residents", [source], builder)
+
+    dataset_cache.invalidate("lstat")
+    dataset_cache.get_or_build("lstat", [source], builder)
+    dataset_cache.get_or_build("residents", [source], builder)
+    assert builder.calls == 3
+
+
+def test_sessions_get_copies(source, builder):
+    frame = dataset_cache.get_or_build("lstat", [source], builder)
+    frame.loc[0, "Number"] = 99
+
+    assert dataset_cache.get_or_build("lstat", [source], builder)["Number"].tolist() == [1]
+
+
+def test_concurrent_sessions_build_once(source, builder):
+    def slow_builder():
+        time.sleep(0.1)
+        return builder()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(dataset_cache.get_or_build("lstat", [source], slow_builder)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert builder.calls == 1
+    assert [frame["Number"].tolist() for frame in results] == [[1]] * 4
+
+
+def test_sync_register_passes_signature(source, monkeypatch):
+    pdict = {"datafolder": str(source.parent), "file_lstations": source.name, "artifactfolder": "artifacts"}
+    imports = []
+    monkeypatch.setattr(dataset_cache.artifact_store, "load_stations", lambda pdict: "stations")
+    monkeypatch.setattr(dataset_cache.m1, "inspect_db", lambda df, signature: imports.append((df, signature)))
+
+    dataset_cache.sync_register(pdict)
+    dataset_cache.sync_register(pdict)
+
+    stat = os.stat(source)
+    assert imports == [("stations", f"{stat.st_size}:{stat.st_mtime_ns}")]
+    assert os.path.exists(source.parent / "artifacts" / "register_sync.lock")
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import threading
+import time
+import types
+import core.HelperTools as ht
+
+
+def test_file_lock_excludes_other_holders(tmp_path):
+    path = tmp_path / "locks" / "build.lock"
+    events = []
+
+    def hold(name):
+        with ht.file_lock(path):
+            events.append(name + " in")
+            time.sleep(0.05)
+            events.append(name + " out")
+
+    threads = [threading.Thread(target=hold, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Each holder leaves before the other one enters
+    assert [event[2:] for event in events] == ["in", "out", "in", "out"]
+    assert events[0][0] == events[1][0]
+
+
+def test_file_lock_without_fcntl(tmp_path, monkeypatch):
+    # Windows has no fcntl, the lock falls back to msvcrt
+    calls = []
+    msvcrt = types.SimpleNamespace(LK_LOCK=1, LK_UNLCK=0, locking=lambda fd, mode, size: calls.append((mode, size)))
+    monkeypatch.setattr(ht, "fcntl", None)
+    monkeypatch.setattr(ht, "msvcrt", msvcrt, raising=False)
+
+    with ht.file_lock(tmp_path / "build.lock"):
+        assert calls == [(1, 1)]
+    assert calls == [(1, 1), (0, 1)]
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import folium
+from core import methods as m1
+from src.search_context.domain.value_objects.station_view import StationView
+
+
+def station(station_id, power, street="Street", latitude=52.52, longitude=13.40):
+    return StationView(station_id, "10178", latitude, longitude, "Berlin", street, "Mitte", "Berlin", "GreenCharge",
+                       power, None, "Normalladeeinrichtung", "available")
+
+
+def test_categorize_powers_boundaries():
+    powers = [50, 50.1, 150, 150.1, 500, 500.1, float("nan"), None]
+    assert m1.categorize_powers(powers).tolist() == ["Low Power", "Medium Power", "Medium Power", "High Power",
+                                                     "High Power", "Ultra High Power", "Unknown", "Unknown"]
+
+
+def test_style_stations():
+    styles = m1.style_stations([station(1, 50), station(2, 150.1), station(3, None)])
+
+    assert [(category, color) for category, color, _ in styles] == [
+        ("Low Power", "green"), ("High Power", "orange"), ("Unknown", "gray")]
+    assert "<strong>Power Category:</strong> Unknown" in styles[2][2]
+    assert "<strong>Power Charging Device:</strong> None kW" in styles[2][2]
+
+
+def test_power_category_colors_are_icon_colors():
+    # folium.Icon falls back to blue with a warning for other colors
+    assert set(m1.POWER_CATEGORY_COLORS.values()) <= folium.Icon.color_options
+    assert len(set(m1.POWER_CATEGORY_COLORS.values())) == len(m1.POWER_CATEGORY_COLORS)
+
+
+def test_station_popup_escapes_register_text():
+    popup = m1.station_popup(station(1, 22.0, street='<script>alert("x")</script> & Co'), "Low Power")
+
+    assert "<script>" not in popup
+    assert "&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; Co" in popup
+
+
+def test_add_station_markers():
+    stations = [station(1, 22.0, latitude=52.50, longitude=13.30), station(2, 150.0, latitude=52.60, longitude=13.50),
+                station(3, 11.0, latitude=None, longitude=None)]
+
+    m = folium.Map()
+    m1.add_station_markers(m, stations, cluster_threshold=10)
+    markers = [child for child in m._children.values() if isinstance(child, folium.Marker)]
+    # Unlocated stations are left out, the bounds are fitted once
+    assert len(markers) == 2
+    html = m.get_root().render()
+    assert html.count("fitBounds") == 1
+    assert "[[52.5, 13.3], [52.6, 13.5]]" in html
+
+    m = folium.Map()
+    m1.add_station_markers(m, stations, cluster_threshold=1)
+    assert not any(isinstance(child, folium.Marker) for child in m._children.values())
+    assert any(isinstance(child, m1.FastMarkerCluster) for child in m._children.values())
@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import os
+import pytest
+import geopandas as gpd
+import mapbox_vector_tile
+from shapely.geometry import box
+from core import tile_store
+
+BERLIN = (1491000, 6894000)  # Web Mercator
+
+
+@pytest.fixture
+def pdict(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pdict = {'datafolder': 'datasets', 'tilefolder': os.path.join('static', 'tiles'), 'tile_zooms': [10, 11],
+             'file_shape_plz': 'plz.shp', 'file_shape_dis': 'dis.shp', 'file_lstations': 'stations.csv',
+             'file_residents': 'residents.csv', 'file_geodat_plz': 'geodata_berlin_plz.csv'}
+    (tmp_path / 'datasets').mkdir()
+    for name in ('plz.shp', 'dis.shp', 'stations.csv', 'residents.csv', 'geodata_berlin_plz.csv'):
+        (tmp_path / 'datasets' / name).write_text(name)
+
+    x, y = BERLIN
+    plz = gpd.GeoDataFrame({'PLZ': ['10115', '10117'], 'Number': [3, 0], 'Einwohner': [1000, 2000]},
+                           geometry=[box(x, y, x + 2000, y + 2000), box(x + 2000, y, x + 4000, y + 2000)], crs=3857)
+    bezirke = gpd.GeoDataFrame({'Bezirk': ['Mitte']}, geometry=[box(x, y, x + 4000, y + 2000)], crs=3857)
+    monkeypatch.setattr(tile_store, '_load_layers', lambda pdict: {'plz': plz, 'bezirke': bezirke})
+    return pdict
+
+
+def tiles(folder):
+    return sorted(str(path.relative_to(folder)) for path in Path(folder).rglob('*.pbf'))
+
+
+def served(pdict):
+    """Folder of the served tile pyramid"""
+    return os.path.join(tile_store.tile_folder(pdict), tile_store.current_version(pdict))
+
+
+def test_build_tiles(pdict):
+    tile_store.build_tiles(pdict)
+    folder = served(pdict)
+
+    assert tiles(folder)
+    assert {path.split(os.sep)[0] for path in tiles(folder)} == {'10', '11'}
+    with open(os.path.join(folder, tiles(folder)[0]), 'rb') as f:
+        layers = mapbox_vector_tile.decode(f.read())
+    assert set(layers) == {'plz', 'bezirke'}
+    assert {feature['properties']['PLZ'] for feature in layers['plz']['features']} == {'10115', '10117'}
+    assert tile_store.is_current(pdict)
+
+
+def test_sources_changed(pdict):
+    tile_store.build_tiles(pdict)
+
+    # The station and resident numbers are joined on the PLZ CSV
+    Path('datasets', 'geodata_berlin_plz.csv').write_text('changed')
+    assert not tile_store.is_current(pdict)
+
+    tile_store.build_tiles(pdict)
+    assert tile_store.is_current(pdict)
+
+
+def test_rebuild_keeps_previous_pyramid(pdict):
+    folder = tile_store.tile_folder(pdict)
+    # Pyramid of the layout before versions
+    Path(folder, '9', '0', '0.pbf').parent.mkdir(parents=True)
+    Path(folder, '9', '0', '0.pbf').write_bytes(b'stale')
+    Path(folder, 'manifest.json').write_text('{}')
+
+    tile_store.build_tiles(pdict)
+    first = tile_store.current_version(pdict)
+    built = tiles(served(pdict))
+    tile_store.build_tiles(pdict)
+    second = tile_store.current_version(pdict)
+
+    assert second != first
+    assert tiles(served(pdict)) == built
+    # The previous pyramid is still served to pages referencing it, nothing else is left
+    assert sorted(os.listdir(folder)) == sorted(['current.json', first, second])
+    assert tiles(os.path.join(folder, first)) == built
+
+    tile_store.build_tiles(pdict)
+    assert first not in os.listdir(folder)
+
+
+def test_failed_build_keeps_pyramid(pdict, monkeypatch):
+    tile_store.build_tiles(pdict)
+    folder = tile_store.tile_folder(pdict)
+    version = tile_store.current_version(pdict)
+    built = tiles(served(pdict))
+
+    def encode_tile(layers, z, x, y):
+        raise RuntimeError("encoding failed")
+    monkeypatch.setattr(tile_store, '_encode_tile', encode_tile)
+    Path('datasets', 'stations.csv').write_text('changed')
+
+    with pytest.raises(RuntimeError):
+        tile_store.ensure_tiles(pdict)
+    assert tile_store.current_version(pdict) == version
+    assert tiles(served(pdict)) == built
+    assert sorted(os.listdir(folder)) == sorted(['current.json', version])
+
+
+def test_ensure_tiles_builds_once(pdict, monkeypatch):
+    built = []
+    build_tiles = tile_store._build_tiles
+    monkeypatch.setattr(tile_store, '_build_tiles', lambda pdict: built.append(build_tiles(pdict)))
+
+    layer = tile_store.ensure_tiles(pdict)
+    assert layer == {'url': f'/app/static/tiles/{tile_store.current_version(pdict)}/{{z}}/{{x}}/{{y}}.pbf',
+                     'min_zoom': 10, 'max_zoom': 11}
+    assert tile_store.ensure_tiles(pdict) == layer
+    assert len(built) == 1
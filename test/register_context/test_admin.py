@@ -30,9 +30,9 @@ def get_admin_by_id(db_session, sys_admin_id: int):
     return db_session.query(Admin).filter(Admin.sys_admin_id == sys_admin_id).first()
 
 @pytest.fixture(scope="module")
-def db_session():
-    # Set up in-memory SQLite database for testing
-    engine = create_engine("sqlite:///:memory:")
+def db_session(database_url):
+    # Set up the test database, once per backend (see test/conftest.py)
+    engine = create_engine(database_url)
     Base.metadata.create_all(bind=engine)  # Create all tables
 
     session = SessionLocal(bind=engine)  # Create session for testing
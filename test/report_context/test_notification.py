@@ -8,7 +8,7 @@ from sqlalchemy import create_engine
 from database.database import Base
 from sqlalchemy.orm import sessionmaker
 from src.register_context.domain.entities.admin import Admin
-from src.report_context.domain.entities.notification import Notification
+from src.report_context.domain.entities.notification import Notification, NotificationInbox
 from src.register_context.domain.entities.users import User
 from src.register_context.domain.entities.csoperator import CSOperator
 from src.search_context.domain.entities.chargingstation import ChargingStation
@@ -17,13 +17,15 @@ from sqlalchemy.exc import IntegrityError
 from src.report_context.infrastructure.repositories.NotificationRepository import NotificationRepository
 from src.report_context.application.services.NotificationService import NotificationService
 from src.report_context.domain.events.NotificationCreateEvent import NotificationCreateEvent
+from src.register_context.application.services.UserService import UserService
+from src.register_context.infrastructure.repositories.UserRepository import UserRepository
       
 @pytest.fixture
-def db_session():
+def db_session(database_url):
     """Create a new database session for each test."""
     
-    # Set up in-memory SQLite database for testing
-    engine = create_engine('sqlite:///:memory:')  # Or point to your test database
+    # Set up the test database, once per backend (see test/conftest.py)
+    engine = create_engine(database_url)
     print(Base.metadata.tables)
     Base.metadata.create_all(engine)  # Create tables
 
@@ -80,4 +82,98 @@ def test_get_notifications_by_user_id(db_session):
     # USER 3 (No User with ID 3)
     notifications_result = service.get_notifications_by_user_id(3)
     assert len(notifications_result.notifications) == 0
-    assert notifications_result.success == True
\ No newline at end of file
+    assert notifications_result.success == True
+
+def test_broadcast_notification(db_session):
+    service = NotificationService(NotificationRepository(db_session))
+    service.create_notifications([1], "Direct Notification")
+
+    result = service.broadcast_notification("Broadcast Notification")
+
+    assert isinstance(result, NotificationCreateEvent)
+    assert result.success == True
+    assert db_session.query(Notification).count() == 2
+
+    # USER 1 gets both, USER 2 only the broadcast
+    assert sorted(n.content for n in service.get_notifications_by_user_id(1).notifications) == ["Broadcast Notification", "Direct Notification"]
+    assert [n.content for n in service.get_notifications_by_user_id(2).notifications] == ["Broadcast Notification"]
+
+def test_get_notifications_page(db_session):
+    service = NotificationService(NotificationRepository(db_session))
+    for i in range(5):
+        service.create_notifications([1], f"Direct {i}")
+        service.broadcast_notification(f"Broadcast {i}")
+    service.create_notifications([2], "Other user")
+
+    contents, cursor = [], None
+    while True:
+        result = service.get_notifications_page(1, 3, cursor)
+        assert result.success == True
+        assert len(result.notifications) <= 3
+        contents += [n.content for n in result.notifications]
+        cursor = result.next_cursor
+        if cursor is None:
+            break
+
+    # Newest first, every notification exactly once
+    assert contents == [f"{kind} {i}" for i in reversed(range(5)) for kind in ("Broadcast", "Direct")]
+    # USER 3 (No User with ID 3) only gets the broadcasts
+    assert [n.content for n in service.get_notifications_page(3, 10).notifications] == [f"Broadcast {i}" for i in reversed(range(5))]
+
+def test_count_unread_and_mark_all_read(db_session):
+    service = NotificationService(NotificationRepository(db_session))
+    service.create_notifications([1, 2], "Direct")
+    service.broadcast_notification("Broadcast")
+    assert (service.count_unread(1), service.count_unread(2)) == (2, 2)
+
+    assert service.mark_all_read(1) == True
+    assert (service.count_unread(1), service.count_unread(2)) == (0, 2)
+
+    service.create_notifications([1], "Direct 2")
+    service.broadcast_notification("Broadcast 2")
+    assert (service.count_unread(1), service.count_unread(2)) == (2, 3)
+
+def test_read_until(db_session):
+    service = NotificationService(NotificationRepository(db_session))
+    service.create_notifications([1], "Direct")
+    service.broadcast_notification("Broadcast")
+    assert service.get_read_until(1) == 0
+
+    service.mark_all_read(1)
+    read = [n.notification_id for n in service.get_notifications_page(1, 10).notifications]
+    assert service.get_read_until(1) == max(read)
+
+    service.create_notifications([2], "Other user")
+    service.broadcast_notification("Broadcast 2")
+    new = [n for n in service.get_notifications_page(1, 10).notifications if n.notification_id > service.get_read_until(1)]
+    assert [n.content for n in new] == ["Broadcast 2"]
+
+def test_count_unread_of_existing_notifications(db_session):
+    # Notifications written before the inbox counters existed
+    db_session.add_all([Notification(user_id=1, content="Old"), Notification(user_id=None, content="Old broadcast")])
+    db_session.commit()
+
+    service = NotificationService(NotificationRepository(db_session))
+    # Reading does not create the counters, they start from the existing notifications on the first write
+    assert service.count_unread(1) == 0
+    assert db_session.query(NotificationInbox).count() == 0
+    service.create_notifications([1], "New")
+    assert service.count_unread(1) == 2
+    service.broadcast_notification("New broadcast")
+    assert service.count_unread(1) == 4
+
+def test_user_registered_after_broadcast(db_session):
+    service = NotificationService(NotificationRepository(db_session))
+    service.broadcast_notification("Before registration")
+
+    event = UserService(UserRepository(db_session)).register_user("new_user", "SecureUserPassword3@")
+    assert service.open_inbox(event.user_id) == True
+    assert service.count_unread(event.user_id) == 0
+    assert service.get_notifications_page(event.user_id, 10).notifications == []
+    assert service.get_notifications_by_user_id(event.user_id).notifications == []
+
+    service.broadcast_notification("After registration")
+    assert service.count_unread(event.user_id) == 1
+    assert [n.content for n in service.get_notifications_page(event.user_id, 10).notifications] == ["After registration"]
+    # Users registered before keep receiving both
+    assert [n.content for n in service.get_notifications_page(1, 10).notifications] == ["After registration", "Before registration"]
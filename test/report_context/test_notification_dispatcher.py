@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.database import Base
+from src.register_context.domain.entities.users import User
+from src.register_context.domain.entities.admin import Admin
+from src.register_context.domain.entities.csoperator import CSOperator
+from src.report_context.domain.entities.report import Report
+from src.report_context.domain.entities.notification import Notification
+from src.search_context.domain.entities.chargingstation import ChargingStation
+from src.report_context.infrastructure.NotificationDispatcher import NotificationDispatcher
+
+
+@pytest.fixture
+def Session(tmp_path):
+    # A database file, the dispatcher writes from its own thread
+    engine = create_engine(f"sqlite:///{tmp_path}/test.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    session.add(User(user_id=1, username="user_user", password="SecureUserPassword1@"))
+    session.add(User(user_id=2, username="user_user2", password="SecureUserPassword2@"))
+    session.commit()
+    session.close()
+    yield Session
+    engine.dispose()
+
+
+def failing(Session, failures):
+    """Session factory whose first sessions fail on commit"""
+    def commit():
+        raise RuntimeError("database is locked")
+
+    def factory():
+        session = Session()
+        if failures:
+            failures.pop()
+            session.commit = commit
+        return session
+    return factory
+
+
+def test_dispatch_in_batches(Session):
+    dispatcher = NotificationDispatcher(Session, batch_size=10)
+
+    dispatcher.broadcast("Broadcast")
+    dispatcher.dispatch([1, 2], "Direct")
+    dispatcher.dispatch([2], "Direct 2")
+
+    assert dispatcher.flush(timeout=5)
+    session = Session()
+    assert sorted((n.user_id or 0, n.content) for n in session.query(Notification)) == [(0, "Broadcast"), (1, "Direct"), (2, "Direct"), (2, "Direct 2")]
+
+    metrics = dispatcher.metrics()
+    assert metrics["depth"] == 0
+    assert metrics["oldest_lag"] == 0
+    assert metrics["dispatched"] == 3
+    assert metrics["failed"] == 0
+
+
+def test_retry_failed_batch(Session):
+    dispatcher = NotificationDispatcher(failing(Session, [1]), retry_delay=0.01)
+
+    dispatcher.broadcast("Broadcast")
+
+    assert dispatcher.flush(timeout=5)
+    assert Session().query(Notification).count() == 1
+    metrics = dispatcher.metrics()
+    assert (metrics["dispatched"], metrics["retries"], metrics["failed"]) == (1, 1, 0)
+
+
+def test_drop_after_max_attempts(Session):
+    dispatcher = NotificationDispatcher(failing(Session, [1, 1, 1]), max_attempts=3, retry_delay=0.01)
+
+    dispatcher.broadcast("Broadcast")
+
+    assert dispatcher.flush(timeout=5)
+    assert Session().query(Notification).count() == 0
+    metrics = dispatcher.metrics()
+    assert (metrics["dispatched"], metrics["retries"], metrics["failed"]) == (0, 2, 1)
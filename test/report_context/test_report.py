@@ -22,13 +22,14 @@ from sqlalchemy.exc import IntegrityError
 from src.report_context.domain.value_objects.report_description import ReportDescription
 from src.report_context.domain.value_objects.report_severity import ReportSeverity
 from src.report_context.domain.value_objects.report_type import ReportType
+from src.report_context.domain.value_objects.report_filter import ReportFilter
       
 @pytest.fixture
-def db_session():
+def db_session(database_url):
     """Create a new database session for each test."""
     
-    # Set up in-memory SQLite database for testing
-    engine = create_engine('sqlite:///:memory:')  # Or point to your test database
+    # Set up the test database, once per backend (see test/conftest.py)
+    engine = create_engine(database_url)
     print(Base.metadata.tables)
     Base.metadata.create_all(engine)  # Create tables
 
@@ -201,4 +202,74 @@ def test_resolve_report_by_csoperator_id(db_session):
     updated_report = service.update_report(report)
         
     assert updated_report.report.report_id == report.report_id
-    assert updated_report.success == True
\ No newline at end of file
+    assert updated_report.success == True
+
+def test_report_listings_load_in_one_query(db_session, count_queries):
+    for station_id in range(200, 210):
+        db_session.add(ChargingStation(station_id=station_id, postal_code="12345", street="Street", district="Mitte"))
+        db_session.add(Report(description="Report Description", station_id=station_id, user_id=1, admin_id=1, csoperator_id=1 if station_id % 2 else None))
+    db_session.commit()
+    db_session.expunge_all()
+    service = ReportService(ReportRepository(db_session))
+
+    # What the Manage and Resolve Malfunction pages show for every report
+    with count_queries(db_session.get_bind()) as statements:
+        reports = service.get_reports_by_admin_id(1).reports
+        [(r.chargingstation.street, r.chargingstation.postal_code, r.chargingstation.district, r.csoperator.username if r.csoperator else "NA") for r in reports]
+    assert len(reports) == 10
+    assert len(statements) == 1
+
+    db_session.expunge_all()
+    with count_queries(db_session.get_bind()) as statements:
+        reports = service.get_reports_by_csoperator_id(1).reports
+        [(r.chargingstation.street, r.chargingstation.postal_code, r.chargingstation.district) for r in reports]
+    assert len(reports) == 5
+    assert len(statements) == 1
+
+def add_reports(db_session):
+    severities = ["low", "medium", "high"]
+    for i, station_id in enumerate(range(200, 212)):
+        db_session.add(ChargingStation(station_id=station_id, postal_code="12345", street="Street", district="Mitte" if i % 2 else "Pankow"))
+        db_session.add(Report(description="Report Description", station_id=station_id, user_id=1, admin_id=1, severity=severities[i % 3],
+                              status="pending" if i < 8 else "managed", created_at=datetime(2024, 1, 1 + i)))
+    db_session.commit()
+
+def test_get_reports_page_filters(db_session):
+    add_reports(db_session)
+    service = ReportService(ReportRepository(db_session))
+
+    def station_ids(**filters):
+        return [r.station_id for r in service.get_reports_page(ReportFilter(admin_id=1, **filters), limit=100).reports]
+
+    assert station_ids() == list(reversed(range(200, 212)))
+    assert station_ids(statuses=["managed"]) == [211, 210, 209, 208]
+    assert station_ids(severities=["high"], districts=["Pankow"]) == [208, 202]
+    assert station_ids(created_from=datetime(2024, 1, 3), created_to=datetime(2024, 1, 5)) == [203, 202]
+    assert station_ids(types=["software"]) == []
+    assert service.get_reports_page(ReportFilter(admin_id=2)).reports == []
+
+def test_get_reports_page_sorted_and_paged(db_session, count_queries):
+    add_reports(db_session)
+    db_session.expunge_all()
+    service = ReportService(ReportRepository(db_session))
+    report_filter = ReportFilter(admin_id=1, sort_by="severity", descending=False)
+
+    pages, cursor = [], None
+    with count_queries(db_session.get_bind()) as statements:
+        while True:
+            result = service.get_reports_page(report_filter, limit=5, after=cursor)
+            pages.append([(r.severity, r.station_id, r.chargingstation.district) for r in result.reports])
+            cursor = result.next_cursor
+            if cursor is None:
+                break
+
+    # One query per page, severity in its natural order, ties by report ID
+    assert len(statements) == len(pages) == 3
+    assert [len(page) for page in pages] == [5, 5, 2]
+    rows = [row for page in pages for row in page]
+    assert [severity for severity, _, _ in rows] == ["low"] * 4 + ["medium"] * 4 + ["high"] * 4
+    assert [station_id for _, station_id, _ in rows] == [200, 203, 206, 209, 201, 204, 207, 210, 202, 205, 208, 211]
+
+def test_report_filter_invalid_sort_key():
+    with pytest.raises(ValueError):
+        ReportFilter(sort_by="description")
@@ -5,7 +5,7 @@ sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 from datetime import datetime
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from database.database import Base
 from sqlalchemy.orm import sessionmaker
 from src.register_context.domain.entities.admin import Admin
@@ -18,6 +18,7 @@ from src.report_context.infrastructure.repositories.ReportRepository import Repo
 from src.report_context.domain.events.ReportAlreadyExistsEvent import ReportAlreadyExistsEvent
 from src.report_context.domain.events.ReportCreateEvent import ReportCreateEvent
 from src.report_context.domain.aggregate.ReportAggregateService import ReportAggregateService
+from src.report_context.application.services.ReportService import ReportService
 from src.report_context.infrastructure.repositories.NotificationRepository import NotificationRepository
 from src.register_context.infrastructure.repositories.UserRepository import UserRepository
 from src.register_context.infrastructure.repositories.AdminRepository import AdminRepository
@@ -25,14 +26,17 @@ from src.search_context.infrastructure.repositories.ChargingStationRepository im
 from src.register_context.infrastructure.repositories.CSOperatorRepository import CSOperatorRepository
 from sqlalchemy.exc import IntegrityError
 from src.report_context.domain.events.ReportUpdateEvent import ReportUpdateEvent
+from src.report_context.domain.events.ReportCreateFailedEvent import ReportCreateFailedEvent
+from src.report_context.domain.events.ReportsUpdateEvent import ReportsUpdateEvent
+from src.report_context.infrastructure.ReportAssigner import RoundRobinPolicy, DistrictAffinityPolicy
 
 
 @pytest.fixture
-def db_session():
+def db_session(database_url):
     """Create a new database session for each test."""
     
-    # Set up in-memory SQLite database for testing
-    engine = create_engine('sqlite:///:memory:')  # Or point to your test database
+    # Set up the test database, once per backend (see test/conftest.py)
+    engine = create_engine(database_url)
     print(Base.metadata.tables)
     Base.metadata.create_all(engine)  # Create tables
 
@@ -64,6 +68,10 @@ def test_malfunction_reporting_success(db_session):
     assert isinstance(result, ReportCreateEvent)
     assert result.success == True
     
+    # One broadcast notification, whatever the number of users
+    assert db_session.query(Notification).count() == 1
+    assert db_session.query(Notification).one().user_id is None
+    
 def test_malfunction_reporting_duplication(db_session):
     test_malfunction_reporting_success(db_session)
     
@@ -113,4 +121,192 @@ def test_resolve_report_malfunction(db_session):
     
     assert isinstance(result, ReportUpdateEvent)
     assert result.report.status == "resolved"
-    assert result.success == True
\ No newline at end of file
+    assert result.success == True
+
+def add_stations(db_session, districts):
+    for station_id, district in enumerate(districts, start=200):
+        db_session.add(ChargingStation(station_id=station_id, postal_code="12345", latitude=52.5200, longitude=13.4050, location="Berlin, Germany", street="Street", district=district, federal_state="Berlin", operator="Berlin Charging", power_charging_dev=5, commission_date=datetime.strptime("11.10.2020", "%d.%m.%Y").date(), type_charging_device="Fast", cs_status="active"))
+    db_session.commit()
+
+def test_report_assigned_to_least_loaded_admin(db_session):
+    db_session.add(Admin(sys_admin_id=2, username="admin_user2", password="SecureAdminPassword2@", number_reports_assigned=0))
+    db_session.add(Admin(sys_admin_id=3, username="admin_user3", password="SecureAdminPassword3@", number_reports_assigned=5))
+    add_stations(db_session, ["Mitte"] * 4)
+    service = ReportAggregateService(ReportRepository(db_session), UserRepository(db_session), NotificationRepository(db_session), AdminRepository(db_session), ChargingStationRepository(db_session), CSOperatorRepository(db_session))
+
+    admins = []
+    for station_id in range(200, 204):
+        report = Report(station_id=station_id, description="Report Description", severity="low", type="hardware", user_id=1)
+        assert isinstance(service.report_malfunction(report), ReportCreateEvent)
+        admins.append(report.admin_id)
+
+    assert admins == [1, 2, 1, 2]
+    db_session.expire_all()
+    assert [a.number_reports_assigned for a in db_session.query(Admin).order_by(Admin.sys_admin_id)] == [2, 2, 5]
+
+def test_resolve_releases_assignees(db_session):
+    test_resolve_report_malfunction(db_session)
+    db_session.expire_all()
+
+    assert db_session.get(Admin, 1).number_reports_assigned == 0
+    assert db_session.get(CSOperator, 1).number_reports_assigned == 0
+
+def test_report_without_admin(db_session):
+    db_session.query(Admin).delete()
+    db_session.commit()
+    service = ReportAggregateService(ReportRepository(db_session), UserRepository(db_session), NotificationRepository(db_session), AdminRepository(db_session), ChargingStationRepository(db_session), CSOperatorRepository(db_session))
+
+    result = service.report_malfunction(Report(station_id=123, description="Report Description", severity="low", type="hardware", user_id=1))
+
+    assert isinstance(result, ReportCreateFailedEvent)
+    assert db_session.query(Report).count() == 0
+
+def test_round_robin_policy(db_session):
+    db_session.add(Admin(sys_admin_id=2, username="admin_user2", password="SecureAdminPassword2@", number_reports_assigned=5))
+    add_stations(db_session, ["Mitte"] * 3)
+    service = ReportAggregateService(ReportRepository(db_session), UserRepository(db_session), NotificationRepository(db_session), AdminRepository(db_session), ChargingStationRepository(db_session), CSOperatorRepository(db_session), admin_policy=RoundRobinPolicy())
+
+    admins = []
+    for station_id in range(200, 203):
+        report = Report(station_id=station_id, description="Report Description", severity="low", type="hardware", user_id=1)
+        service.report_malfunction(report)
+        admins.append(report.admin_id)
+
+    assert admins == [1, 2, 1]
+
+def test_district_affinity_policy(db_session):
+    db_session.add(CSOperator(cs_operator_id=2, username="cs_operator_user2", password="SecureCSOperatorPassword2@", number_reports_assigned=0))
+    add_stations(db_session, ["Mitte", "Pankow", "Pankow"])
+    service = ReportAggregateService(ReportRepository(db_session), UserRepository(db_session), NotificationRepository(db_session), AdminRepository(db_session), ChargingStationRepository(db_session), CSOperatorRepository(db_session), csoperator_policy=DistrictAffinityPolicy(max_extra=1))
+
+    operators = []
+    for station_id in range(200, 203):
+        report = Report(station_id=station_id, description="Report Description", severity="low", type="hardware", user_id=1)
+        service.report_malfunction(report)
+        service.forward_report_malfunction(report)
+        operators.append(report.csoperator_id)
+
+    # The second Pankow report goes to the operator already working there, not the least loaded one
+    assert operators == [1, 2, 2]
+
+def test_malfunction_reporting_commits_once(db_session):
+    # Database commits, a savepoint is not one
+    commits = []
+    event.listen(db_session.get_bind(), "commit", lambda connection: commits.append(True))
+
+    test_malfunction_reporting_success(db_session)
+
+    assert len(commits) == 1
+
+def test_malfunction_reporting_failure_rolls_back(db_session):
+    test_malfunction_reporting_failure(db_session)
+    db_session.expire_all()
+
+    # The admin's counter and the station status are rolled back with the report
+    assert db_session.get(Admin, 1).number_reports_assigned == 0
+    assert db_session.get(ChargingStation, 123).cs_status == "active"
+    assert db_session.query(Notification).count() == 0
+
+def test_failed_report_creation_keeps_admin_counter(db_session, monkeypatch):
+    report_repository = ReportRepository(db_session)
+    service = ReportAggregateService(report_repository, UserRepository(db_session), NotificationRepository(db_session), AdminRepository(db_session), ChargingStationRepository(db_session), CSOperatorRepository(db_session))
+    monkeypatch.setattr(report_repository, "create_report", lambda report: False)
+
+    result = service.report_malfunction(Report(station_id=123, description="Report Description", severity="low", type="hardware", user_id=1))
+    db_session.expire_all()
+
+    assert isinstance(result, ReportCreateFailedEvent)
+    # The counter incremented by the assignment is rolled back, not committed without a report
+    assert db_session.get(Admin, 1).number_reports_assigned == 0
+    assert db_session.get(ChargingStation, 123).cs_status == "active"
+
+def test_forward_and_resolve_report_malfunctions(db_session):
+    db_session.add(CSOperator(cs_operator_id=2, username="cs_operator_user2", password="SecureCSOperatorPassword2@", number_reports_assigned=0))
+    add_stations(db_session, ["Mitte"] * 6)
+    service = ReportAggregateService(ReportRepository(db_session), UserRepository(db_session), NotificationRepository(db_session), AdminRepository(db_session), ChargingStationRepository(db_session), CSOperatorRepository(db_session))
+    reports = [Report(station_id=station_id, description="Report Description", severity="low", type="hardware", user_id=1) for station_id in range(200, 206)]
+    for report in reports:
+        service.report_malfunction(report)
+
+    result = service.forward_report_malfunctions(reports)
+
+    assert isinstance(result, ReportsUpdateEvent)
+    assert len(result.reports) == 6
+    assert {report.status for report in reports} == {"managed"}
+    assert sorted(report.csoperator_id for report in reports) == [1, 1, 1, 2, 2, 2]
+    assert [o.number_reports_assigned for o in db_session.query(CSOperator).order_by(CSOperator.cs_operator_id)] == [3, 3]
+
+    result = service.resolve_report_malfunctions(reports)
+
+    assert isinstance(result, ReportsUpdateEvent)
+    db_session.expire_all()
+    assert {report.status for report in db_session.query(Report)} == {"resolved"}
+    assert [o.number_reports_assigned for o in db_session.query(CSOperator)] == [0, 0]
+    assert db_session.get(Admin, 1).number_reports_assigned == 0
+    assert {s.cs_status for s in db_session.query(ChargingStation).filter(ChargingStation.station_id >= 200)} == {"available"}
+    # One broadcast per reported and per resolved malfunction
+    assert db_session.query(Notification).count() == 12
+
+def test_report_service_forwards_and_resolves_reports(db_session):
+    add_stations(db_session, ["Mitte"] * 2)
+    aggregate = ReportAggregateService(ReportRepository(db_session), UserRepository(db_session), NotificationRepository(db_session), AdminRepository(db_session), ChargingStationRepository(db_session), CSOperatorRepository(db_session))
+    service = ReportService(ReportRepository(db_session), aggregate)
+    reports = [Report(station_id=station_id, description="Report Description", severity="low", type="hardware", user_id=1) for station_id in (200, 201)]
+    for report in reports:
+        aggregate.report_malfunction(report)
+
+    assert isinstance(service.forward_reports(reports), ReportsUpdateEvent)
+    assert db_session.get(CSOperator, 1).number_reports_assigned == 2
+    assert isinstance(service.resolve_reports(reports), ReportsUpdateEvent)
+    db_session.expire_all()
+    assert {report.status for report in db_session.query(Report)} == {"resolved"}
+    assert db_session.get(CSOperator, 1).number_reports_assigned == 0
+
+def test_forward_report_malfunctions_changed_meanwhile(db_session):
+    add_stations(db_session, ["Mitte"] * 2)
+    service = ReportAggregateService(ReportRepository(db_session), UserRepository(db_session), NotificationRepository(db_session), AdminRepository(db_session), ChargingStationRepository(db_session), CSOperatorRepository(db_session))
+    reports = [Report(station_id=station_id, description="Report Description", severity="low", type="hardware", user_id=1) for station_id in (200, 201)]
+    for report in reports:
+        service.report_malfunction(report)
+    assert [report.status for report in reports] == ["pending", "pending"]
+    # Forwarded by someone else since the reports were loaded
+    other_session = sessionmaker(bind=db_session.get_bind())()
+    other_session.execute(Report.__table__.update().where(Report.report_id == reports[0].report_id).values(status="managed"))
+    other_session.commit()
+    other_session.close()
+
+    result = service.forward_report_malfunctions(reports)
+
+    assert isinstance(result, ValueError)
+    db_session.expire_all()
+    assert db_session.get(Report, reports[1].report_id).status == "pending"
+    assert db_session.get(CSOperator, 1).number_reports_assigned == 0
+
+def test_one_open_report_per_station(db_session):
+    test_malfunction_reporting_success(db_session)
+
+    db_session.add(Report(station_id=123, description="Report Description", user_id=1))
+    with pytest.raises(IntegrityError):
+        db_session.commit()
+    db_session.rollback()
+
+    # Resolved reports do not count
+    db_session.query(Report).update({Report.status: "resolved"})
+    db_session.add(Report(station_id=123, description="Report Description", user_id=1))
+    db_session.commit()
+
+def test_malfunction_reporting_concurrent_duplicate(db_session):
+    test_malfunction_reporting_success(db_session)
+    report_repository = ReportRepository(db_session)
+    service = ReportAggregateService(report_repository, UserRepository(db_session), NotificationRepository(db_session), AdminRepository(db_session), ChargingStationRepository(db_session), CSOperatorRepository(db_session))
+    # A concurrent submitter passes the check before the first report is committed
+    find_open_report = report_repository.find_open_report_by_station_id
+    checks = []
+    report_repository.find_open_report_by_station_id = lambda station_id: find_open_report(station_id) if checks else checks.append(station_id)
+
+    result = service.report_malfunction(Report(station_id=123, description="Report Description", severity="low", type="hardware", user_id=1))
+
+    assert isinstance(result, ReportAlreadyExistsEvent)
+    assert db_session.query(Report).count() == 1
+    db_session.expire_all()
+    assert db_session.get(Admin, 1).number_reports_assigned == 1
@@ -44,9 +44,9 @@ def get_charging_station_by_postal_code(db_session, postal_code: str):
     return db_session.query(ChargingStation).filter(ChargingStation.postal_code == postal_code).first()
 
 @pytest.fixture(scope="module")
-def db_session():
-    # Set up in-memory SQLite database for testing
-    engine = create_engine("sqlite:///:memory:")
+def db_session(database_url):
+    # Set up the test database, once per backend (see test/conftest.py)
+    engine = create_engine(database_url)
     Base.metadata.create_all(bind=engine)  # Create all tables
 
     session = SessionLocal(bind=engine)  # Create session for testing
@@ -0,0 +1,137 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from streamlit.runtime.scriptrunner_utils.exceptions import RerunException, StopException
+from database.database import set_sqlite_pragmas, session_scope, unit_of_work, commit, after_commit
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/test.db", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE station (id INTEGER PRIMARY KEY, status TEXT)")
+        connection.exec_driver_sql("INSERT INTO station VALUES (1, 'available')")
+    yield engine
+    engine.dispose()
+
+
+def test_pragmas(engine):
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+
+def test_session_scope_commits_and_closes(engine):
+    Session = sessionmaker(bind=engine)
+
+    with session_scope(Session) as session:
+        session.execute(text("UPDATE station SET status = 'out_of_service'"))
+    assert engine.pool.checkedout() == 0
+
+    with pytest.raises(ValueError):
+        with session_scope(Session) as session:
+            session.execute(text("UPDATE station SET status = 'available'"))
+            raise ValueError("failed request")
+    assert engine.pool.checkedout() == 0
+
+    with session_scope(Session) as session:
+        assert session.execute(text("SELECT status FROM station")).scalar() == "out_of_service"
+
+
+def test_readers_do_not_wait_for_writer(engine):
+    Session = sessionmaker(bind=engine)
+
+    with session_scope(Session) as writer:
+        writer.execute(text("UPDATE station SET status = 'out_of_service'"))
+        # With WAL the open write transaction does not block readers, they see the last commit
+        with session_scope(Session) as reader:
+            assert reader.execute(text("SELECT status FROM station")).scalar() == "available"
+
+
+def test_unit_of_work_commits_once(engine):
+    session = sessionmaker(bind=engine)()
+    commits = []
+    event.listen(session, "after_commit", lambda session: commits.append(True))
+    done = []
+
+    with unit_of_work(session):
+        session.execute(text("UPDATE station SET status = 'out_of_service'"))
+        commit(session)
+        with unit_of_work(session):
+            session.execute(text("INSERT INTO station VALUES (2, 'available')"))
+            commit(session)
+        after_commit(session, lambda: done.append(True))
+        assert (commits, done) == ([], [])
+
+    assert (commits, done) == ([True], [True])
+    session.close()
+
+
+def test_unit_of_work_rolls_back(engine):
+    session = sessionmaker(bind=engine)()
+    done = []
+
+    with pytest.raises(ValueError):
+        with unit_of_work(session):
+            session.execute(text("UPDATE station SET status = 'out_of_service'"))
+            commit(session)
+            after_commit(session, lambda: done.append(True))
+            raise ValueError("failed request")
+
+    assert done == []
+    assert session.execute(text("SELECT status FROM station")).scalar() == "available"
+    session.close()
+
+
+def test_session_scope_commits_before_rerun(engine):
+    Session = sessionmaker(bind=engine)
+
+    with pytest.raises(RerunException):
+        with session_scope(Session) as session:
+            session.execute(text("UPDATE station SET status = 'out_of_service'"))
+            raise RerunException(None)
+    assert engine.pool.checkedout() == 0
+
+    with pytest.raises(StopException):
+        with session_scope(Session) as session:
+            session.execute(text("INSERT INTO station VALUES (2, 'available')"))
+            raise StopException()
+
+    with session_scope(Session) as session:
+        assert session.execute(text("SELECT id, status FROM station")).all() == [(1, 'out_of_service'), (2, 'available')]
+
+
+@pytest.mark.parametrize("interrupt", [GeneratorExit, SystemExit, KeyboardInterrupt])
+def test_session_scope_rolls_back_on_interrupt(engine, interrupt):
+    Session = sessionmaker(bind=engine)
+
+    with pytest.raises(interrupt):
+        with session_scope(Session) as session:
+            session.execute(text("UPDATE station SET status = 'out_of_service'"))
+            raise interrupt()
+    assert engine.pool.checkedout() == 0
+
+    with session_scope(Session) as session:
+        assert session.execute(text("SELECT status FROM station")).scalar() == "available"
+
+
+def test_unit_of_work_rolls_back_on_rerun(engine):
+    Session = sessionmaker(bind=engine)
+
+    with pytest.raises(RerunException):
+        with session_scope(Session) as session:
+            session.execute(text("UPDATE station SET status = 'out_of_service'"))
+            with unit_of_work(session):
+                session.execute(text("INSERT INTO station VALUES (2, 'available')"))
+                commit(session)
+                raise RerunException(None)
+
+    with session_scope(Session) as session:
+        assert session.execute(text("SELECT id, status FROM station")).all() == [(1, 'available')]
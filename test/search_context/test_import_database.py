@@ -0,0 +1,149 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from datetime import date
+import pytest
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.database import Base
+import database.import_database as db
+from src.register_context.domain.entities.users import User
+from src.report_context.domain.entities.notification import Notification
+from src.report_context.domain.entities.report import Report
+from src.search_context.domain.entities.chargingstation import ChargingStation, RegisterImport
+
+
+@pytest.fixture
+def session_factory(monkeypatch, database_url):
+    """Point the importer at the test database."""
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(db, "SessionLocal", Session)
+    yield Session
+    Base.metadata.drop_all(bind=engine)
+
+
+def create_register_df():
+    return pd.DataFrame({
+        "Postleitzahl": [10115, 12043, None],
+        "Breitengrad": ["52,5200", "52,4801", "52,5000"],
+        "Längengrad": ["13,4050", "13,4322", "13,4000"],
+        "Ort": ["Berlin", "Berlin", "Berlin"],
+        "Straße": ["Unter den Linden", "Karl-Marx-Straße", "Alexanderplatz"],
+        "Kreis/kreisfreie Stadt": ["Berlin", "Berlin", "Berlin"],
+        "Bundesland": ["Berlin", "Berlin", "Berlin"],
+        "Betreiber": ["Berlin Charging", "GreenCharge", "GreenCharge"],
+        "Nennleistung Ladeeinrichtung [kW]": ["22,0", "150", None],
+        "Art der Ladeeinrichung": ["Normalladeeinrichtung", "Schnellladeeinrichtung", "Normalladeeinrichtung"],
+        "Inbetriebnahmedatum": ["2020-10-11", "not a date", None],
+    })
+
+
+def test_import_converts_columns(session_factory):
+    db.import_charging_stations_from_csv(create_register_df())
+
+    session = session_factory()
+    stations = {s.street: s for s in session.query(ChargingStation).all()}
+
+    assert len(stations) == 3
+    station = stations["Unter den Linden"]
+    assert station.postal_code == "10115"
+    assert station.latitude == 52.52
+    assert station.longitude == 13.405
+    assert station.power_charging_dev == 22.0
+    assert station.commission_date == date(2020, 10, 11)
+    assert station.cs_status == "available"
+
+    assert stations["Karl-Marx-Straße"].commission_date is None
+    assert stations["Alexanderplatz"].postal_code is None
+    assert stations["Alexanderplatz"].power_charging_dev is None
+    assert len({s.station_id for s in stations.values()}) == 3
+
+
+def test_import_in_chunks_reports_progress(session_factory):
+    progress = []
+    db.import_charging_stations_from_csv(create_register_df(), chunk_size=2, progress=lambda done, total: progress.append((done, total)))
+
+    assert progress == [(2, 3), (3, 3)]
+    assert session_factory().query(ChargingStation).count() == 3
+
+
+def test_station_ids_are_deterministic(session_factory):
+    first = db.prepare_charging_stations(create_register_df())
+    second = db.prepare_charging_stations(create_register_df().iloc[::-1])
+
+    assert sorted(first["station_id"]) == sorted(second["station_id"])
+
+
+def test_delta_import(session_factory):
+    db.import_charging_stations_from_csv(create_register_df())
+    session = session_factory()
+    ids = {s.street: s.station_id for s in session.query(ChargingStation).all()}
+
+    register = create_register_df()
+    register.loc[0, "Nennleistung Ladeeinrichtung [kW]"] = "50,0"            # changed
+    register = register.drop(index=1)                                        # vanished
+    register.loc[3] = register.loc[0]
+    register.loc[3, "Straße"] = "Friedrichstraße"                            # new
+
+    result = db.import_charging_stations_delta(register)
+
+    assert result == {"inserted": 1, "updated": 1, "removed": 1}
+    session.expire_all()
+    stations = {s.street: s for s in session.query(ChargingStation).all()}
+    assert stations["Unter den Linden"].station_id == ids["Unter den Linden"]
+    assert stations["Unter den Linden"].power_charging_dev == 50.0
+    assert stations["Karl-Marx-Straße"].cs_status == "decommissioned"
+    assert stations["Friedrichstraße"].cs_status == "available"
+
+    # Unchanged register: nothing to do
+    assert db.import_charging_stations_delta(register) == {"inserted": 0, "updated": 0, "removed": 0}
+
+
+def import_with_random_ids(session, register):
+    """Fills the table the way the first imports did, random ascending ids in register order and no recorded import"""
+    df = db.prepare_charging_stations(register)
+    # Back to register order, identical rows are interchangeable
+    df = df.set_index("street", drop=False).loc[register["Straße"].unique()].reset_index(drop=True)
+    df["station_id"] = np.sort(np.random.default_rng(0).integers(1, 2**62, size=len(df)))
+    db._insert_rows(session.connection(), df, 5000, None)
+    session.commit()
+
+
+def test_delta_import_rekeys_random_ids(session_factory):
+    register = create_register_df()
+    register.loc[3] = register.loc[2]                                       # identical rows
+    session = session_factory()
+    import_with_random_ids(session, register)
+    old_ids = [s.station_id for s in session.query(ChargingStation).order_by(ChargingStation.station_id)]
+    session.add(Report(description="Broken", station_id=old_ids[0]))
+    session.commit()
+
+    assert db.import_charging_stations_delta(register) == {"inserted": 0, "updated": 0, "removed": 0}
+
+    session.expire_all()
+    stations = session.query(ChargingStation).all()
+    assert sorted(s.station_id for s in stations) == sorted(db.prepare_charging_stations(register)["station_id"])
+    assert {s.cs_status for s in stations} == {"available"}
+    report = session.query(Report).one()
+    assert report.station_id not in old_ids
+    assert report.chargingstation.street == "Unter den Linden"
+    assert session.query(RegisterImport).one().key_version == db.STATION_KEY_VERSION
+    session.close()
+
+
+def test_delta_import_once_per_signature(session_factory):
+    db.import_charging_stations_from_csv(create_register_df(), signature="100:1")
+    register = create_register_df().drop(index=1)
+
+    assert db.import_charging_stations_delta(register, signature="100:1") == {"inserted": 0, "updated": 0, "removed": 0}
+    assert db.import_charging_stations_delta(register, signature="90:2") == {"inserted": 0, "updated": 0, "removed": 1}
+
+    session = session_factory()
+    assert [i.signature for i in session.query(RegisterImport).order_by(RegisterImport.import_id)] == ["100:1", "90:2"]
+    session.close()
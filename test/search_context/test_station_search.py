@@ -0,0 +1,374 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import os
+import pytest
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.database import Base, unit_of_work
+from src.register_context.domain.entities.users import User
+from src.report_context.domain.entities.notification import Notification
+from src.report_context.domain.entities.report import Report
+from src.search_context.domain.entities.chargingstation import ChargingStation
+from src.search_context.domain.events.StationFoundEvent import StationFoundEvent
+from src.search_context.domain.events.StationNotFoundEvent import StationNotFoundEvent
+from src.search_context.domain.value_objects.power_category import PowerCategory, power_category_codes
+from src.search_context.domain.value_objects.station_view import StationView
+from src.search_context.infrastructure.StationSpatialIndex import StationSpatialIndex
+from src.search_context.infrastructure.StationSnapshot import StationSnapshot
+from src.search_context.infrastructure.repositories import ChargingStationRepository as station_repository
+from src.search_context.infrastructure.repositories.ChargingStationRepository import ChargingStationRepository
+from src.search_context.application.services.ChargingStationService import ChargingStationService
+from src.search_context.application.services.PostalCodeSearchCache import PostalCodeSearchCache
+
+ALEXANDERPLATZ = (52.5219, 13.4132)
+
+# station_id, latitude, longitude, power, status
+STATIONS = [
+    (1, 52.5219, 13.4140, 22.0, "available"),       # ~55 m
+    (2, 52.5250, 13.4132, 150.0, "available"),      # ~345 m
+    (3, 52.5160, 13.3780, 300.0, "available"),      # ~2.5 km
+    (4, 52.5221, 13.4130, 11.0, "decommissioned"),  # ~25 m
+    (5, 52.4500, 13.3000, None, "available"),       # ~11 km
+    (6, None, None, 50.0, "available"),             # not located
+]
+
+
+@pytest.fixture
+def session(database_url):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    add_stations(session)
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_power_category():
+    assert PowerCategory.from_power(50).value == "Low Power"
+    assert PowerCategory.from_power(50.1).value == "Medium Power"
+    assert PowerCategory.from_power(500).value == "High Power"
+    assert PowerCategory.from_power(501).value == "Ultra High Power"
+    assert PowerCategory.from_power(None) is None
+    with pytest.raises(ValueError):
+        PowerCategory("Turbo")
+
+
+def test_power_category_codes():
+    powers = [0, 50, 50.1, 150, 150.1, 500, 500.1, float("nan"), None]
+    assert power_category_codes(powers).tolist() == [0, 0, 1, 1, 2, 2, 3, -1, -1]
+    # Other thresholds, e.g. a single fast charging limit
+    assert power_category_codes([22, 150, 300], [("Normal", 150), ("Fast", None)]).tolist() == [0, 0, 1]
+
+
+def test_index_matches_power_category():
+    powers = [0, 50, 50.1, 150, 151, 500, 501, float("nan")]
+    index = StationSpatialIndex(range(len(powers)), [52.5] * len(powers), [13.4] * len(powers), powers, ["available"] * len(powers))
+
+    for code, power in zip(index.categories, powers):
+        category = PowerCategory.from_power(power)
+        assert code == (-1 if category is None else ["Low Power", "Medium Power", "High Power", "Ultra High Power"].index(category.value))
+
+
+def test_nearest(session):
+    repository = ChargingStationRepository(session)
+
+    stations = repository.find_nearest(*ALEXANDERPLATZ, k=3)
+    assert [s.charging_station.station_id for s in stations] == [4, 1, 2]
+    assert stations[0].distance < stations[1].distance < stations[2].distance
+    assert stations[1].distance == pytest.approx(54, abs=2)
+
+    stations = repository.find_nearest(*ALEXANDERPLATZ, k=10, statuses=["available"])
+    assert [s.charging_station.station_id for s in stations] == [1, 2, 3, 5]
+
+    stations = repository.find_nearest(*ALEXANDERPLATZ, k=1, power_categories=["High Power"])
+    assert [s.charging_station.station_id for s in stations] == [3]
+
+
+def test_within_radius(session):
+    repository = ChargingStationRepository(session)
+
+    stations = repository.find_within_radius(*ALEXANDERPLATZ, 500)
+    assert [s.charging_station.station_id for s in stations] == [4, 1, 2]
+
+    stations = repository.find_within_radius(*ALEXANDERPLATZ, 5000, power_categories=["Low Power", "Medium Power"], statuses=["available"])
+    assert [s.charging_station.station_id for s in stations] == [1, 2]
+
+
+def test_status_update_is_searchable(session):
+    service = ChargingStationService(ChargingStationRepository(session))
+    assert [s.charging_station.station_id for s in service.find_nearest_stations(*ALEXANDERPLATZ, k=1).stations] == [1]
+
+    service.update_charging_station(1, "out_of_service")
+
+    event = service.find_nearest_stations(*ALEXANDERPLATZ, k=1)
+    assert isinstance(event, StationFoundEvent)
+    assert [s.charging_station.station_id for s in event.stations] == [2]
+
+    event = service.find_stations_within_radius(*ALEXANDERPLATZ, 100)
+    assert isinstance(event, StationNotFoundEvent)
+
+
+def test_rtree_bounds(session):
+    repository = ChargingStationRepository(session)
+
+    stations = repository.find_in_bounds(52.51, 13.37, 52.53, 13.42)
+    assert sorted(s.charging_station.station_id for s in stations) == [1, 2, 3, 4]
+
+    stations = repository.find_in_bounds(52.51, 13.37, 52.53, 13.42, power_categories=["Low Power"], statuses=["available"])
+    assert [s.charging_station.station_id for s in stations] == [1]
+
+
+def test_rtree_radius_matches_index(session):
+    repository = ChargingStationRepository(session)
+
+    for radius in [30, 500, 5000, 20000]:
+        for categories in [None, ["Medium Power", "High Power"], ["Ultra High Power"]]:
+            expected = repository.find_within_radius(*ALEXANDERPLATZ, radius, categories, ["available"])
+            stations = repository.find_within_radius_sql(*ALEXANDERPLATZ, radius, categories, ["available"])
+            assert [s.charging_station.station_id for s in stations] == [s.charging_station.station_id for s in expected]
+            # Both project around a slightly different latitude
+            assert [s.distance for s in stations] == pytest.approx([s.distance for s in expected], rel=1e-3)
+
+
+def test_rtree_follows_table_changes(session):
+    repository = ChargingStationRepository(session)
+    assert [s.charging_station.station_id for s in repository.find_within_radius_sql(*ALEXANDERPLATZ, 100)] == [4, 1]
+
+    session.query(ChargingStation).filter_by(station_id=1).update({"latitude": 52.45, "longitude": 13.30})
+    session.query(ChargingStation).filter_by(station_id=4).delete()
+    session.query(ChargingStation).filter_by(station_id=6).update({"latitude": 52.5220, "longitude": 13.4131})
+    session.commit()
+
+    assert [s.charging_station.station_id for s in repository.find_within_radius_sql(*ALEXANDERPLATZ, 100)] == [6]
+    assert sorted(s.charging_station.station_id for s in repository.find_within_radius_sql(52.45, 13.30, 100)) == [1, 5]
+
+
+def test_rtree_backfills_existing_database():
+    # A database whose table was created before the R*Tree existed
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE chargingstation AS SELECT 1 AS station_id, '10178' AS postal_code, 52.5219 AS latitude, "
+                                   "13.4140 AS longitude, NULL AS location, NULL AS street, NULL AS district, 'Berlin' AS federal_state, "
+                                   "NULL AS operator, 22.0 AS power_charging_dev, NULL AS commission_date, NULL AS type_charging_device, "
+                                   "'available' AS cs_status")
+    repository = ChargingStationRepository(sessionmaker(bind=engine)())
+
+    assert [s.charging_station.station_id for s in repository.find_within_radius_sql(*ALEXANDERPLATZ, 100)] == [1]
+
+
+def test_geo_backend(session):
+    # CI sets TEST_POSTGIS to 1 or 0, so a PostgreSQL database runs the PostGIS or the b-tree search as intended
+    ChargingStationRepository(session).find_within_radius_sql(*ALEXANDERPLATZ, 100)
+    backend = station_repository._geo_backends[session.get_bind()]
+
+    if session.get_bind().dialect.name == "sqlite":
+        assert backend == "rtree"
+    elif os.environ.get("TEST_POSTGIS") in ("0", "1"):
+        assert backend == {"0": "btree", "1": "postgis"}[os.environ["TEST_POSTGIS"]]
+
+
+def test_bounds_without_rtree(session):
+    # Databases without R*Tree or PostGIS fall back to the table's coordinates
+    repository = ChargingStationRepository(session)
+    expected = [s.charging_station.station_id for s in repository.find_within_radius_sql(*ALEXANDERPLATZ, 5000)]
+
+    station_repository._geo_backends[session.get_bind()] = "btree"
+
+    assert [s.charging_station.station_id for s in repository.find_within_radius_sql(*ALEXANDERPLATZ, 5000)] == expected
+    assert sorted(s.charging_station.station_id for s in repository.find_in_bounds(52.51, 13.37, 52.53, 13.42)) == [1, 2, 3, 4]
+
+
+def test_find_by_postal_code_views(session):
+    stations = ChargingStationRepository(session).find_by_postal_code("10178")
+
+    assert all(isinstance(s, StationView) for s in stations)
+    assert sorted(s.station_id for s in stations) == [1, 2, 3, 5, 6]
+    assert stations[0].as_dict()["street"] == f"Street {stations[0].station_id}"
+    with pytest.raises(AttributeError):
+        stations[0].cs_status = "out_of_service"
+
+
+def test_snapshot_filters():
+    rows = [
+        (1, "10115", 52.53, 13.38, "Berlin", "Street 1", "Mitte", "Berlin", "GreenCharge", 22.0, None, "Normalladeeinrichtung", "available"),
+        (2, "10115", 52.53, 13.39, "Berlin", "Street 2", "Mitte", "Berlin", "VoltNet", 150.0, None, "Schnellladeeinrichtung", "available"),
+        (3, "10178", None, None, "Berlin", "Street 3", "Mitte", "Berlin", "GreenCharge", None, None, None, "out_of_service"),
+    ]
+    snapshot = StationSnapshot(rows)
+
+    assert [s.station_id for s in snapshot.find(postal_codes=["10115"])] == [1, 2]
+    assert [s.station_id for s in snapshot.find(operators=["GreenCharge"], statuses=["available"])] == [1]
+    assert [s.station_id for s in snapshot.find(power_categories=["Medium Power", "High Power"])] == [2]
+    assert snapshot.find(postal_codes=["14199"]) == []
+    assert snapshot.find(postal_codes=["10178"]) == [StationView(*rows[2])]
+
+    snapshot.set_status([1, 3], "available")
+    assert [s.station_id for s in snapshot.find(statuses=["available"])] == [1, 2, 3]
+    assert list(snapshot.column("cs_status")) == ["available"] * 3
+
+
+def test_snapshot_commission_date(session):
+    session.query(ChargingStation).filter_by(station_id=1).update({"commission_date": date(2020, 10, 11)})
+    session.commit()
+
+    stations = ChargingStationRepository(session).find_by_postal_code("10178")
+    assert [s.commission_date for s in stations] == [date(2020, 10, 11), None, None, None, None]
+
+
+def test_snapshot_follows_status_updates(session, count_queries):
+    repository = ChargingStationRepository(session)
+    assert [s.station_id for s in repository.find_by_postal_code("10178")] == [1, 2, 3, 5, 6]
+
+    repository.update_charging_station(2, "out_of_service")
+
+    with count_queries(session.get_bind()) as queries:
+        assert [s.station_id for s in repository.find_by_postal_code("10178")] == [1, 3, 5, 6]
+        assert [s.charging_station.station_id for s in repository.find_nearest(*ALEXANDERPLATZ, k=2, statuses=["available"])] == [1, 3]
+    # The station version per search, then only the rows of the nearest stations
+    assert len(queries) == 3
+
+
+def add_stations(session):
+    for station_id, latitude, longitude, power, status in STATIONS:
+        session.add(ChargingStation(station_id=station_id, postal_code="10178", latitude=latitude, longitude=longitude,
+                                    location="Berlin", street=f"Street {station_id}", district="Berlin", federal_state="Berlin",
+                                    operator="GreenCharge", power_charging_dev=power, commission_date=None,
+                                    type_charging_device="Normalladeeinrichtung", cs_status=status))
+    session.commit()
+
+
+@pytest.fixture
+def engines(tmp_path):
+    """Two engines of one SQLite file, standing in for two server processes"""
+    url = f"sqlite:///{tmp_path / 'stations.db'}"
+    engines = [create_engine(url), create_engine(url)]
+    Base.metadata.create_all(engines[0])
+    with sessionmaker(bind=engines[0])() as session:
+        add_stations(session)
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+def test_snapshot_follows_other_processes(engines):
+    writer, reader = engines
+    with sessionmaker(bind=reader)() as session:
+        repository = ChargingStationRepository(session)
+        assert [s.station_id for s in repository.find_by_postal_code("10178")] == [1, 2, 3, 5, 6]
+        assert [s.charging_station.station_id for s in repository.find_nearest(*ALEXANDERPLATZ, k=2, statuses=["available"])] == [1, 2]
+
+    with sessionmaker(bind=writer)() as session:
+        ChargingStationRepository(session).update_charging_station(2, "out_of_service")
+
+    with sessionmaker(bind=reader)() as session:
+        repository = ChargingStationRepository(session)
+        assert [s.station_id for s in repository.find_by_postal_code("10178")] == [1, 3, 5, 6]
+        assert [s.station_id for s in repository.find_all(statuses=["out_of_service", "decommissioned"])] == [2, 4]
+        assert [s.charging_station.station_id for s in repository.find_nearest(*ALEXANDERPLATZ, k=2, statuses=["available"])] == [1, 3]
+
+
+def test_find_all_stations(session):
+    service = ChargingStationService(ChargingStationRepository(session))
+
+    assert [s.station_id for s in service.find_all_stations().stations] == [1, 2, 3, 5, 6]
+    assert [s.station_id for s in service.find_all_stations(statuses=["decommissioned"]).stations] == [4]
+    assert isinstance(service.find_all_stations(statuses=["out_of_service"]), StationNotFoundEvent)
+
+
+def test_postal_code_cache(session, count_queries):
+    service = ChargingStationService(ChargingStationRepository(session), PostalCodeSearchCache())
+
+    assert len(service.find_stations_by_postal_code("10178").stations) == 5
+    with count_queries(session.get_bind()) as queries:
+        assert len(service.find_stations_by_postal_code("10178").stations) == 5
+    # Only the station version is read
+    assert len(queries) == 1
+    assert isinstance(service.find_stations_by_postal_code("10115"), StationNotFoundEvent)
+    assert isinstance(service.find_stations_by_postal_code("10115"), StationNotFoundEvent)
+    assert service.cache.metrics() == {"size": 2, "hits": 2, "misses": 2, "evictions": 0, "invalidations": 0}
+
+
+def test_postal_code_cache_invalidation(session):
+    service = ChargingStationService(ChargingStationRepository(session))
+    service.find_stations_by_postal_code("10178")
+    service.find_stations_by_postal_code("10115")
+
+    # Unchanged status, nothing to invalidate
+    service.update_charging_station(1, "available")
+    assert service.cache.metrics()["invalidations"] == 0
+
+    service.update_charging_station(1, "out_of_service")
+    assert service.cache.metrics()["size"] == 1
+    assert [s.station_id for s in service.find_stations_by_postal_code("10178").stations] == [2, 3, 5, 6]
+
+    # Services of other sessions of the same database share the cache
+    other = ChargingStationService(ChargingStationRepository(sessionmaker(bind=session.get_bind())()))
+    assert other.cache is service.cache
+
+    # An import may change any station
+    station_repository.reset_spatial_index()
+    assert service.cache.metrics()["size"] == 0
+
+
+def test_postal_code_cache_follows_other_processes(engines):
+    writer, reader = engines
+    with sessionmaker(bind=reader)() as session:
+        service = ChargingStationService(ChargingStationRepository(session))
+        assert [s.station_id for s in service.find_stations_by_postal_code("10178").stations] == [1, 2, 3, 5, 6]
+
+    with sessionmaker(bind=writer)() as session:
+        ChargingStationService(ChargingStationRepository(session)).update_charging_station(2, "out_of_service")
+
+    with sessionmaker(bind=reader)() as session:
+        service = ChargingStationService(ChargingStationRepository(session))
+        assert [s.station_id for s in service.find_stations_by_postal_code("10178").stations] == [1, 3, 5, 6]
+    assert service.cache.metrics()["invalidations"] == 0
+
+
+def test_postal_code_cache_eviction(monkeypatch):
+    cache = PostalCodeSearchCache(maxsize=2, ttl=10)
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+
+    cache.put("10115", [1])
+    cache.put("10178", [2])
+    assert cache.get("10115") == [1]
+    cache.put("10435", [3])  # evicts 10178, the least recently used
+    assert cache.get("10178") is None
+
+    now[0] = 11
+    assert cache.get("10115") is None
+    assert cache.metrics() == {"size": 1, "hits": 1, "misses": 2, "evictions": 1, "invalidations": 0}
+
+    # Results of another station version are searched again
+    cache.put("10115", [1], version=1)
+    assert cache.get("10115", version=2) is None
+    assert cache.get("10115") is None
+
+    # A search that ran while its postal code changed is not stored
+    token = cache.token("10115")
+    cache.invalidate({"10115"})
+    cache.put("10115", [1], token)
+    assert cache.get("10115") is None
+
+
+def test_geo_index_setup_joins_unit_of_work(session):
+    repository = ChargingStationRepository(session)
+    station_repository._geo_backends.pop(session.get_bind(), None)
+
+    with pytest.raises(ValueError):
+        with unit_of_work(session):
+            session.query(ChargingStation).filter_by(station_id=1).update({"cs_status": "out_of_service"})
+            repository.find_within_radius_sql(*ALEXANDERPLATZ, 100)
+            raise ValueError("failed request")
+
+    # The index setup did not commit the pending update
+    assert session.get(ChargingStation, 1).cs_status == "available"
+    assert session.get_bind() not in station_repository._geo_backends
+    assert [s.charging_station.station_id for s in repository.find_within_radius_sql(*ALEXANDERPLATZ, 100)] == [4, 1]
+    assert session.get_bind() in station_repository._geo_backends